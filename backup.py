@@ -0,0 +1,367 @@
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+
+HASH_CHUNK = 1024 * 1024
+# Veritabanı kopyası ile dosya taraması uyuşana kadar en fazla bu kadar deneme
+CONSISTENCY_ATTEMPTS = 3
+
+
+class BackupError(Exception):
+    """Yedek alınamadı, doğrulanamadı veya geri yüklenemedi"""
+
+
+def snapshot_database(db_path: str, dest_path: str, pages: int = -1) -> None:
+    """SQLite çevrimiçi yedekleme API'si ile tutarlı veritabanı kopyası al
+
+    Dosya düz kopyalanmaz; uygulama yazarken bile yarım kalmış bir işlem
+    yedeğe girmez.
+    """
+    source = sqlite3.connect(db_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        with dest:
+            source.backup(dest, pages=pages)
+    finally:
+        dest.close()
+        source.close()
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def referenced_files(db_path: Path, storage_name: str) -> List[str]:
+    """Veritabanı kopyasındaki belgelerin depolama dizinine göre dosya yolları"""
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT file_path FROM documents
+            UNION SELECT file_path FROM document_versions
+            UNION SELECT thumbnail_path FROM documents WHERE thumbnail_path IS NOT NULL
+        ''')
+        prefix = storage_name + '/'
+        references = []
+        for (file_path,) in cursor.fetchall():
+            relative = Path(file_path).as_posix()
+            references.append(relative[len(prefix):] if relative.startswith(prefix) else relative)
+        return references
+
+
+class BackupService:
+    """Veritabanı anlık görüntüsü + içerik adresli, artımlı dosya deposu
+
+    Yedek dizini düzeni:
+        blobs/<sha256[:2]>/<sha256>      her içerik bir kez saklanır
+        snapshots/<id>/doxagon.db        çevrimiçi yedekleme API'si ile alınmış kopya
+        snapshots/<id>/manifest.json     dosya yolu → (boyut, mtime, sha256)
+
+    Önceki anlık görüntüdeki boyut ve mtime'ı değişmemiş dosyalar yeniden
+    okunmaz; yalnızca değişen dosyalar hash'lenip depoya kopyalanır.
+
+    Anahtarlık (storage.key_file, varsayılan keys/) şifreli dosyalarla aynı
+    depoya girmesin diye varsayılan olarak hariç tutulur (backup.exclude).
+    Anahtarlık ayrıca, yedekten farklı güvenli bir konuma kopyalanmalıdır
+    (ör. parola kasası veya çevrimdışı ortam); o olmadan şifreli dosyalar
+    geri yüklense de okunamaz.
+    """
+
+    def __init__(self, db_path: str, storage_dir: Path, settings: Dict[str, Any]):
+        self.db_path = db_path
+        self.storage_dir = Path(storage_dir)
+        self.settings = settings
+        self.root = Path(settings['directory'])
+        self.blobs_dir = self.root / "blobs"
+        self.snapshots_dir = self.root / "snapshots"
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.blobs_dir / sha256[:2] / sha256
+
+    def _manifest(self, snapshot_id: str) -> Dict[str, Any]:
+        manifest_file = self.snapshots_dir / snapshot_id / "manifest.json"
+        if not manifest_file.exists():
+            raise BackupError(f"Anlık görüntü bulunamadı: {snapshot_id}")
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """Tamamlanmış anlık görüntüler (eskiden yeniye)"""
+        if not self.snapshots_dir.exists():
+            return []
+        snapshots = []
+        for path in sorted(self.snapshots_dir.iterdir()):
+            # Yarım kalmış yedekler (.partial) manifest yazılmış olsa da listelenmez
+            if path.name.endswith('.partial'):
+                continue
+            if path.is_dir() and (path / "manifest.json").exists():
+                manifest = self._manifest(path.name)
+                snapshots.append({
+                    'id': manifest['id'],
+                    'created_at': manifest['created_at'],
+                    'parent': manifest['parent'],
+                    'files': len(manifest['files']),
+                    'changed': len(manifest['changed']),
+                    'removed': len(manifest['removed']),
+                    'changed_bytes': manifest['changed_bytes'],
+                    'database_size': manifest['database']['size']
+                })
+        return snapshots
+
+    def _walk_storage(self):
+        excluded = set(self.settings['exclude'])
+        root = self.root.resolve()
+        for dirpath, dirnames, filenames in os.walk(self.storage_dir):
+            # Yedek dizini depolama altında olsa bile kendini yedeklemez
+            dirnames[:] = [d for d in dirnames
+                           if d not in excluded and (Path(dirpath) / d).resolve() != root]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                yield path.relative_to(self.storage_dir).as_posix(), path
+
+    def _store_blob(self, path: Path) -> str:
+        """Dosyayı depoya kopyalarken hash'le; içerik zaten varsa kopyayı at"""
+        incoming = self.blobs_dir / "incoming"
+        incoming.mkdir(parents=True, exist_ok=True)
+        temp_path = incoming / f"{os.getpid()}_{path.name}"
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source, open(temp_path, 'wb') as dest:
+            for chunk in iter(lambda: source.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+                dest.write(chunk)
+
+        sha256 = digest.hexdigest()
+        blob_path = self._blob_path(sha256)
+        if blob_path.exists():
+            temp_path.unlink()
+        else:
+            blob_path.parent.mkdir(exist_ok=True)
+            os.replace(temp_path, blob_path)
+        return sha256
+
+    def create_snapshot(self) -> Dict[str, Any]:
+        """Tutarlı veritabanı kopyası ve son yedekten beri değişen dosyaların yedeği"""
+        snapshot_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if (self.snapshots_dir / snapshot_id).exists():
+            raise BackupError(f"Anlık görüntü zaten var: {snapshot_id}")
+
+        previous = self.list_snapshots()
+        parent = self._manifest(previous[-1]['id']) if previous else None
+        parent_files = parent['files'] if parent else {}
+
+        partial_dir = self.snapshots_dir / f"{snapshot_id}.partial"
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        partial_dir.mkdir(parents=True)
+
+        files = {}
+        changed = []
+        changed_bytes = 0
+
+        def add_file(relative: str, path: Path) -> None:
+            nonlocal changed_bytes
+            try:
+                stat = path.stat()
+                known = parent_files.get(relative)
+                if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                    sha256 = known[2]
+                else:
+                    sha256 = self._store_blob(path)
+                    changed.append(relative)
+                    changed_bytes += stat.st_size
+            except FileNotFoundError:
+                # Tarama sırasında silinen dosya (ör. geçici dosya) yedeğe girmez
+                return
+            files[relative] = [stat.st_size, stat.st_mtime_ns, sha256]
+
+        for relative, path in self._walk_storage():
+            add_file(relative, path)
+
+        # Veritabanı taramadan sonra kopyalanır ve referansları dosyalarla
+        # karşılaştırılır: arada yüklenen dosyalar eklenir, arada silinen
+        # (ör. saklama temizliği) kayıtlar için kopya yeniden alınır
+        db_copy = partial_dir / "doxagon.db"
+        for _ in range(CONSISTENCY_ATTEMPTS):
+            snapshot_database(self.db_path, str(db_copy), self.settings['pages_per_step'])
+            missing = [relative for relative in referenced_files(db_copy, self.storage_dir.name)
+                       if relative not in files]
+            for relative in missing:
+                add_file(relative, self.storage_dir / relative)
+            missing = [relative for relative in missing if relative not in files]
+            if not missing:
+                break
+        else:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            raise BackupError(f"Veritabanı ile dosyalar tutarlı değil, eksik: {missing[:3]}")
+
+        manifest = {
+            'id': snapshot_id,
+            'created_at': datetime.now().isoformat(),
+            'parent': parent['id'] if parent else None,
+            'storage_dir': self.storage_dir.name,
+            'database': {
+                'file': Path(self.db_path).name,
+                'size': db_copy.stat().st_size,
+                'sha256': _sha256(db_copy)
+            },
+            'files': files,
+            'changed': changed,
+            'removed': sorted(set(parent_files) - set(files)),
+            'changed_bytes': changed_bytes
+        }
+        with open(partial_dir / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        os.replace(partial_dir, self.snapshots_dir / snapshot_id)
+        return manifest
+
+    def verify(self, snapshot_id: str, deep: bool = False) -> Dict[str, Any]:
+        """Anlık görüntüyü doğrula: veritabanı bütünlüğü, dosyalar, belge referansları"""
+        manifest = self._manifest(snapshot_id)
+        db_copy = self.snapshots_dir / snapshot_id / "doxagon.db"
+        errors = []
+
+        if not db_copy.exists() or _sha256(db_copy) != manifest['database']['sha256']:
+            errors.append("Veritabanı kopyası eksik veya bozuk")
+        else:
+            with sqlite3.connect(f"file:{db_copy}?mode=ro", uri=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute('PRAGMA integrity_check')
+                result = cursor.fetchone()[0]
+                if result != 'ok':
+                    errors.append(f"Veritabanı bütünlük hatası: {result}")
+
+            # Anlık görüntüdeki belgelerin dosyaları yedekte olmalı
+            for relative in referenced_files(db_copy, manifest['storage_dir']):
+                if relative not in manifest['files']:
+                    errors.append(f"Yedekte olmayan dosya: {relative}")
+
+        for relative, (size, _, sha256) in manifest['files'].items():
+            blob_path = self._blob_path(sha256)
+            if not blob_path.exists() or blob_path.stat().st_size != size:
+                errors.append(f"Eksik veya bozuk dosya: {relative}")
+            elif deep and _sha256(blob_path) != sha256:
+                errors.append(f"Hash uyuşmazlığı: {relative}")
+
+        return {'snapshot': snapshot_id, 'ok': not errors, 'files': len(manifest['files']),
+                'errors': errors}
+
+    def restore(self, snapshot_id: str, target: str = ".", force: bool = False) -> Dict[str, Any]:
+        """Anlık görüntüyü hedef dizine geri yükle (veritabanı + depolama dizini)
+
+        Anlık görüntüde olmayan mevcut dosyalar silinmez; bunları bakım
+        işinin sahipsiz dosya temizliği kaldırır.
+        """
+        report = self.verify(snapshot_id)
+        if not report['ok']:
+            raise BackupError(f"Anlık görüntü doğrulanamadı: {report['errors'][:3]}")
+
+        manifest = self._manifest(snapshot_id)
+        target = Path(target)
+        db_target = target / manifest['database']['file']
+        if db_target.exists() and not force:
+            raise BackupError(f"Hedefte veritabanı var: {db_target} (üzerine yazmak için --force)")
+
+        target.mkdir(parents=True, exist_ok=True)
+        snapshot_database(str(self.snapshots_dir / snapshot_id / "doxagon.db"), str(db_target))
+
+        storage_target = target / manifest['storage_dir']
+        restored = 0
+        for relative, (size, mtime_ns, sha256) in manifest['files'].items():
+            dest = storage_target / relative
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(self._blob_path(sha256), dest)
+            # mtime korunur; sonraki yedek bu dosyaları değişmemiş sayar
+            os.utime(dest, ns=(mtime_ns, mtime_ns))
+            restored += 1
+
+        return {'snapshot': snapshot_id, 'database': str(db_target), 'files': restored}
+
+    def prune(self, keep: int = None) -> Dict[str, int]:
+        """Eski anlık görüntüleri sil ve hiçbirinin kullanmadığı dosyaları topla"""
+        keep = keep if keep is not None else self.settings['keep_snapshots']
+        snapshots = self.list_snapshots()
+        removed = snapshots[:-keep] if keep > 0 else snapshots
+        for snapshot in removed:
+            shutil.rmtree(self.snapshots_dir / snapshot['id'])
+
+        referenced = set()
+        for snapshot in self.list_snapshots():
+            referenced.update(entry[2] for entry in self._manifest(snapshot['id'])['files'].values())
+
+        blobs = 0
+        if self.blobs_dir.exists():
+            for blob_path in self.blobs_dir.glob('??/*'):
+                if blob_path.name not in referenced:
+                    blob_path.unlink()
+                    blobs += 1
+
+        return {'snapshots': len(removed), 'blobs': blobs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon tutarlı çevrimiçi yedekleme")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('create', help='Yeni anlık görüntü al (artımlı)')
+    subparsers.add_parser('list', help='Anlık görüntüleri listele')
+    verify_parser = subparsers.add_parser('verify', help='Anlık görüntüyü doğrula')
+    verify_parser.add_argument('snapshot_id', nargs='?', help='Varsayılan: en son')
+    verify_parser.add_argument('--deep', action='store_true', help='Dosya hash\'lerini yeniden hesapla')
+    restore_parser = subparsers.add_parser('restore', help='Anlık görüntüyü geri yükle')
+    restore_parser.add_argument('snapshot_id')
+    restore_parser.add_argument('--target', default='.', help='Hedef dizin')
+    restore_parser.add_argument('--force', action='store_true', help='Mevcut veritabanının üzerine yaz')
+    prune_parser = subparsers.add_parser('prune', help='Eski anlık görüntüleri sil')
+    prune_parser.add_argument('--keep', type=int)
+
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+    service = BackupService(doxagon.db.db_path, doxagon.base_directory, doxagon.config['backup'])
+
+    try:
+        if args.command == 'create':
+            manifest = service.create_snapshot()
+            print(f"✅ Anlık görüntü: {manifest['id']}")
+            print(f"📁 {len(manifest['files'])} dosya, {len(manifest['changed'])} değişen "
+                  f"({doxagon.format_size(manifest['changed_bytes'])}), "
+                  f"{len(manifest['removed'])} silinen")
+            if 'keys' in service.settings['exclude']:
+                print(f"🔑 Anahtarlık yedeğe alınmadı; {doxagon.config['storage']['key_file']} "
+                      f"dosyasını ayrı ve güvenli bir konuma kopyalayın")
+        elif args.command == 'list':
+            for snapshot in service.list_snapshots():
+                print(f"📦 {snapshot['id']}  {snapshot['files']} dosya  "
+                      f"+{snapshot['changed']} / -{snapshot['removed']}  "
+                      f"db {doxagon.format_size(snapshot['database_size'])}")
+        elif args.command == 'verify':
+            snapshots = service.list_snapshots()
+            snapshot_id = args.snapshot_id or (snapshots[-1]['id'] if snapshots else None)
+            if not snapshot_id:
+                print("❌ Anlık görüntü yok!")
+                return
+            report = service.verify(snapshot_id, deep=args.deep)
+            for error in report['errors']:
+                print(f"❌ {error}")
+            print(f"{'✅' if report['ok'] else '⚠️ '} {snapshot_id}: {report['files']} dosya kontrol edildi")
+        elif args.command == 'restore':
+            result = service.restore(args.snapshot_id, args.target, args.force)
+            print(f"✅ {result['snapshot']} geri yüklendi: {result['database']}, {result['files']} dosya")
+        else:
+            result = service.prune(args.keep)
+            print(f"🗑️  {result['snapshots']} anlık görüntü, {result['blobs']} dosya silindi")
+    except BackupError as e:
+        print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
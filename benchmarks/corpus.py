@@ -0,0 +1,178 @@
+import io
+import random
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterator
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    IMAGE_AVAILABLE = True
+except ImportError:
+    IMAGE_AVAILABLE = False
+
+try:
+    import docx
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+KINDS = ('text', 'docx', 'pdf', 'image')
+DEFAULT_MIX = {'text': 4, 'docx': 2, 'pdf': 2, 'image': 2}
+
+# Konu başına anahtar kelimeler (kural tabanlı sınıflandırıcı farklı kategoriler üretsin)
+TOPICS = {
+    'fatura': ['fatura', 'kdv', 'tutar', 'ödeme', 'vade'],
+    'sözleşme': ['sözleşme', 'anlaşma', 'taraflar', 'madde', 'fesih'],
+    'hukuk': ['dava', 'mahkeme', 'hukuk', 'dilekçe', 'karar'],
+    'muhasebe': ['bilanço', 'gelir', 'gider', 'mizan', 'amortisman'],
+    'personel': ['personel', 'işe alım', 'izin', 'eğitim', 'performans'],
+    'genel': ['proje', 'toplantı', 'rapor', 'hedef', 'süreç']
+}
+
+FILLER = [
+    'müşteri', 'sipariş', 'teslimat', 'kalite', 'denetim', 'plan', 'ekip', 'bölge',
+    'şube', 'arşiv', 'stok', 'bakım', 'bütçe', 'tedarik', 'ürün', 'hizmet', 'talep',
+    'onay', 'belge', 'kayıt', 'dönem', 'yıl', 'ay', 'hafta', 'merkez', 'ofis', 'birim',
+    'sorumlu', 'müdür', 'uzman', 'analiz', 'özet', 'ek', 'liste', 'tablo', 'sonuç'
+]
+
+# PDF (Helvetica/WinAnsi) ve varsayılan resim fontu Türkçe karakterleri basamaz
+_ASCII_FOLD = str.maketrans('çğıöşüÇĞİÖŞÜ', 'cgiosuCGIOSU')
+
+
+def ascii_fold(text: str) -> str:
+    return text.translate(_ASCII_FOLD)
+
+
+def vocabulary() -> List[str]:
+    """Arama sorgularında kullanılan kelimeler (belgelerde geçenlerle aynı)"""
+    return sorted({word for words in TOPICS.values() for word in words} | set(FILLER))
+
+
+def _paragraphs(rng: random.Random, topic: str, index: int, words: int) -> List[str]:
+    keywords = TOPICS[topic]
+    body = [rng.choice(keywords) if rng.random() < 0.15 else rng.choice(FILLER)
+            for _ in range(words)]
+    # Her belge benzersiz olsun (aynı hash'li dosyalar yüklemede reddedilir)
+    lines = [f"Belge {index:06d} - {keywords[0]} {rng.getrandbits(64):016x}"]
+    for start in range(0, len(body), 12):
+        lines.append(' '.join(body[start:start + 12]))
+    return lines
+
+
+def _pdf_bytes(lines: List[str]) -> bytes:
+    """Tek sayfalık, metni çıkarılabilir en küçük PDF"""
+    def escape(text: str) -> str:
+        return ascii_fold(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    content = 'BT /F1 11 Tf 14 TL 50 800 Td\n' + ''.join(
+        f'({escape(line)}) Tj T*\n' for line in lines[:54]) + 'ET'
+    content_bytes = content.encode('latin-1')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n' % len(content_bytes) + content_bytes + b'\nendstream'
+    ]
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+              % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _docx_bytes(lines: List[str]) -> bytes:
+    document = docx.Document()
+    document.add_heading(lines[0], level=1)
+    for line in lines[1:]:
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def _png_bytes(lines: List[str]) -> bytes:
+    image = Image.new('RGB', (1000, 40 + 24 * min(len(lines), 20)), 'white')
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=18)
+    except TypeError:
+        # Pillow < 10.1: boyut seçilemez
+        font = ImageFont.load_default()
+    for row, line in enumerate(lines[:20]):
+        draw.text((20, 20 + row * 24), ascii_fold(line), fill='black', font=font)
+    out = io.BytesIO()
+    image.save(out, format='PNG')
+    return out.getvalue()
+
+
+_RENDERERS = {
+    'text': ('.txt', lambda lines: '\n'.join(lines).encode('utf-8')),
+    'pdf': ('.pdf', _pdf_bytes),
+    'docx': ('.docx', _docx_bytes),
+    'image': ('.png', _png_bytes)
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """'text=4,pdf=1' biçimindeki dağılımı çöz"""
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"Bilinmeyen belge türü: {kind} (geçerli: {', '.join(KINDS)})")
+        mix[kind] = int(weight or 1)
+    return mix
+
+
+def available_kinds(mix: Dict[str, int]) -> Dict[str, int]:
+    """Kütüphanesi kurulu olmayan türleri dağılımdan çıkar"""
+    missing = {'docx': not DOCX_AVAILABLE, 'image': not IMAGE_AVAILABLE}
+    return {kind: weight for kind, weight in mix.items() if weight > 0 and not missing.get(kind)}
+
+
+def iter_documents(count: int, seed: int = 42, mix: Dict[str, int] = None,
+                   words: int = 400, start_index: int = 0) -> Iterator[Tuple[str, str, bytes]]:
+    """Sentetik belgeleri bellekte üret: (dosya adı, tür, içerik)
+
+    Aynı tohum ve parametrelerle her çalıştırmada aynı içerik üretilir
+    (farklı commit'lerin sonuçları karşılaştırılabilir olsun).
+    """
+    mix = available_kinds(mix or DEFAULT_MIX)
+    if not mix:
+        raise ValueError("Üretilebilecek belge türü yok")
+
+    rng = random.Random(seed)
+    kinds, weights = zip(*sorted(mix.items()))
+    topics = sorted(TOPICS)
+    for index in range(start_index, start_index + count):
+        kind = rng.choices(kinds, weights)[0]
+        topic = rng.choice(topics)
+        suffix, render = _RENDERERS[kind]
+        content = render(_paragraphs(rng, topic, index, words))
+        yield f"{ascii_fold(topic)}_{index:06d}{suffix}", kind, content
+
+
+def generate_corpus(directory: Path, count: int, seed: int = 42,
+                    mix: Dict[str, int] = None, words: int = 400,
+                    start_index: int = 0) -> List[Tuple[Path, str]]:
+    """Sentetik belge kümesini dizine yaz; (dosya yolu, tür) listesi döndürür"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    files = []
+    for filename, kind, content in iter_documents(count, seed, mix, words, start_index):
+        path = directory / filename
+        path.write_bytes(content)
+        files.append((path, kind))
+    return files
@@ -0,0 +1,492 @@
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import secrets
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from collections import defaultdict, Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import iter_documents, vocabulary
+from benchmarks.run import summarize, percentile, deep_merge, write_config, git_revision, log, BENCH_PASSWORD
+
+BENCH_USERNAME = 'bench_admin'
+WRITE_OPERATIONS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+# Yazmaların bu oranından fazlası eşiği aşarsa kilit çekişmesi bildirilir
+SLOW_WRITE_RATIO = 0.01
+
+# Kullanıcı tipi başına eylem ağırlıkları
+DEFAULT_SCENARIO = {
+    'users': 20,
+    'ramp_up_seconds': 10,
+    'duration_seconds': 60,
+    'think_time_ms': [200, 1000],
+    'mix': {'searcher': 5, 'downloader': 3, 'uploader': 1, 'browser': 1},
+    'personas': {
+        'searcher': {'search': 8, 'statistics': 2},
+        'downloader': {'download': 6, 'search': 3, 'preview': 1},
+        'uploader': {'upload': 7, 'search': 2, 'my_documents': 1},
+        'browser': {'my_documents': 4, 'statistics': 3, 'preview': 3}
+    }
+}
+
+_BUCKET_LINE = re.compile(r'^doxagon_sql_seconds_bucket\{(?P<labels>[^}]*)\} (?P<value>\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+class Client:
+    """Sunucuya istek gönderen basit HTTP istemcisi (yalnızca standart kütüphane)"""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: bytes = None,
+                headers: Dict[str, str] = None) -> Tuple[int, bytes]:
+        """(durum kodu, gövde) döndür; bağlantı hatasında durum 0"""
+        req = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                     headers=headers or {})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            return 0, b''
+
+    def post_json(self, path: str, data: Dict[str, Any]) -> Tuple[int, bytes]:
+        return self.request('POST', path, json.dumps(data).encode('utf-8'),
+                            {'Content-Type': 'application/json'})
+
+    def upload(self, filename: str, content: bytes, tags: str) -> Tuple[int, bytes]:
+        boundary = uuid.uuid4().hex
+        body = b''.join([
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; '
+            f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode(),
+            content,
+            f'\r\n--{boundary}\r\nContent-Disposition: form-data; name="tags"\r\n\r\n'
+            f'{tags}\r\n--{boundary}--\r\n'.encode()
+        ])
+        return self.request('POST', '/api/documents/upload', body,
+                            {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+class UploadPool:
+    """Önceden üretilmiş benzersiz belgeler; tükenirse baştan kullanılır (tekrar sayılır)"""
+
+    def __init__(self, documents: List[Tuple[str, str, bytes]]):
+        self.documents = documents
+        self.position = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> Tuple[str, str, bytes]:
+        with self._lock:
+            if self.position >= len(self.documents):
+                self.reused += 1
+            document = self.documents[self.position % len(self.documents)]
+            self.position += 1
+            return document
+
+
+class LoadTest:
+    """Senaryoya göre eşzamanlı sanal kullanıcılar çalıştırır
+
+    Kullanıcılar ramp_up_seconds boyunca eşit aralıklarla başlatılır ve
+    duration_seconds dolana kadar eylem + düşünme süresi döngüsünde kalır.
+    """
+
+    def __init__(self, client: Client, scenario: Dict[str, Any], pool: UploadPool,
+                 document_ids: List[str], credentials: Dict[str, str], seed: int = 42):
+        self.client = client
+        self.credentials = credentials
+        self.scenario = scenario
+        self.pool = pool
+        self.document_ids = document_ids
+        self.seed = seed
+        self.words = vocabulary()
+        # (bitiş zamanı, eylem, süre, durum, başarılı, kilit hatası)
+        self.records: List[Tuple[float, str, float, int, bool, bool]] = []
+        self.user_starts: List[float] = []
+        self._stop = threading.Event()
+        self.started = 0.0
+
+    def _perform(self, action: str, rng: random.Random) -> Tuple[int, bytes]:
+        if action == 'login':
+            return self.client.post_json('/api/auth/login', self.credentials)
+        if action == 'search':
+            query = rng.choice(self.words) if rng.random() < 0.8 else ''
+            return self.client.post_json('/api/documents/search',
+                                         {'query': query, 'page': rng.randint(1, 3)})
+        if action == 'statistics':
+            return self.client.request('GET', '/api/statistics')
+        if action == 'my_documents':
+            return self.client.request('GET', '/api/documents/my-documents')
+        if action in ('download', 'preview'):
+            if not self.document_ids:
+                return self.client.request('GET', '/api/statistics')
+            document_id = rng.choice(self.document_ids)
+            return self.client.request('GET', f'/api/documents/{document_id}/{action}')
+        if action == 'upload':
+            filename, kind, content = self.pool.next()
+            status, body = self.client.upload(filename, content, f'load,{kind}')
+            if status == 200:
+                try:
+                    self.document_ids.extend(item['id'] for item in json.loads(body)['uploaded'])
+                except (ValueError, KeyError):
+                    pass
+            return status, body
+        raise ValueError(f"Bilinmeyen eylem: {action}")
+
+    def _measure(self, action: str, rng: random.Random) -> None:
+        started = time.perf_counter()
+        status, body = self._perform(action, rng)
+        finished = time.perf_counter()
+        # Önizlenemeyen türler (docx) için 415 beklenen yanıttır
+        ok = 200 <= status < 400 or (action == 'preview' and status == 415)
+        # SQLite kilit beklemesi zaman aşımına uğradıysa rota hatayı metin olarak döndürür
+        locked = action != 'download' and b'database is locked' in body
+        self.records.append((finished - self.started, action, finished - started, status, ok, locked))
+
+    def _user(self, index: int, persona: str, start_at: float) -> None:
+        rng = random.Random(self.seed * 1000 + index)
+        if self._stop.wait(max(0.0, start_at - time.perf_counter())):
+            return
+        self.user_starts.append(start_at - self.started)
+
+        # Her sanal kullanıcı kendi oturumunu açar (giriş patlaması da ölçülür)
+        self._measure('login', rng)
+        actions, weights = zip(*self.scenario['personas'][persona].items())
+        think_min, think_max = self.scenario['think_time_ms']
+        while not self._stop.is_set():
+            self._measure(rng.choices(actions, weights)[0], rng)
+            if self._stop.wait(rng.uniform(think_min, think_max) / 1000):
+                return
+
+    def run(self) -> None:
+        users = self.scenario['users']
+        ramp = self.scenario['ramp_up_seconds']
+        mix = self.scenario['mix']
+        personas, weights = zip(*sorted(mix.items()))
+        rng = random.Random(self.seed)
+        assigned = rng.choices(personas, weights, k=users)
+
+        self.started = time.perf_counter()
+        threads = []
+        for index, persona in enumerate(assigned):
+            start_at = self.started + (ramp * index / users if users > 1 else 0)
+            thread = threading.Thread(target=self._user, args=(index, persona, start_at),
+                                      name=f"vu-{index}-{persona}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        self._stop.wait(self.scenario['duration_seconds'])
+        self._stop.set()
+        for thread in threads:
+            thread.join(timeout=self.client.timeout)
+        self.personas = dict(Counter(assigned))
+
+    def report(self, interval: float) -> Dict[str, Any]:
+        records = sorted(self.records)
+        duration = self.scenario['duration_seconds']
+        statuses = Counter(record[3] for record in records)
+        failed = [record for record in records if not record[4]]
+
+        actions = {}
+        by_action = defaultdict(list)
+        for record in records:
+            by_action[record[1]].append(record)
+        for action, items in sorted(by_action.items()):
+            summary = summarize([item[2] for item in items],
+                                errors=sum(1 for item in items if not item[4]))
+            summary['status_codes'] = dict(Counter(str(item[3]) for item in items))
+            actions[action] = summary
+
+        # Zaman dilimlerine göre verim ve kuyruk gecikmesi (tavan noktasını bulmak için)
+        timeline = []
+        slots = int(-(-duration // interval))
+        for slot in range(slots):
+            start = slot * interval
+            # Süre dolduktan sonra biten istekler son dilime sayılır
+            end = start + interval if slot < slots - 1 else float('inf')
+            items = [record for record in records if start <= record[0] < end]
+            latencies = sorted(item[2] for item in items)
+            timeline.append({
+                'second': round(start, 1),
+                'active_users': sum(1 for user_start in self.user_starts if user_start <= start + interval),
+                'requests_per_second': round(len(items) / interval, 2),
+                'error_rate': round(sum(1 for item in items if not item[4]) / len(items), 4)
+                              if items else 0.0,
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3)
+            })
+        peak = max(timeline, key=lambda slot: slot['requests_per_second']) if timeline else None
+
+        latencies = sorted(record[2] for record in records)
+        return {
+            'summary': {
+                'requests': len(records),
+                'duration_seconds': duration,
+                'requests_per_second': round(len(records) / duration, 2) if duration else 0.0,
+                'error_rate': round(len(failed) / len(records), 4) if records else 0.0,
+                'rate_limited': statuses.get(429, 0),
+                'connection_errors': statuses.get(0, 0),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'peak': peak,
+                'personas': self.personas,
+                'reused_uploads': self.pool.reused
+            },
+            'status_codes': {str(status): count for status, count in sorted(statuses.items())},
+            'actions': actions,
+            'timeline': timeline,
+            'locked_responses': sum(1 for record in records if record[5])
+        }
+
+
+def scrape_write_buckets(client: Client, token: str = None) -> Optional[Dict[Tuple[str, str], Dict[str, float]]]:
+    """/metrics'ten yazma ifadelerinin süre kovalarını oku (metrikler kapalıysa None)"""
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    status, body = client.request('GET', '/metrics', headers=headers)
+    if status != 200:
+        return None
+
+    buckets = defaultdict(dict)
+    for line in body.decode('utf-8', errors='replace').splitlines():
+        match = _BUCKET_LINE.match(line)
+        if not match:
+            continue
+        labels = dict(_LABEL.findall(match.group('labels')))
+        if labels.get('operation') in WRITE_OPERATIONS:
+            buckets[(labels['operation'], labels.get('table', '-'))][labels['le']] = float(match.group('value'))
+    return buckets
+
+
+def lock_contention(before, after, threshold_ms: float, locked_responses: int) -> Dict[str, Any]:
+    """Yazma ifadelerinde eşikten uzun süren çağrılar (kilit beklemesi belirtisi)
+
+    SQLite'ta yazıcılar tek tek ilerler; bekleyen yazıcının süresi busy
+    timeout dolana kadar uzar, dolarsa 'database is locked' hatası döner.
+    """
+    result = {'locked_responses': locked_responses, 'threshold_ms': threshold_ms,
+              'slow_writes': {}, 'writes': 0, 'metrics_available': after is not None}
+    if after is not None:
+        before = before or {}
+        for (operation, table), counts in sorted(after.items()):
+            bounds = sorted((float(le), le) for le in counts if le != '+Inf')
+            # Eşiğe eşit veya büyük ilk kova sınırı
+            bound = next((le for value, le in bounds if value * 1000 >= threshold_ms), '+Inf')
+            previous = before.get((operation, table), {})
+            total = counts.get('+Inf', 0) - previous.get('+Inf', 0)
+            fast = counts.get(bound, 0) - previous.get(bound, 0)
+            result['writes'] += int(total)
+            if total - fast > 0:
+                result['slow_writes'][f'{operation} {table}'] = {
+                    'count': int(total - fast), 'of': int(total)
+                }
+    slow = sum(counts['count'] for counts in result['slow_writes'].values())
+    result['detected'] = bool(locked_responses) or (
+        bool(result['writes']) and slow / result['writes'] >= SLOW_WRITE_RATIO)
+    return result
+
+
+def serve(args) -> None:
+    """Yerel sunucu (run komutu tarafından çalışma dizininde başlatılır)"""
+    import web_api
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    doxagon = web_api.doxagon
+    org_id = doxagon.create_organization("Load Test", "enterprise")
+    doxagon.create_user(BENCH_USERNAME, 'load@example.com', BENCH_PASSWORD, 'admin', org_id)
+    doxagon.authenticate_user(BENCH_USERNAME, BENCH_PASSWORD)
+    doxagon.update_organization_plan(org_id, 'enterprise', storage_quota_gb=10 ** 4,
+                                     user_quota=10 ** 6, document_quota=10 ** 9)
+    web_api.app.run(host='127.0.0.1', port=args.port, threaded=True, debug=False)
+
+
+def start_local_server(workdir: Path, port: int, args) -> subprocess.Popen:
+    """web_api'yi ayrı süreçte başlat (istemcilerle aynı GIL'i paylaşmasın)"""
+    write_config(workdir / 'doxagon_storage', args)
+    log_file = open(workdir / 'server.log', 'wb')
+    process = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), 'serve',
+                                '--port', str(port)],
+                               cwd=workdir, stdout=log_file, stderr=subprocess.STDOUT)
+    client = Client(f'http://127.0.0.1:{port}', timeout=5)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Sunucu başlatılamadı, bkz. {workdir / 'server.log'}")
+        if client.request('GET', '/')[0] == 200:
+            return process
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Sunucu 60 saniyede hazır olmadı")
+
+
+def load_scenario(args) -> Dict[str, Any]:
+    scenario = json.loads(json.dumps(DEFAULT_SCENARIO))
+    if args.scenario:
+        with open(args.scenario, 'r', encoding='utf-8') as f:
+            deep_merge(scenario, json.load(f))
+    for key, value in (('users', args.users), ('ramp_up_seconds', args.ramp_up),
+                       ('duration_seconds', args.duration)):
+        if value is not None:
+            scenario[key] = value
+    if args.think_time:
+        low, _, high = args.think_time.partition('-')
+        scenario['think_time_ms'] = [float(low), float(high or low)]
+    if args.mix:
+        scenario['mix'] = {name.strip(): int(weight or 1) for name, _, weight in
+                           (part.partition('=') for part in args.mix.split(','))}
+
+    unknown = set(scenario['mix']) - set(scenario['personas'])
+    if unknown:
+        raise SystemExit(f"❌ Tanımsız kullanıcı tipi: {', '.join(sorted(unknown))}")
+    return scenario
+
+
+def run(args) -> Dict[str, Any]:
+    scenario = load_scenario(args)
+    workdir = None
+    process = None
+    try:
+        if args.url:
+            client = Client(args.url, args.timeout)
+            username, password = args.username, args.password
+        else:
+            workdir = Path(tempfile.mkdtemp(prefix='doxagon_load_'))
+            # /metrics yalnızca token ile okunur; yerel sunucuya ölçüme özel token verilir
+            args.metrics_token = args.metrics_token or secrets.token_urlsafe(16)
+            log(f"🚀 Yerel sunucu başlatılıyor: {workdir}")
+            process = start_local_server(workdir, args.port, args)
+            client = Client(f'http://127.0.0.1:{args.port}', args.timeout)
+            username, password = BENCH_USERNAME, BENCH_PASSWORD
+
+        status, _ = client.post_json('/api/auth/login', {'username': username, 'password': password})
+        if status != 200:
+            raise SystemExit(f"❌ Giriş başarısız ({status})")
+
+        log(f"🧪 {args.seed_documents} başlangıç belgesi ve {args.upload_pool} yüklemelik havuz üretiliyor")
+        document_ids = []
+        for filename, kind, content in iter_documents(args.seed_documents, args.seed + 1):
+            status, body = client.upload(filename, content, f'load,{kind}')
+            if status == 200:
+                document_ids.extend(item['id'] for item in json.loads(body)['uploaded'])
+        pool = UploadPool(list(iter_documents(args.upload_pool, args.seed + 2,
+                                              start_index=args.seed_documents)))
+
+        before = scrape_write_buckets(client, args.metrics_token)
+        # Sanal kullanıcılar aynı hesapla giriş yapar
+        test = LoadTest(client, scenario, pool, document_ids,
+                        {'username': username, 'password': password}, args.seed)
+        log(f"👥 {scenario['users']} kullanıcı, {scenario['ramp_up_seconds']} sn artış, "
+            f"{scenario['duration_seconds']} sn süre")
+        test.run()
+        after = scrape_write_buckets(client, args.metrics_token)
+
+        report = test.report(args.interval)
+        report['lock_contention'] = lock_contention(before, after, args.lock_threshold_ms,
+                                                    report.pop('locked_responses'))
+        report['meta'] = {
+            'revision': git_revision(),
+            'target': args.url or 'local',
+            'seed': args.seed,
+            'scenario': scenario
+        }
+        return report
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if workdir is not None and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Doxagon web API yük testi (eşzamanlı sanal kullanıcılar)",
+        epilog="Örnek: python benchmarks/load.py run --users 50 --ramp-up 30 --duration 120 -o yuk.json")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Senaryoyu çalıştır (JSON rapor)')
+    run_parser.add_argument('--scenario', help='Senaryo JSON dosyası (varsayılanların üzerine birleştirilir)')
+    run_parser.add_argument('--users', type=int, help='Sanal kullanıcı sayısı')
+    run_parser.add_argument('--ramp-up', type=float, help='Tüm kullanıcıların başlatılma süresi (sn)')
+    run_parser.add_argument('--duration', type=float, help='Toplam süre (sn)')
+    run_parser.add_argument('--think-time', help='Eylemler arası bekleme, ms (ör. 200-1000)')
+    run_parser.add_argument('--mix', help='Kullanıcı tipi dağılımı (ör. searcher=5,uploader=1)')
+    run_parser.add_argument('--url', help='Çalışan sunucu (varsayılan: geçici dizinde yerel sunucu)')
+    run_parser.add_argument('--username', default=BENCH_USERNAME, help='--url ile kullanılacak hesap')
+    run_parser.add_argument('--password', default=BENCH_PASSWORD)
+    run_parser.add_argument('--metrics-token', help='/metrics için Bearer token')
+    run_parser.add_argument('--port', type=int, default=5057, help='Yerel sunucu portu')
+    run_parser.add_argument('--config', help='Yerel sunucu konfigürasyonuna birleştirilecek JSON')
+    run_parser.add_argument('--ocr', action='store_true', help='Yerel sunucuda OCR açık')
+    run_parser.add_argument('--seed-documents', type=int, default=30, help='Başlangıçta yüklenecek belge')
+    run_parser.add_argument('--upload-pool', type=int, default=300, help='Yükleme için benzersiz belge sayısı')
+    run_parser.add_argument('--interval', type=float, default=5, help='Zaman çizelgesi dilimi (sn)')
+    run_parser.add_argument('--lock-threshold-ms', type=float, default=100,
+                            help='Bu süreyi aşan yazma ifadeleri kilit beklemesi sayılır')
+    run_parser.add_argument('--timeout', type=float, default=60, help='İstek zaman aşımı (sn)')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--keep', action='store_true', help='Yerel sunucunun dizinini silme')
+    run_parser.add_argument('-o', '--output', help='Rapor dosyası (varsayılan: standart çıktı)')
+
+    serve_parser = subparsers.add_parser('serve', help='Yerel test sunucusu (run tarafından başlatılır)')
+    serve_parser.add_argument('--port', type=int, default=5057)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args)
+        return
+
+    report = run(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        log(f"✅ Rapor yazıldı: {args.output}")
+    else:
+        print(output)
+
+    summary = report['summary']
+    log(f"📈 {summary['requests']} istek, {summary['requests_per_second']}/sn, "
+        f"hata oranı %{summary['error_rate'] * 100:.1f}, p95 {summary['p95_ms']:.1f} ms, "
+        f"p99 {summary['p99_ms']:.1f} ms")
+    if summary['peak']:
+        log(f"🔝 En yüksek verim: {summary['peak']['requests_per_second']}/sn "
+            f"({summary['peak']['active_users']} aktif kullanıcı, {summary['peak']['second']}. sn)")
+    for action, stats in report['actions'].items():
+        log(f"   {action:<14} {stats['count']:>6} istek  p95 {stats['p95_ms']:>9.2f} ms  "
+            f"p99 {stats['p99_ms']:>9.2f} ms  hata {stats['errors']}")
+    contention = report['lock_contention']
+    if contention['detected']:
+        log(f"⚠️  SQLite kilit çekişmesi: {contention['locked_responses']} 'database is locked' yanıtı")
+        for statement, counts in contention['slow_writes'].items():
+            log(f"   {statement}: {counts['count']}/{counts['of']} yazma "
+                f"{contention['threshold_ms']:g} ms'den uzun")
+    elif not contention['metrics_available']:
+        log("ℹ️  /metrics okunamadı; kilit çekişmesi yalnızca hata yanıtlarından izlendi")
+    else:
+        log("✅ Kilit çekişmesi görülmedi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import generate_corpus, parse_mix, available_kinds, vocabulary, DEFAULT_MIX
+
+PERCENTILES = (50, 95, 99)
+BENCH_PASSWORD = 'Bench-Parola-2024!'
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """En yakın sıra yöntemiyle yüzdelik (değerler sıralı olmalı)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples: List[float], size_bytes: int = 0, errors: int = 0) -> Dict[str, Any]:
+    """Süre örneklerinden (saniye) verim ve gecikme yüzdelikleri"""
+    values = sorted(samples)
+    total = sum(values)
+    summary = {
+        'count': len(values),
+        'errors': errors,
+        'total_seconds': round(total, 4),
+        'ops_per_second': round(len(values) / total, 2) if total else 0.0,
+        'mean_ms': round(total / len(values) * 1000, 3) if values else 0.0,
+        'min_ms': round(values[0] * 1000, 3) if values else 0.0,
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(percentile(values, pct) * 1000, 3)
+    if size_bytes:
+        summary['bytes'] = size_bytes
+        summary['mb_per_second'] = round(size_bytes / total / (1024 * 1024), 3) if total else 0.0
+    return summary
+
+
+class Recorder:
+    """İşlem adı başına süre örneklerini toplar"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.sizes: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def measure(self, *names: str, size_bytes: int = 0):
+        """Bloğun süresini verilen adların hepsine yaz (ör. genel ve türe özel)"""
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        for name in names:
+            self.samples[name].append(elapsed)
+            self.sizes[name] += size_bytes
+
+    def error(self, name: str) -> None:
+        self.errors[name] += 1
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        names = sorted(set(self.samples) | set(self.errors))
+        return {name: summarize(self.samples.get(name, []), self.sizes.get(name, 0),
+                                self.errors.get(name, 0))
+                for name in names}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=ROOT,
+                                capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def deep_merge(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            deep_merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def write_config(storage_dir: Path, args) -> Dict[str, Any]:
+    """Çalışma dizinine ölçümü bozmayacak konfigürasyonu yaz
+
+    İstek sınırları yükseltilir (aksi halde 429'lar ölçülür), OCR yalnızca
+    --ocr ile açılır, arka plan servisleri (hatırlatıcı, temizlik) kapatılır;
+    --config ile verilen dosya bunların üzerine birleştirilir.
+    """
+    unlimited = {'limit': 10 ** 9, 'window_seconds': 60}
+    overrides = {
+        'security': {'rate_limits': {'upload': unlimited, 'search': unlimited,
+                                     'export': unlimited}},
+        'ocr': {'enabled': args.ocr},
+        'logging': {'level': 'WARNING', 'format': 'text'},
+        'notifications': {'reminder_scheduler_enabled': False},
+        'housekeeping': {'enabled': False}
+    }
+    if getattr(args, 'metrics_token', None):
+        overrides['metrics'] = {'token': args.metrics_token}
+    if getattr(args, 'strict_queries', False):
+        # Sık sorgulardan biri tam tablo taraması yaparsa ölçüm hata ile durur
+        overrides['query_audit'] = {'enabled': True, 'strict': True}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            deep_merge(overrides, json.load(f))
+
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    with open(storage_dir / 'enterprise_config.json', 'w', encoding='utf-8') as f:
+        json.dump(overrides, f, ensure_ascii=False, indent=2)
+    return overrides
+
+
+def build_queries(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    """Karışık arama yükü: tek kelime, iki kelime, kategori filtresi, boş liste"""
+    words = vocabulary()
+    categories = ['Fatura', 'Sözleşme', 'Yasal', 'Muhasebe', 'İnsan Kaynakları', 'Genel']
+    queries = []
+    for index in range(count):
+        shape = ('word', 'phrase', 'filter', 'list')[index % 4]
+        if shape == 'word':
+            queries.append({'shape': shape, 'query': rng.choice(words), 'filters': {}})
+        elif shape == 'phrase':
+            queries.append({'shape': shape, 'query': ' '.join(rng.sample(words, 2)), 'filters': {}})
+        elif shape == 'filter':
+            queries.append({'shape': shape, 'query': rng.choice(words),
+                            'filters': {'category': rng.choice(categories)}})
+        else:
+            queries.append({'shape': shape, 'query': '', 'filters': {},
+                            'page': rng.randint(1, 5)})
+    return queries
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def bench_manager(doxagon, files, queries, args, recorder: Recorder) -> List[str]:
+    """Yönetici metotlarını doğrudan çağır; yüklenen belge kimliklerini döndür"""
+    document_ids = []
+    log(f"⬆️  upload_document: {len(files)} belge")
+    for path, kind in files:
+        size = path.stat().st_size
+        document_id = None
+        with recorder.measure('upload_document', f'upload_document.{kind}', size_bytes=size):
+            document_id = doxagon.upload_document(str(path), tags=['bench', kind])
+        if document_id:
+            document_ids.append(document_id)
+        else:
+            recorder.error('upload_document')
+
+    log(f"🔍 search_documents: {len(queries)} sorgu")
+    for query in queries[:args.warmup]:
+        doxagon.search_documents(query['query'], query['filters'])
+    for query in queries:
+        with recorder.measure('search_documents', f"search_documents.{query['shape']}"):
+            doxagon.search_documents(query['query'], query['filters'], query.get('page', 1))
+
+    log(f"📊 get_statistics: {args.iterations} kez")
+    for _ in range(args.warmup):
+        doxagon.get_statistics()
+    for _ in range(args.iterations):
+        with recorder.measure('get_statistics'):
+            doxagon.get_statistics()
+
+    return document_ids
+
+
+def bench_web(username: str, files, queries, document_ids: List[str], args,
+              rng: random.Random, recorder: Recorder) -> None:
+    """Flask rotalarını test istemcisiyle çağır (istek ayrıştırma ve JSON dahil)"""
+    import web_api
+    client = web_api.app.test_client()
+
+    response = client.post('/api/auth/login', json={'username': username, 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f"Web girişi başarısız: {response.status_code}")
+
+    log(f"🌐 POST /api/documents/upload: {len(files)} belge")
+    for path, kind in files:
+        size = path.stat().st_size
+        with open(path, 'rb') as f:
+            data = {'files': (f, path.name), 'tags': f'bench,{kind}'}
+            with recorder.measure('web.upload', size_bytes=size):
+                response = client.post('/api/documents/upload', data=data,
+                                       content_type='multipart/form-data')
+        if response.status_code != 200:
+            recorder.error('web.upload')
+
+    log(f"🌐 POST /api/documents/search: {len(queries)} sorgu")
+    for query in queries:
+        body = {'query': query['query'], 'filters': query['filters'], 'page': query.get('page', 1)}
+        with recorder.measure('web.search'):
+            response = client.post('/api/documents/search', json=body)
+        if response.status_code != 200:
+            recorder.error('web.search')
+
+    log(f"🌐 GET /api/statistics: {args.iterations} kez")
+    for _ in range(args.iterations):
+        with recorder.measure('web.statistics'):
+            response = client.get('/api/statistics')
+        if response.status_code != 200:
+            recorder.error('web.statistics')
+
+    downloads = [rng.choice(document_ids) for _ in range(args.downloads)] if document_ids else []
+    log(f"🌐 GET /api/documents/<id>/download: {len(downloads)} indirme")
+    for document_id in downloads:
+        size = 0
+        with recorder.measure('web.download'):
+            response = client.get(f'/api/documents/{document_id}/download')
+            size = len(response.get_data())
+        recorder.sizes['web.download'] += size
+        if response.status_code != 200:
+            recorder.error('web.download')
+
+
+def run(args) -> Dict[str, Any]:
+    mix = available_kinds(parse_mix(args.mix) if args.mix else DEFAULT_MIX)
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix='doxagon_bench_')).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    if args.workdir and any(workdir.iterdir()):
+        # Önceki çalışmanın veritabanı sonuçları bozar
+        raise SystemExit(f"❌ Çalışma dizini boş olmalı: {workdir}")
+    previous_cwd = os.getcwd()
+    started_at = datetime.now().isoformat()
+
+    try:
+        log(f"📁 Çalışma dizini: {workdir}")
+        corpus_started = time.perf_counter()
+        files = generate_corpus(workdir / 'corpus', args.documents, args.seed, mix, args.words)
+        web_files = [] if args.skip_web else generate_corpus(
+            workdir / 'corpus_web', args.web_uploads, args.seed + 1, mix, args.words,
+            start_index=args.documents)
+        corpus_seconds = time.perf_counter() - corpus_started
+        kinds = defaultdict(int)
+        for _, kind in files:
+            kinds[kind] += 1
+        log(f"🧪 Sentetik belgeler üretildi: {dict(kinds)} ({corpus_seconds:.1f} sn)")
+
+        # Yönetici göreli yollarla (doxagon.db, doxagon_storage) çalışır;
+        # depodaki veritabanına dokunulmaması için çalışma dizinine geçilir
+        os.chdir(workdir)
+        overrides = write_config(workdir / 'doxagon_storage', args)
+
+        import main
+        from query_audit import auditor as query_auditor
+        doxagon = main.DoxagonEnterpriseManager()
+        org_id = doxagon.create_organization("Benchmark", "enterprise")
+        username = 'bench_admin'
+        doxagon.create_user(username, 'bench@example.com', BENCH_PASSWORD, 'admin', org_id)
+        doxagon.authenticate_user(username, BENCH_PASSWORD)
+        doxagon.update_organization_plan(org_id, 'enterprise', storage_quota_gb=10 ** 4,
+                                         document_quota=10 ** 9)
+
+        rng = random.Random(args.seed)
+        queries = build_queries(rng, args.queries)
+        recorder = Recorder()
+        document_ids = bench_manager(doxagon, files, queries, args, recorder)
+        if not args.skip_web:
+            bench_web(username, web_files, queries, document_ids, args, rng, recorder)
+
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'started_at': started_at,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'seed': args.seed,
+                'documents': args.documents,
+                'web_uploads': len(web_files),
+                'words_per_document': args.words,
+                'corpus': {
+                    'kinds': dict(kinds),
+                    'bytes': sum(path.stat().st_size for path, _ in files),
+                    'generation_seconds': round(corpus_seconds, 2)
+                },
+                'features': {
+                    'pdf': main.PDF_AVAILABLE,
+                    'docx': main.DOCX_AVAILABLE,
+                    'ocr': bool(args.ocr and main.OCR_AVAILABLE),
+                    'metrics': doxagon.config['metrics']['enabled'],
+                    'encryption': doxagon.config['storage']['encryption_enabled'],
+                    'compression': doxagon.config['compression']['enabled']
+                },
+                'config_overrides': overrides
+            },
+            'results': recorder.results(),
+            'queries': query_auditor.report(args.top_queries)
+        }
+    finally:
+        os.chdir(previous_cwd)
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """İki sonuç dosyasını karşılaştır; eşiği aşan p95 gerilemelerini döndür"""
+    print(f"📏 {baseline['meta'].get('revision')} → {current['meta'].get('revision')}")
+    print(f"{'işlem':<34}{'p50 ms':>20}{'p95 ms':>20}{'p99 ms':>20}{'işlem/sn':>20}")
+    regressions = []
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before, after = baseline['results'][name], current['results'][name]
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'ops_per_second'):
+            change = (after[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f"{after[key]:.2f} ({change:+.0f}%)")
+        print(f"{name:<34}" + ''.join(f"{cell:>20}" for cell in cells))
+
+        if before['p95_ms'] and (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Doxagon yükleme, arama ve indirme performans ölçümü",
+        epilog="Örnek: python benchmarks/run.py run -n 500 -o sonuc.json && "
+               "python benchmarks/run.py compare once.json sonra.json")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Sentetik belgelerle ölçüm yap (JSON çıktı)')
+    run_parser.add_argument('-n', '--documents', type=int, default=200,
+                            help='Doğrudan yüklenecek belge sayısı')
+    run_parser.add_argument('--web-uploads', type=int, default=50,
+                            help='Web rotasıyla yüklenecek belge sayısı')
+    run_parser.add_argument('--queries', type=int, default=200, help='Arama sayısı')
+    run_parser.add_argument('--iterations', type=int, default=50, help='İstatistik çağrısı sayısı')
+    run_parser.add_argument('--downloads', type=int, default=100, help='İndirme sayısı')
+    run_parser.add_argument('--warmup', type=int, default=5, help='Ölçülmeyen ısınma çağrıları')
+    run_parser.add_argument('--words', type=int, default=400, help='Belge başına kelime')
+    run_parser.add_argument('--mix', help=f"Tür dağılımı (varsayılan: "
+                                          f"{','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--ocr', action='store_true', help='Resimlerde OCR çalıştır (tesseract gerekir)')
+    run_parser.add_argument('--skip-web', action='store_true', help='Flask rotalarını ölçme')
+    run_parser.add_argument('--strict-queries', action='store_true',
+                            help='Sık sorgularda tam tablo taramasını hata say')
+    run_parser.add_argument('--top-queries', type=int, default=20,
+                            help='Rapora eklenecek en pahalı SQL ifadesi sayısı')
+    run_parser.add_argument('--config', help='Konfigürasyona birleştirilecek JSON dosyası')
+    run_parser.add_argument('--workdir', help='Çalışma dizini (varsayılan: geçici, sonunda silinir)')
+    run_parser.add_argument('--keep', action='store_true', help='Geçici çalışma dizinini silme')
+    run_parser.add_argument('-o', '--output', help='Sonuç dosyası (varsayılan: standart çıktı)')
+
+    compare_parser = subparsers.add_parser('compare', help='İki sonuç dosyasını karşılaştır')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help='p95 gerileme eşiği (yüzde); aşılırsa çıkış kodu 1')
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"❌ p95 gerilemesi (>%{args.threshold:g}): {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Eşiği aşan gerileme yok")
+        return
+
+    report = run(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        log(f"✅ Sonuçlar yazıldı: {args.output}")
+    else:
+        print(output)
+
+    for name, summary in report['results'].items():
+        log(f"   {name:<34} p50 {summary['p50_ms']:>9.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  "
+            f"p99 {summary['p99_ms']:>9.2f} ms  {summary['ops_per_second']:>8.1f}/sn"
+            + (f"  ❌ {summary['errors']} hata" if summary['errors'] else ''))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
 
 import zipfile
 import os
+import json
+import tempfile
 from pathlib import Path
+from export import compress_type_for
+from backup import snapshot_database
+from storage_crypto import DEFAULT_KEY_FILE
+
+
+def key_file_path(storage_dir: str = 'doxagon_storage') -> Path:
+    """Konfigürasyondaki anahtarlık dosyası (storage.key_file)"""
+    key_file = DEFAULT_KEY_FILE
+    config_file = Path(storage_dir) / 'enterprise_config.json'
+    if config_file.exists():
+        with open(config_file, 'r', encoding='utf-8') as f:
+            key_file = json.load(f).get('storage', {}).get('key_file', key_file)
+    return Path(storage_dir) / key_file
 
 def create_project_zip():
     """DocuMaster HBA Pro projesini ZIP olarak paketler"""
@@ -15,8 +30,7 @@ def create_project_zip():
         'web_api.py', 
         'pyproject.toml',
         '.replit',
-        'generated-icon.png',
-        'doxagon.db'
+        'generated-icon.png'
     ]
     
     include_folders = [
@@ -33,6 +47,12 @@ def create_project_zip():
         '.gitignore'
     ]
     
+    # Anahtarlık şifreli dosyalarla aynı pakete girmez (yedeklerdeki backup.exclude gibi)
+    key_file = key_file_path()
+    excluded_paths = {key_file}
+    if key_file.parent != Path('doxagon_storage'):
+        excluded_paths.add(key_file.parent)
+
     print("📦 DocuMaster HBA Pro ZIP paketi oluşturuluyor...")
     
     with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
@@ -40,22 +60,33 @@ def create_project_zip():
         # Ana dosyaları ekle
         for file in include_files:
             if os.path.exists(file):
-                zipf.write(file)
+                zipf.write(file, compress_type=compress_type_for(file))
                 print(f"✅ {file} eklendi")
         
+        # Veritabanı düz kopyalanmaz: uygulama yazarken tutarlı anlık görüntü alınır
+        if os.path.exists('doxagon.db'):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                snapshot_path = os.path.join(temp_dir, 'doxagon.db')
+                snapshot_database('doxagon.db', snapshot_path)
+                zipf.write(snapshot_path, 'doxagon.db')
+            print("✅ doxagon.db eklendi (anlık görüntü)")
+        
         # Klasörleri ekle
         for folder in include_folders:
             if os.path.exists(folder):
                 for root, dirs, files in os.walk(folder):
                     # Hariç tutulan klasörleri atla
-                    dirs[:] = [d for d in dirs if not any(pattern in d for pattern in exclude_patterns)]
+                    dirs[:] = [d for d in dirs if not any(pattern in d for pattern in exclude_patterns)
+                               and Path(root, d) not in excluded_paths]
                     
                     for file in files:
                         # Hariç tutulan dosyaları atla
-                        if not any(pattern in file for pattern in exclude_patterns):
+                        if (not any(pattern in file for pattern in exclude_patterns)
+                                and Path(root, file) not in excluded_paths):
                             file_path = os.path.join(root, file)
                             arcname = file_path
-                            zipf.write(file_path, arcname)
+                            # JPEG/PNG/PDF gibi zaten sıkıştırılmış dosyalar olduğu gibi saklanır
+                            zipf.write(file_path, arcname, compress_type=compress_type_for(file))
                             print(f"✅ {file_path} eklendi")
         
         # README dosyası ekle
@@ -90,6 +121,7 @@ def create_project_zip():
         print("✅ README.md eklendi")
     
     print(f"\n🎉 ZIP paketi hazır: {zip_filename}")
+    print(f"🔑 Anahtarlık pakete eklenmedi; {key_file} dosyasını ayrı ve güvenli bir konuma kopyalayın")
     print(f"📊 Dosya boyutu: {os.path.getsize(zip_filename) / (1024*1024):.2f} MB")
     
     return zip_filename
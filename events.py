@@ -0,0 +1,203 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Any, List, Callable, Optional, Iterable, Tuple
+
+from logs import get_logger
+
+logger = get_logger('events')
+
+DISPATCH_BATCH = 1000
+
+# event_cursors satırları: abonelere iletilen ve outbox'tan silinen son seq
+DISPATCH_CURSOR = 'dispatch'
+PRUNED_CURSOR = 'pruned'
+
+
+def record(cursor: sqlite3.Cursor, event_type: str, organization_id: Optional[str],
+           resource_type: str, resource_id: str, payload: Dict[str, Any] = None) -> None:
+    """Olayı çağıranın işlemi içinde outbox tablosuna yaz (işlemle birlikte kalıcı olur)"""
+    cursor.execute('''
+        INSERT INTO event_outbox (event_type, organization_id, resource_type, resource_id, payload)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (event_type, organization_id, resource_type, resource_id,
+          json.dumps(payload, ensure_ascii=False) if payload else None))
+
+
+def record_many(cursor: sqlite3.Cursor, event_type: str,
+                items: Iterable[Tuple[Optional[str], str, str]]) -> None:
+    """Aynı türden çok sayıda olayı yaz; items: (organization_id, resource_type, resource_id)"""
+    cursor.executemany('''
+        INSERT INTO event_outbox (event_type, organization_id, resource_type, resource_id)
+        VALUES (?, ?, ?, ?)
+    ''', [(event_type, *item) for item in items])
+
+
+def _read_cursor(cursor: sqlite3.Cursor, name: str) -> Optional[int]:
+    cursor.execute('SELECT seq FROM event_cursors WHERE name = ?', (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _save_cursor(cursor: sqlite3.Cursor, name: str, seq: int) -> None:
+    # İmleç yalnızca ileri gider (birden fazla süreç aynı satırı günceller)
+    cursor.execute('''
+        INSERT INTO event_cursors (name, seq) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET seq = MAX(seq, excluded.seq),
+                                        updated_at = CURRENT_TIMESTAMP
+    ''', (name, seq))
+
+
+def _row_to_event(row: tuple) -> Dict[str, Any]:
+    return {
+        'seq': row[0],
+        'type': row[1],
+        'organization_id': row[2],
+        'resource_type': row[3],
+        'resource_id': row[4],
+        'payload': json.loads(row[5]) if row[5] else {},
+        'created_at': row[6]
+    }
+
+
+class EventBus:
+    """SQLite outbox üzerinden çalışan süreç içi yayınla/abone ol olay yolu
+
+    Olaylar değişikliği yapan işlemle birlikte outbox'a yazılır; dispatch()
+    işlem tamamlandıktan sonra henüz iletilmemiş olayları abonelere dağıtır.
+    İletim imleci veritabanında tutulur; çökme veya yeniden başlatmadan önce
+    kaydedilip iletilmemiş olaylar açılıştan sonraki ilk dispatch() ile iletilir.
+    Aynı tablo /api/changes değişiklik akışının da kaynağıdır.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._subscribers: List[Tuple[str, Callable[[Dict[str, Any]], None]]] = []
+        self._lock = threading.Lock()
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            self._dispatched_seq = _read_cursor(cursor, DISPATCH_CURSOR)
+            if self._dispatched_seq is None:
+                # İlk açılış: mevcut olaylar iletilmiş sayılır
+                cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM event_outbox')
+                self._dispatched_seq = cursor.fetchone()[0]
+                _save_cursor(cursor, DISPATCH_CURSOR, self._dispatched_seq)
+                conn.commit()
+
+    def subscribe(self, prefix: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Türü verilen önekle başlayan olaylara abone ol ('' tüm olaylar)"""
+        with self._lock:
+            self._subscribers.append((prefix, handler))
+
+    def dispatch(self) -> int:
+        """Outbox'taki yeni olayları abonelere ilet, iletilen olay sayısını döndür"""
+        if not self._subscribers:
+            return 0
+
+        delivered = 0
+        with self._lock:
+            while True:
+                with sqlite3.connect(self.db_path) as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        SELECT seq, event_type, organization_id, resource_type, resource_id,
+                               payload, created_at
+                        FROM event_outbox WHERE seq > ? ORDER BY seq LIMIT ?
+                    ''', (self._dispatched_seq, DISPATCH_BATCH))
+                    rows = cursor.fetchall()
+
+                for row in rows:
+                    event = _row_to_event(row)
+                    for prefix, handler in self._subscribers:
+                        if event['type'].startswith(prefix):
+                            try:
+                                handler(event)
+                            except Exception:
+                                logger.exception("Olay işleyici hatası", extra={
+                                    'event_type': event['type'], 'seq': event['seq']})
+                    self._dispatched_seq = event['seq']
+                    delivered += 1
+
+                if rows:
+                    with sqlite3.connect(self.db_path) as conn:
+                        _save_cursor(conn.cursor(), DISPATCH_CURSOR, self._dispatched_seq)
+                        conn.commit()
+
+                if len(rows) < DISPATCH_BATCH:
+                    return delivered
+
+    def backlog(self) -> int:
+        """Henüz abonelere iletilmemiş olay sayısı"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM event_outbox WHERE seq > ?', (self._dispatched_seq,))
+            return cursor.fetchone()[0]
+
+    def changes(self, organization_id: str, since: int = 0, limit: int = 500,
+                type_prefix: str = None) -> Dict[str, Any]:
+        """Organizasyonun imleçten sonraki değişiklikleri ((organization_id, seq) indeksiyle)
+
+        İmleç outbox'tan silinmiş olayların gerisindeyse reset True döner; istemci
+        aradaki değişiklikleri kaçırmıştır ve tam senkronizasyon yapmalıdır.
+        """
+        query = '''
+            SELECT seq, event_type, organization_id, resource_type, resource_id,
+                   payload, created_at
+            FROM event_outbox
+            WHERE organization_id = ? AND seq > ?
+        '''
+        params: List[Any] = [organization_id, since]
+        if type_prefix:
+            query += " AND event_type LIKE ? ESCAPE '\\'"
+            params.append(type_prefix.replace('\\', '\\\\').replace('%', '\\%')
+                          .replace('_', '\\_') + '%')
+        query += ' ORDER BY seq LIMIT ?'
+        params.append(limit)
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            pruned_seq = _read_cursor(cursor, PRUNED_CURSOR) or 0
+
+        events = [_row_to_event(row) for row in rows]
+        return {
+            'reset': since < pruned_seq,
+            'changes': events,
+            'cursor': events[-1]['seq'] if events else since,
+            'has_more': len(events) == limit
+        }
+
+    def prune(self, older_than_days: int, batch_size: int = 1000) -> int:
+        """Eski olayları outbox'tan sil (iletilmemiş olaylara dokunulmaz)"""
+        total = 0
+        while True:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT MAX(seq) FROM (
+                        SELECT seq FROM event_outbox
+                        WHERE created_at < datetime('now', ?) AND seq <= ?
+                        ORDER BY seq LIMIT ?
+                    )
+                ''', (f'-{int(older_than_days)} days', self._dispatched_seq, batch_size))
+                last_seq = cursor.fetchone()[0]
+                if last_seq is None:
+                    return total
+
+                cursor.execute('''
+                    DELETE FROM event_outbox WHERE seq IN (
+                        SELECT seq FROM event_outbox
+                        WHERE created_at < datetime('now', ?) AND seq <= ?
+                        ORDER BY seq LIMIT ?
+                    )
+                ''', (f'-{int(older_than_days)} days', self._dispatched_seq, batch_size))
+                deleted = cursor.rowcount
+                # /api/changes bu seq'in gerisindeki imleçlere reset döndürür
+                _save_cursor(cursor, PRUNED_CURSOR, last_seq)
+                conn.commit()
+
+            total += deleted
+            if deleted < batch_size:
+                return total
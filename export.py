@@ -0,0 +1,203 @@
+import io
+import json
+import time
+import zipfile
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator
+
+# İçeriği zaten sıkıştırılmış formatlar ZIP içinde yeniden deflate edilmez
+STORED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.pdf', '.zip', '.gz', '.bz2', '.xz',
+    '.7z', '.rar', '.docx', '.xlsx', '.pptx', '.odt', '.mp3', '.mp4', '.mov'
+}
+
+CHUNK_SIZE = 64 * 1024
+PAGE_SIZE = 200
+
+# Arşivde dosyaların sırası: önce manifest, sonra belgeler
+EXPORT_COLUMNS = '''
+    d.id, d.original_name, d.file_path, d.file_size, d.file_hash, d.category,
+    d.confidentiality, d.description, d.created_at, GROUP_CONCAT(t.name), d.storage_format
+'''
+
+
+def compress_type_for(name: str) -> int:
+    """Dosya adına göre ZIP sıkıştırma yöntemini seç"""
+    if Path(name).suffix.lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+class _StreamBuffer(io.RawIOBase):
+    """zipfile'ın yazdığı baytları biriktiren, aranamayan (seek desteklemeyen) hedef"""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+
+def _archive_name(row: tuple) -> str:
+    folder = (row[5] or 'Genel').replace('/', '_')
+    name = (row[1] or 'belge').replace('/', '_').replace('\\', '_')
+    # Aynı adlı belgeler çakışmasın diye kimliğin başı eklenir
+    return f"{folder}/{row[0][:8]}_{name}"
+
+
+def _manifest_entry(row: tuple) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'name': row[1],
+        'path': _archive_name(row),
+        'size': row[3],
+        'sha256': row[4],
+        'category': row[5],
+        'confidentiality': row[6],
+        'description': row[7],
+        'created_at': row[8],
+        'tags': row[9].split(',') if row[9] else []
+    }
+
+
+def iter_export_rows(manager, organization_id: str, query: str = "",
+                     filters: Dict[str, Any] = None) -> Iterator[tuple]:
+    """Dışa aktarılacak belgeleri anahtar tabanlı sayfalarla getir (bellek sınırlı)
+
+    Her sayfa kendi kısa bağlantısında okunur; uzun süren dışa aktarım
+    yazarları bekletecek bir okuma işlemi açık tutmaz.
+    """
+    base_query, params = manager.build_search_query(organization_id, query, filters,
+                                                    columns=EXPORT_COLUMNS)
+    last_id = ''
+    while True:
+        with manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(base_query + ' AND d.id > ? GROUP BY d.id ORDER BY d.id LIMIT ?',
+                           [*params, last_id, PAGE_SIZE])
+            rows = cursor.fetchall()
+
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        last_id = rows[-1][0]
+
+
+def iter_export(manager, organization_id: str, query: str = "",
+                filters: Dict[str, Any] = None, stats: Dict[str, Any] = None) -> Iterator[bytes]:
+    """Belgeleri ve JSON manifesti içeren ZIP arşivini parça parça üret
+
+    Geçici dosya kullanılmaz; bellekte manifest'teki belge kimlikleri ve en
+    fazla bir parça kadar veri tutulur, ilk baytlar hemen gönderilir. Dosya
+    geçişi manifest'teki belgelerle sınırlıdır; iki geçiş arasında silinen
+    (veya artık filtreye uymayan) belgeler errors.json'a yazılır.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({'documents': 0, 'bytes': 0, 'errors': []})
+    buffer = _StreamBuffer()
+    now = datetime.now()
+    date_time = now.timetuple()[:6]
+    manifest_ids = set()
+
+    with zipfile.ZipFile(buffer, 'w', allowZip64=True) as archive:
+        # 1. geçiş: manifest (belge üst verileri akış halinde JSON olarak yazılır)
+        info = zipfile.ZipInfo('manifest.json', date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w', force_zip64=True) as dest:
+            header = {'exported_at': now.isoformat(), 'organization_id': organization_id,
+                      'query': query, 'filters': filters or {}}
+            dest.write(json.dumps(header, ensure_ascii=False)[:-1].encode('utf-8'))
+            dest.write(b', "documents": [')
+            for index, row in enumerate(iter_export_rows(manager, organization_id, query, filters)):
+                manifest_ids.add(row[0])
+                entry = json.dumps(_manifest_entry(row), ensure_ascii=False)
+                dest.write(((',' if index else '') + '\n' + entry).encode('utf-8'))
+                if len(buffer) >= CHUNK_SIZE:
+                    yield buffer.drain()
+            dest.write(b'\n]}\n')
+
+        # 2. geçiş: belge dosyaları (şifre ve sıkıştırma akış halinde açılır)
+        for row in iter_export_rows(manager, organization_id, query, filters):
+            if row[0] not in manifest_ids:
+                # Manifest yazıldıktan sonra eklenmiş
+                continue
+            manifest_ids.discard(row[0])
+            name = _archive_name(row)
+            info = zipfile.ZipInfo(name, date_time)
+            info.compress_type = compress_type_for(row[1] or '')
+            try:
+                with manager.open_blob(row[2], row[10]) as source, \
+                        archive.open(info, 'w', force_zip64=True) as dest:
+                    while True:
+                        chunk = source.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        stats['bytes'] += len(chunk)
+                        if len(buffer) >= CHUNK_SIZE:
+                            yield buffer.drain()
+                stats['documents'] += 1
+            except Exception as e:
+                # Okuma, şifre çözme veya açma hatası arşivin geri kalanını kesmez
+                stats['errors'].append({'id': row[0], 'path': name, 'error': str(e)})
+
+            yield buffer.drain()
+
+        for document_id in sorted(manifest_ids):
+            stats['errors'].append({'id': document_id, 'path': None,
+                                    'error': 'Belge dışa aktarım sırasında silindi veya değişti'})
+
+        if stats['errors']:
+            archive.writestr('errors.json', json.dumps(stats['errors'], ensure_ascii=False, indent=2))
+
+    yield buffer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon belge dışa aktarımı (ZIP + manifest)")
+    parser.add_argument('organization_id', help='Dışa aktarılacak organizasyon')
+    parser.add_argument('-o', '--output', required=True, help='Çıktı ZIP dosyası ("-" stdout)')
+    parser.add_argument('-q', '--query', default='', help='Arama ifadesi (boşsa tüm belgeler)')
+    parser.add_argument('--category')
+    parser.add_argument('--confidentiality')
+    parser.add_argument('--tag', action='append', dest='tags')
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+
+    filters = {key: value for key, value in (('category', args.category),
+                                             ('confidentiality', args.confidentiality),
+                                             ('tags', args.tags)) if value}
+    stats = {}
+    started = time.perf_counter()
+    output = open(args.output, 'wb') if args.output != '-' else io.open(1, 'wb', closefd=False)
+    with output:
+        for chunk in iter_export(doxagon, args.organization_id, args.query, filters, stats):
+            output.write(chunk)
+    elapsed = time.perf_counter() - started
+
+    if args.output != '-':
+        print(f"✅ {stats['documents']} belge dışa aktarıldı: {args.output}")
+        print(f"💾 {doxagon.format_size(stats['bytes'])} ({elapsed:.1f} sn)")
+        if stats['errors']:
+            print(f"⚠️  {len(stats['errors'])} belge okunamadı (errors.json)")
+
+
+if __name__ == "__main__":
+    main()
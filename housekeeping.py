@@ -0,0 +1,219 @@
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List
+
+from logs import get_logger
+
+logger = get_logger('housekeeping')
+
+
+class Housekeeper:
+    """Süresi dolan paylaşım linklerini ve sahipsiz dosyaları temizleyen servis"""
+
+    def __init__(self, manager, dry_run: bool = False):
+        self.manager = manager
+        self.settings = manager.config['housekeeping']
+        self.dry_run = dry_run
+        self._stop = threading.Event()
+        self._thread = None
+
+    def deactivate_expired_links(self) -> int:
+        """Süresi dolmuş aktif paylaşım linklerini partiler halinde pasifleştir"""
+        now_iso = datetime.now().isoformat()
+        batch_size = self.settings['batch_size']
+        total = 0
+
+        while True:
+            with self.manager.db.connect() as conn:
+                cursor = conn.cursor()
+                if self.dry_run:
+                    cursor.execute('''
+                        SELECT COUNT(*) FROM share_links WHERE is_active = 1 AND expires_at < ?
+                    ''', (now_iso,))
+                    return cursor.fetchone()[0]
+
+                cursor.execute('''
+                    SELECT id, token FROM share_links
+                    WHERE is_active = 1 AND expires_at < ?
+                    ORDER BY expires_at
+                    LIMIT ?
+                ''', (now_iso, batch_size))
+                rows = cursor.fetchall()
+
+                if not rows:
+                    return total
+
+                placeholders = ','.join('?' for _ in rows)
+                cursor.execute(f'''
+                    UPDATE share_links SET is_active = 0 WHERE id IN ({placeholders})
+                ''', [row[0] for row in rows])
+                conn.commit()
+
+            for _, token in rows:
+                self.manager.share_links.invalidate(token=token)
+            total += len(rows)
+
+    def delete_old_links(self) -> int:
+        """Uzun süre önce dolmuş pasif linkleri tablodan sil"""
+        cutoff = (datetime.now() - timedelta(days=self.settings['expired_link_retention_days'])).isoformat()
+        batch_size = self.settings['batch_size']
+        total = 0
+
+        while True:
+            with self.manager.db.connect() as conn:
+                cursor = conn.cursor()
+                if self.dry_run:
+                    cursor.execute('''
+                        SELECT COUNT(*) FROM share_links WHERE is_active = 0 AND expires_at < ?
+                    ''', (cutoff,))
+                    return cursor.fetchone()[0]
+
+                cursor.execute('''
+                    DELETE FROM share_links WHERE id IN (
+                        SELECT id FROM share_links
+                        WHERE is_active = 0 AND expires_at < ?
+                        LIMIT ?
+                    )
+                ''', (cutoff, batch_size))
+                deleted = cursor.rowcount
+                conn.commit()
+
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    def _older_than(self, path: Path, hours: float) -> bool:
+        try:
+            return time.time() - path.stat().st_mtime > hours * 3600
+        except OSError:
+            return False
+
+    def _remove(self, path: Path) -> int:
+        """Dosya veya dizini sil, serbest kalan bayt sayısını döndür"""
+        if path.is_dir():
+            size = sum(child.stat().st_size for child in path.rglob('*') if child.is_file())
+            if not self.dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+            return size
+
+        size = path.stat().st_size
+        if not self.dry_run:
+            path.unlink(missing_ok=True)
+        return size
+
+    def clean_temp_files(self) -> Dict[str, int]:
+        """Yarıda kalmış yüklemelerden kalan geçici dosyaları temizle"""
+        result = {'files': 0, 'bytes': 0}
+        max_age = self.settings['temp_max_age_hours']
+
+        for path in list(self.manager.temp_dir.iterdir()):
+            if self._older_than(path, max_age):
+                result['bytes'] += self._remove(path)
+                result['files'] += 1
+
+        return result
+
+    def _existing_ids(self, ids: List[str]) -> set:
+        existing = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ','.join('?' for _ in chunk)
+            with self.manager.db.connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'SELECT id FROM documents WHERE id IN ({placeholders})', chunk)
+                existing.update(row[0] for row in cursor.fetchall())
+        return existing
+
+    def clean_orphan_uploads(self) -> Dict[str, int]:
+        """Veritabanında karşılığı olmayan yükleme dizinlerini ve thumbnail'leri sil"""
+        result = {'directories': 0, 'thumbnails': 0, 'bytes': 0}
+        # Yükleme sırasında dosya, satırdan önce yazılır; yeni dizinlere dokunulmaz
+        min_age = self.settings['orphan_min_age_hours']
+
+        upload_dirs = [path for path in self.manager.uploads_dir.iterdir()
+                       if path.is_dir() and self._older_than(path, min_age)]
+        existing = self._existing_ids([path.name for path in upload_dirs])
+        for path in upload_dirs:
+            if path.name not in existing:
+                result['bytes'] += self._remove(path)
+                result['directories'] += 1
+
+        thumbnails = {path.name[:-len('_thumb.jpg')]: path
+                      for path in self.manager.thumbnails_dir.glob('*_thumb.jpg')
+                      if self._older_than(path, min_age)}
+        existing = self._existing_ids(list(thumbnails))
+        for document_id, path in thumbnails.items():
+            if document_id not in existing:
+                result['bytes'] += self._remove(path)
+                result['thumbnails'] += 1
+
+        return result
+
+    def run_once(self) -> Dict[str, Any]:
+        """Tüm temizlik adımlarını çalıştır ve kazanılanları raporla"""
+        report = {
+            'dry_run': self.dry_run,
+            'links_deactivated': self.deactivate_expired_links(),
+            'links_deleted': self.delete_old_links(),
+            'temp': self.clean_temp_files(),
+            'orphans': self.clean_orphan_uploads()
+        }
+        # Kota defteri kaynak tablolarla eşitlenir (deneme modunda yazılmaz)
+        if self.settings['reconcile_quotas'] and not self.dry_run:
+            report['quota_drift'] = len(self.manager.quota.reconcile())
+        if not self.dry_run:
+            report['events_pruned'] = self.manager.events.prune(self.settings['event_retention_days'])
+            report['tombstones_pruned'] = self.manager.sync.prune_tombstones()
+        report['bytes_reclaimed'] = report['temp']['bytes'] + report['orphans']['bytes']
+        return report
+
+    def _loop(self) -> None:
+        interval = self.settings['interval_minutes'] * 60
+        while not self._stop.wait(interval):
+            try:
+                report = self.run_once()
+                if report['links_deactivated'] or report['bytes_reclaimed']:
+                    logger.info("Temizlik tamamlandı", extra={
+                        'links_deactivated': report['links_deactivated'],
+                        'bytes_reclaimed': report['bytes_reclaimed']
+                    })
+            except Exception:
+                logger.exception("Temizlik servisi hatası")
+
+    def start(self) -> None:
+        """Servisi arka plan iş parçacığında başlat"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="housekeeping", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon temizlik servisi")
+    parser.add_argument('--dry-run', action='store_true', help='Hiçbir şeyi silmeden rapor üret')
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+    report = Housekeeper(doxagon, args.dry_run).run_once()
+
+    prefix = "🔍 (deneme) " if args.dry_run else "✅ "
+    print(f"{prefix}Pasifleştirilen link: {report['links_deactivated']}")
+    print(f"{prefix}Silinen eski link: {report['links_deleted']}")
+    print(f"{prefix}Geçici dosya: {report['temp']['files']}")
+    print(f"{prefix}Sahipsiz dizin: {report['orphans']['directories']}, "
+          f"thumbnail: {report['orphans']['thumbnails']}")
+    print(f"💾 Kazanılan alan: {doxagon.format_size(report['bytes_reclaimed'])}")
+
+
+if __name__ == "__main__":
+    main()
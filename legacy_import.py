@@ -0,0 +1,335 @@
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import getpass
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Iterator, Tuple
+
+from events import record_many
+from quota import charge, QuotaExceededError
+
+READ_CHUNK = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+
+def iter_metadata(path: Path, chunk_size: int = READ_CHUNK) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """files/metadata.json'daki {anahtar: kayıt} çiftlerini akış halinde oku
+
+    Dosya belleğe tümüyle yüklenmez; tampon yalnızca bir kayıt tamamlanana
+    kadar büyür (json.JSONDecoder.raw_decode ile).
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, position, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def skip_whitespace() -> None:
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in WHITESPACE:
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        def expect(chars: str) -> str:
+            skip_whitespace()
+            if position >= len(buffer) or buffer[position] not in chars:
+                raise ValueError(f"metadata.json: '{chars}' bekleniyordu (konum {position})")
+            return buffer[position]
+
+        def decode():
+            nonlocal position
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # Tampon sonunda biten değer yarım kalmış olabilir (ör. sayı)
+                    if end < len(buffer) or eof:
+                        position = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                if not fill():
+                    value, position = decoder.raw_decode(buffer, position)
+                    return value
+
+        expect('{')
+        position += 1
+        if expect('}"') == '}':
+            return
+
+        while True:
+            key = decode()
+            expect(':')
+            position += 1
+            value = decode()
+            if isinstance(value, dict):
+                yield key, value
+
+            if expect(',}') == '}':
+                return
+            position += 1
+
+
+def _parse_added_date(value: Any) -> datetime:
+    """Eski arşivin yerel ISO tarihini çöz; boş veya bozuksa şimdiki zaman"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def _utc_timestamp(value: datetime) -> str:
+    """Tarihi veritabanının UTC zaman damgasına çevir"""
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class LegacyImporter:
+    """Eski files/<kategori>/ + files/metadata.json arşivini belgelere aktarır
+
+    Kayıtlar toplu işlemlerle eklenir; organizasyonda (veya aynı arşivde)
+    aynı hash'e sahip dosyalar atlanır. Belgeler oturum açmış kullanıcı
+    adına, kullanıcının organizasyonuna aktarılır.
+    """
+
+    def __init__(self, manager, source_dir: str, batch_size: int = 200,
+                 category_map: Dict[str, str] = None, extract_text: bool = True,
+                 thumbnails: bool = True):
+        self.manager = manager
+        self.source_dir = Path(source_dir)
+        self.batch_size = batch_size
+        self.category_map = category_map or {}
+        self.extract_text = extract_text
+        self.thumbnails = thumbnails
+        self._tag_ids: Dict[str, str] = {}
+        self._seen_hashes = set()
+
+    def _new_stats(self) -> Dict[str, Any]:
+        return {'scanned': 0, 'imported': 0, 'duplicates': 0, 'missing': 0, 'rejected': 0,
+                'bytes': 0, 'seconds': 0.0}
+
+    def _prepare(self, key: str, entry: Dict[str, Any], stats: Dict[str, Any]):
+        """Kaydı doğrula ve hash'le; aktarılamayacaksa None döndür"""
+        storage = self.manager.config['storage']
+        path = self.source_dir / key
+        if not path.is_file():
+            stats['missing'] += 1
+            return None
+
+        file_size = path.stat().st_size
+        if (path.suffix.lower() not in storage['allowed_extensions']
+                or file_size > storage['max_file_size_mb'] * 1024 * 1024):
+            stats['rejected'] += 1
+            return None
+
+        file_hash = self.manager.calculate_file_hash(path)
+        if file_hash in self._seen_hashes:
+            stats['duplicates'] += 1
+            return None
+        self._seen_hashes.add(file_hash)
+
+        legacy_category = str(entry.get('category') or path.parent.name)
+        return {
+            'key': key,
+            'path': path,
+            'name': entry.get('original_name') or path.name,
+            'hash': file_hash,
+            'size': file_size,
+            'category': self.category_map.get(legacy_category, legacy_category),
+            'description': entry.get('description') or '',
+            'tags': [tag.strip() for tag in entry.get('tags') or [] if tag and tag.strip()],
+            'added_date': entry.get('added_date'),
+            'added': _parse_added_date(entry.get('added_date')),
+            'original_path': entry.get('original_path')
+        }
+
+    def _drop_existing(self, cursor: sqlite3.Cursor, batch: List[Dict[str, Any]],
+                       stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Organizasyonda zaten bulunan hash'leri (organization_id, file_hash) indeksiyle ele"""
+        placeholders = ','.join('?' for _ in batch)
+        # İstatistik yokken planlayıcı IN listesi yerine is_active indeksini seçiyor
+        cursor.execute(f'''
+            SELECT file_hash FROM documents INDEXED BY idx_documents_hash
+            WHERE organization_id = ? AND is_active = 1 AND file_hash IN ({placeholders})
+        ''', [self.manager.current_user['organization_id'], *(item['hash'] for item in batch)])
+        existing = {row[0] for row in cursor.fetchall()}
+        stats['duplicates'] += sum(1 for item in batch if item['hash'] in existing)
+        return [item for item in batch if item['hash'] not in existing]
+
+    def _tag_id(self, cursor: sqlite3.Cursor, name: str) -> str:
+        organization_id = self.manager.current_user['organization_id']
+        if name not in self._tag_ids:
+            cursor.execute('SELECT id FROM tags WHERE name = ? AND organization_id = ?',
+                           (name, organization_id))
+            row = cursor.fetchone()
+            if row:
+                self._tag_ids[name] = row[0]
+            else:
+                self._tag_ids[name] = str(uuid.uuid4())
+                cursor.execute('INSERT INTO tags (id, name, organization_id) VALUES (?, ?, ?)',
+                               (self._tag_ids[name], name, organization_id))
+        return self._tag_ids[name]
+
+    def _flush(self, batch: List[Dict[str, Any]], stats: Dict[str, Any]) -> None:
+        """Partiyi depoya yaz ve tek işlemde veritabanına ekle"""
+        manager = self.manager
+        user = manager.current_user
+        organization_id = user['organization_id']
+
+        with manager.db.connect() as conn:
+            batch = self._drop_existing(conn.cursor(), batch, stats)
+        if not batch:
+            return
+
+        batch_bytes = sum(item['size'] for item in batch)
+        manager.quota.check(organization_id, storage_bytes=batch_bytes, documents=len(batch))
+
+        retention = manager.config['retention']
+        for item in batch:
+            item['id'] = str(uuid.uuid4())
+            doc_dir = manager.uploads_dir / item['id'] / "v1"
+            doc_dir.mkdir(parents=True, exist_ok=True)
+            item['dest'] = doc_dir / item['path'].name
+            item['format'] = manager.store_blob(item['path'], item['dest'])
+            item['text'] = manager.extract_text_content(item['path']) if self.extract_text else ''
+            item['thumbnail'] = (manager.create_thumbnail(item['path'], item['id'])
+                                 if self.thumbnails else None)
+            years = retention['policies'].get(item['category'], retention['default_years'])
+            item['retention_date'] = (item['added'] + timedelta(days=years * 365)).isoformat()
+
+        with manager.db.connect() as conn:
+            cursor = conn.cursor()
+            try:
+                charge(cursor, organization_id, storage_bytes=batch_bytes, documents=len(batch))
+            except QuotaExceededError:
+                conn.rollback()
+                for item in batch:
+                    shutil.rmtree(manager.uploads_dir / item['id'], ignore_errors=True)
+                    if item['thumbnail']:
+                        Path(item['thumbnail']).unlink(missing_ok=True)
+                raise
+
+            cursor.executemany('''
+                INSERT INTO documents (
+                    id, original_name, current_name, file_path, file_hash,
+                    file_size, mime_type, category, document_type,
+                    organization_id, uploaded_by, description, confidentiality,
+                    retention_date, thumbnail_path, storage_format, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', [(
+                item['id'], item['name'], item['path'].name, str(item['dest']), item['hash'],
+                item['size'], manager.get_mime_type(item['path']), item['category'],
+                item['category'], organization_id, user['id'], item['description'], 'Normal',
+                item['retention_date'], item['thumbnail'], item['format'],
+                _utc_timestamp(item['added'])
+            ) for item in batch])
+
+            cursor.executemany('''
+                INSERT INTO document_texts (document_id, ocr_text) VALUES (?, ?)
+            ''', [(item['id'], manager.pack_text(item['text'])) for item in batch if item['text']])
+
+            cursor.executemany('''
+                INSERT INTO document_versions (
+                    id, document_id, version_number, file_path, file_hash,
+                    file_size, created_by, is_current, change_notes, storage_format
+                ) VALUES (?, ?, 1, ?, ?, ?, ?, 1, ?, ?)
+            ''', [(str(uuid.uuid4()), item['id'], str(item['dest']), item['hash'], item['size'],
+                   user['id'], "Eski arşivden aktarıldı", item['format']) for item in batch])
+
+            cursor.executemany('''
+                INSERT INTO document_metadata (id, document_id, key, value) VALUES (?, ?, ?, ?)
+            ''', [(str(uuid.uuid4()), item['id'], key, value) for item in batch
+                  for key, value in (('legacy_key', item['key']),
+                                     ('legacy_original_path', item['original_path']),
+                                     ('legacy_added_date', item['added_date'])) if value])
+
+            cursor.executemany('''
+                INSERT OR IGNORE INTO document_tags (document_id, tag_id) VALUES (?, ?)
+            ''', [(item['id'], self._tag_id(cursor, tag)) for item in batch for tag in item['tags']])
+
+            record_many(cursor, 'document.created',
+                        ((organization_id, 'document', item['id']) for item in batch))
+            conn.commit()
+
+        stats['imported'] += len(batch)
+        stats['bytes'] += batch_bytes
+        manager.log_action("IMPORT", "organization", organization_id,
+                           f"Eski arşivden {len(batch)} belge aktarıldı: {self.source_dir}")
+
+    def run(self, metadata_file: str = None) -> Dict[str, Any]:
+        """Arşivi aktar; sayaçlar ve hız (belge/sn, MB/sn) döner"""
+        if not self.manager.current_user:
+            raise PermissionError("Oturum açmanız gerekiyor")
+
+        stats = self._new_stats()
+        started = time.perf_counter()
+        batch = []
+        for key, entry in iter_metadata(Path(metadata_file or self.source_dir / "metadata.json")):
+            stats['scanned'] += 1
+            item = self._prepare(key, entry, stats)
+            if item:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, stats)
+                batch = []
+        if batch:
+            self._flush(batch, stats)
+
+        stats['seconds'] = time.perf_counter() - started
+        elapsed = max(stats['seconds'], 1e-9)
+        stats['documents_per_second'] = stats['imported'] / elapsed
+        stats['mb_per_second'] = stats['bytes'] / (1024 * 1024) / elapsed
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eski files/metadata.json arşivini içe aktar")
+    parser.add_argument('source', nargs='?', default='files', help='Arşiv dizini (varsayılan: files)')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--category-map', action='append', default=[], metavar='ESKI=YENI',
+                        help='Eski kategori adını yenisine eşle (ör. 6=Fatura)')
+    parser.add_argument('--fast', action='store_true',
+                        help='Metin çıkarma (OCR) ve küçük resim oluşturmayı atla')
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+    if not doxagon.authenticate_user(args.username, getpass.getpass("Şifre: ")):
+        print("❌ Geçersiz kullanıcı adı veya şifre!")
+        return
+
+    category_map = dict(item.split('=', 1) for item in args.category_map)
+    importer = LegacyImporter(doxagon, args.source, args.batch_size, category_map,
+                              extract_text=not args.fast, thumbnails=not args.fast)
+    try:
+        stats = importer.run()
+    except QuotaExceededError as e:
+        print(f"❌ {e}!")
+        return
+
+    print(f"✅ {stats['imported']} belge aktarıldı ({stats['scanned']} kayıt tarandı)")
+    print(f"♻️  Yinelenen: {stats['duplicates']}  ❓ Eksik: {stats['missing']}  "
+          f"⛔ Reddedilen: {stats['rejected']}")
+    print(f"⚡ {stats['documents_per_second']:.1f} belge/sn, {stats['mb_per_second']:.2f} MB/sn "
+          f"({doxagon.format_size(stats['bytes'])}, {stats['seconds']:.1f} sn)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import sys
+import json
+import copy
+import queue
+import atexit
+import logging
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from typing import Dict, Any, Optional
+
+ROOT_LOGGER = 'doxagon'
+
+# İstek/iş başına ilişki kimliği (aynı isteğin tüm kayıtlarında görünür)
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    'correlation_id', default=None
+)
+
+# LogRecord'un kendi alanları; bunların dışındaki extra={...} alanları kayda eklenir
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'correlation_id'
+}
+
+_listener: Optional[QueueListener] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """doxagon.<name> kaydedicisi"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def set_correlation_id(value: Optional[str]) -> contextvars.Token:
+    return _correlation_id.set(value)
+
+
+def reset_correlation_id(token: contextvars.Token) -> None:
+    _correlation_id.reset(token)
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def _fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items()
+            if key not in _RESERVED and not key.startswith('_')}
+
+
+class CorrelationFilter(logging.Filter):
+    """Kaydı üreten iş parçacığındaki ilişki kimliğini kayda ekle"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Her kaydı tek satırlık JSON olarak yaz"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if getattr(record, 'correlation_id', None):
+            data['correlation_id'] = record.correlation_id
+        data.update(_fields(record))
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Etkileşimli konsol için okunabilir biçim: mesaj | alan=değer ..."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = record.getMessage()
+        fields = _fields(record)
+        if fields:
+            text += ' | ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            text += '\n' + record.exc_text
+        return text
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """Kaydı kuyruğa yapısını bozmadan koy
+
+    Standart QueueHandler mesajı ve istisnayı tek metinde birleştirir;
+    burada yalnızca mesaj argümanları çözülür, istisna metni ayrı kalır.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(settings: Dict[str, Any], fmt: str = None) -> None:
+    """doxagon.* kaydedicilerini engellemeyen kuyruk işleyicisiyle yapılandır
+
+    Kayıt üreten iş parçacığı yalnızca kuyruğa ekler; biçimlendirme ve
+    yazma QueueListener iş parçacığında yapılır. Tekrar çağrılabilir.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    fmt = fmt or settings['format']
+    console = logging.StreamHandler(sys.stdout if fmt == 'text' else sys.stderr)
+    console.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+    handlers = [console]
+    if settings.get('file'):
+        # Dosyaya her zaman JSON yazılır (logrotate ile uyumlu)
+        file_handler = WatchedFileHandler(settings['file'], encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers = [queue_handler]
+    root.setLevel(settings['level'].upper())
+    root.propagate = False
+    for name, level in settings.get('levels', {}).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Kuyruktaki kayıtları yaz ve dinleyiciyi durdur"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -4,60 +4,111 @@ import json
 from datetime import datetime, timedelta
 from pathlib import Path
 import re
+import time
 import hashlib
 import uuid
 import sqlite3
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import base64
 import secrets
-import smtplib
-try:
-    from email.mime.text import MIMEText as MimeText
-    from email.mime.multipart import MIMEMultipart as MimeMultipart
-    EMAIL_AVAILABLE = True
-except ImportError:
-    # Email özellikleri devre dışı
-    class DummyMime:
-        def __init__(self, *args, **kwargs):
-            pass
-    MimeText = DummyMime
-    MimeMultipart = DummyMime
-    EMAIL_AVAILABLE = False
-
-try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-
-try:
-    import docx
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-
-try:
-    import requests
-    WEB_AVAILABLE = True
-except ImportError:
-    WEB_AVAILABLE = False
+import importlib.util
+
+
+def module_available(name: str) -> bool:
+    """Modülün kurulu olup olmadığını içe aktarmadan kontrol et
+
+    Ağır isteğe bağlı kütüphaneler (PIL, pytesseract, docx, PyPDF2) açılışta
+    yüklenmez; ilk kullanıldıkları fonksiyonda içe aktarılır.
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+OCR_AVAILABLE = module_available('PIL') and module_available('pytesseract')
+DOCX_AVAILABLE = module_available('docx')
+PDF_AVAILABLE = module_available('PyPDF2')
+WEB_AVAILABLE = module_available('requests')
+
+from storage_crypto import (
+    CRYPTO_AVAILABLE, KeyRing, encrypt_stream, is_encrypted, open_blob, blob_size
+)
+from reminder_scheduler import ReminderScheduler
+from share_links import ShareLinkResolver
+from housekeeping import Housekeeper
+from passwords import PasswordHasher
+from rate_limit import LoginGuard, RateLimitExceeded
+from principals import PrincipalCache
+from quota import QuotaService, QuotaExceededError, charge, release
+from workflow import WorkflowEngine
+from events import EventBus, record, record_many
+from sync import DocumentSync, add_tombstones
+from metrics import registry as metrics, TimedConnection
+from query_audit import auditor as query_auditor, AuditedConnection
+from logs import get_logger, configure_logging
+from storage_compression import (
+    CompressingReader, wrap_decompress, resolve_codec, compress_text,
+    decompress_text, record_savings, storage_format, storage_layers, FORMAT_PLAIN,
+    MAGIC as COMPRESSION_MAGIC
+)
+
+logger = get_logger('manager')
+
+# Toplu işlemlerde tek IN (...) ifadesine konacak en fazla kimlik sayısı
+BATCH_CHUNK_SIZE = 500
+
+# Arama sonuçlarında döndürülen sütunlar (OCR metni ayrı tabloda kalır)
+SEARCH_COLUMNS = '''
+    d.id, d.original_name, d.current_name, d.file_size, d.category,
+    d.document_type, d.description, d.confidentiality, d.created_at,
+    u.username as uploaded_by_name, GROUP_CONCAT(t.name) as tag_names
+'''
+
+# Şema değiştiğinde (tablo, sütun, indeks) artırılmalıdır; veritabanındaki
+# PRAGMA user_version bu değere eşitse açılışta DDL çalıştırılmaz
+SCHEMA_VERSION = 1
 
 class DatabaseManager:
     def __init__(self, db_path="doxagon.db"):
         self.db_path = db_path
-        self.init_database()
-
-    def init_database(self):
-        """Veritabanı tablolarını oluştur"""
+        self.schema_migrated = self.init_database()
+
+    def connect(self) -> sqlite3.Connection:
+        """Özel SQL fonksiyonları kayıtlı bir bağlantı aç"""
+        # Metrikler açıkken her SQL ifadesi işlem/tablo bazında ölçülür; sorgu
+        # denetçisi ayrıca ifade başına süreyi, yavaş sorguları ve planları izler
+        if query_auditor.enabled:
+            factory = AuditedConnection
+        elif metrics.enabled:
+            factory = TimedConnection
+        else:
+            factory = sqlite3.Connection
+        conn = sqlite3.connect(self.db_path, factory=factory)
+        # Sıkıştırılmış OCR metni SQL içinde aranabilsin
+        conn.create_function('dx_text', 1, decompress_text, deterministic=True)
+        return conn
+
+    def add_column_if_missing(self, cursor: sqlite3.Cursor, table: str,
+                              column: str, definition: str) -> None:
+        """Mevcut veritabanlarına yeni sütun ekle"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    def init_database(self) -> bool:
+        """Veritabanı tablolarını oluştur (şema güncelse hiçbir şey yapmaz)"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
+            cursor.execute('PRAGMA user_version')
+            user_version = cursor.fetchone()[0]
+            if user_version == SCHEMA_VERSION:
+                return False
+            if user_version > SCHEMA_VERSION:
+                # Daha yeni bir sürümün şeması: sürüm numarası geri alınmaz
+                logger.warning("Veritabanı şeması bu sürümden yeni",
+                               extra={'user_version': user_version, 'schema_version': SCHEMA_VERSION})
+                return False
 
             # Kullanıcılar tablosu
             cursor.execute('''
@@ -111,13 +162,21 @@ class DatabaseManager:
                     retention_date TIMESTAMP,
                     is_active BOOLEAN DEFAULT 1,
                     thumbnail_path TEXT,
-                    ocr_text TEXT,
                     ai_classification TEXT,
                     FOREIGN KEY (organization_id) REFERENCES organizations(id),
                     FOREIGN KEY (uploaded_by) REFERENCES users(id)
                 )
             ''')
 
+            # Belge metinleri tablosu (büyük OCR metni ana tablodan ayrı, gerektiğinde yüklenir)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS document_texts (
+                    document_id TEXT PRIMARY KEY,
+                    ocr_text TEXT,
+                    FOREIGN KEY (document_id) REFERENCES documents(id)
+                )
+            ''')
+
             # Belge versiyonları tablosu
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS document_versions (
@@ -257,10 +316,162 @@ class DatabaseManager:
                 )
             ''')
 
+            # Organizasyon kullanım defteri (kota kontrolü)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS organization_usage (
+                    organization_id TEXT PRIMARY KEY,
+                    storage_bytes INTEGER DEFAULT 0,
+                    document_count INTEGER DEFAULT 0,
+                    user_count INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (organization_id) REFERENCES organizations (id)
+                )
+            ''')
+
+            # Olay outbox'ı (olay yolu ve /api/changes değişiklik akışı)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_outbox (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_type TEXT NOT NULL,
+                    organization_id TEXT,
+                    resource_type TEXT,
+                    resource_id TEXT,
+                    payload TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Olay yolunun iletim ve budama imleçleri
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_cursors (
+                    name TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Silinen belgelerin mezar taşları (artımlı istemci senkronizasyonu)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS document_tombstones (
+                    document_id TEXT PRIMARY KEY,
+                    organization_id TEXT,
+                    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Başarısız giriş kilitleri
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS login_lockouts (
+                    lock_key TEXT PRIMARY KEY,
+                    locked_until REAL NOT NULL
+                )
+            ''')
+
+            # Sıkıştırma kazancı istatistikleri
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS compression_stats (
+                    target TEXT PRIMARY KEY,
+                    items INTEGER DEFAULT 0,
+                    original_bytes INTEGER DEFAULT 0,
+                    stored_bytes INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Sık kullanılan sorgular için indeksler
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_reminders_due
+                ON reminders (is_active, reminder_date)
+            ''')
+
+            # Şema güncellemeleri (mevcut veritabanları için)
+            self.add_column_if_missing(cursor, 'documents', 'last_accessed_at', 'TIMESTAMP')
+            self.add_column_if_missing(cursor, 'documents', 'compressed_at', 'TIMESTAMP')
+            self.add_column_if_missing(cursor, 'documents', 'deleted_at', 'TIMESTAMP')
+            self.add_column_if_missing(cursor, 'workflow_steps', 'activated_at', 'TIMESTAMP')
+            # Blob'un sıkıştırma/şifreleme katmanları (NULL: eski kayıt, başlığa bakılır)
+            self.add_column_if_missing(cursor, 'documents', 'storage_format', 'TEXT')
+            self.add_column_if_missing(cursor, 'document_versions', 'storage_format', 'TEXT')
+            self.migrate_document_texts(cursor)
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_documents_retention
+                ON documents (is_active, retention_date)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_share_links_expiry
+                ON share_links (is_active, expires_at)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_documents_deleted
+                ON documents (is_active, deleted_at)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_workflow_steps_assignee
+                ON workflow_steps (assigned_to, status, activated_at)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_workflow_steps_workflow
+                ON workflow_steps (workflow_id, step_number)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_workflows_document
+                ON workflows (document_id, status)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_event_outbox_org
+                ON event_outbox (organization_id, seq)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_documents_sync
+                ON documents (organization_id, updated_at, id)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_tombstones_sync
+                ON document_tombstones (organization_id, deleted_at, document_id)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_documents_hash
+                ON documents (organization_id, file_hash)
+            ''')
+            # Sorgu denetçisinin sık sorgularda bulduğu tam tablo taramaları
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_tags_org_name
+                ON tags (organization_id, name)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_document_versions_document
+                ON document_versions (document_id, version_number)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_users_org
+                ON users (organization_id, is_active)
+            ''')
+
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             conn.commit()
+        return True
+
+    def migrate_document_texts(self, cursor: sqlite3.Cursor) -> None:
+        """Eski şemadaki documents.ocr_text sütununu document_texts tablosuna taşı"""
+        cursor.execute('PRAGMA table_info(documents)')
+        if 'ocr_text' not in [row[1] for row in cursor.fetchall()]:
+            return
+
+        cursor.execute('''
+            INSERT OR IGNORE INTO document_texts (document_id, ocr_text)
+            SELECT id, ocr_text FROM documents WHERE ocr_text IS NOT NULL
+        ''')
+
+        # DROP COLUMN SQLite 3.35+ gerektirir; eski sürümlerde sütun boşaltılır
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            cursor.execute('ALTER TABLE documents DROP COLUMN ocr_text')
+        else:
+            cursor.execute('UPDATE documents SET ocr_text = NULL')
 
 class DoxagonEnterpriseManager:
     def __init__(self, base_directory="doxagon_storage"):
+        started = time.perf_counter()
         self.base_directory = Path(base_directory)
         self.base_directory.mkdir(exist_ok=True)
 
@@ -275,15 +486,82 @@ class DoxagonEnterpriseManager:
         self.temp_dir.mkdir(exist_ok=True)
 
         # Veritabanı yöneticisi
+        phase_started = time.perf_counter()
         self.db = DatabaseManager()
+        database_seconds = time.perf_counter() - phase_started
 
         # Konfigürasyon
+        phase_started = time.perf_counter()
         self.config = self.load_config()
+        config_seconds = time.perf_counter() - phase_started
+        metrics.enabled = self.config['metrics']['enabled']
+        query_auditor.configure(self.config['query_audit'])
+        configure_logging(self.config['logging'])
 
         # Mevcut kullanıcı (basit auth için)
         self.current_user = None
         self.current_org = None
 
+        # Şifreleme anahtar halkası (ilk kullanımda yüklenir)
+        self._keyring = None
+
+        # Arka plan servisleri (start_* metotları ile başlatılır)
+        self.reminder_scheduler = None
+        self.housekeeper = None
+
+        # Paylaşım linki çözümleyici (token önbelleği)
+        self.share_links = ShareLinkResolver(
+            self.db.db_path,
+            ttl_seconds=self.config['sharing']['cache_ttl_seconds'],
+            negative_ttl_seconds=self.config['sharing']['negative_cache_ttl_seconds'],
+            max_entries=self.config['sharing']['cache_size']
+        )
+
+        # Son erişim zamanı yazımlarını seyreltmek için (belge -> monotonic zaman)
+        self._access_marks = {}
+
+        # Parola hash'leme (KDF işleri sınırlı iş parçacığı havuzunda çalışır)
+        self.password_hasher = PasswordHasher(self.config['security']['password_hashing'])
+
+        # Başarısız giriş sınırı (kullanıcı adı ve IP başına)
+        self.login_guard = LoginGuard(self.config['security'], self.db.db_path)
+
+        # Yetkilendirme önbelleği; değişiklikte yalnızca bu süreçte düşürülür, diğer
+        # worker'lar rol/pasiflik değişikliğini kısa TTL dolunca görür
+        self.principals = PrincipalCache(
+            self.db.db_path,
+            ttl_seconds=self.config['security']['principal_cache_ttl_seconds'],
+            max_entries=self.config['security']['principal_cache_size']
+        )
+        self.session_expires_at = None
+
+        # Organizasyon kullanım defteri (kota kontrolü)
+        self.quota = QuotaService(self.db.db_path)
+
+        # Olay yolu (outbox tablosu üzerinden)
+        self.events = EventBus(self.db.db_path)
+        self.events.subscribe('document.', self._on_document_event)
+
+        # Onay iş akışları
+        self.workflows = WorkflowEngine(self)
+
+        # İstemciler için artımlı belge senkronizasyonu
+        self.sync = DocumentSync(self.db.db_path, self.config['sync'])
+
+        # Açılış süresi (soğuk başlatma ölçümü için; /metrics'te de görünür)
+        self.startup_timings = {
+            'database': database_seconds,
+            'config': config_seconds,
+            'total': time.perf_counter() - started
+        }
+        self.register_metrics()
+        logger.info("Yönetici başlatıldı", extra={
+            'startup_ms': round(self.startup_timings['total'] * 1000, 1),
+            'database_ms': round(database_seconds * 1000, 1),
+            'config_ms': round(config_seconds * 1000, 1),
+            'schema_migrated': self.db.schema_migrated
+        })
+
     def load_config(self):
         """Sistem konfigürasyonunu yükle"""
         config_file = self.base_directory / "enterprise_config.json"
@@ -291,6 +569,8 @@ class DoxagonEnterpriseManager:
             "storage": {
                 "type": "local",  # local, s3, minio
                 "encryption_enabled": True,
+                "encryption_segment_kb": 64,
+                "key_file": "keys/keyring.json",
                 "max_file_size_mb": 100,
                 "allowed_extensions": [
                     ".pdf", ".doc", ".docx", ".xls", ".xlsx", 
@@ -298,6 +578,76 @@ class DoxagonEnterpriseManager:
                     ".png", ".gif", ".bmp", ".tiff"
                 ]
             },
+            "compression": {
+                "enabled": True,
+                "codec": "zstd",  # zstd, zlib (zstandard yoksa zlib kullanılır)
+                "level": 6,
+                "on_write": True,
+                "min_size_bytes": 1024,
+                "cold_after_days": 90,
+                "compress_ocr_text": True,
+                # Zaten sıkıştırılmış formatlar (pdf, docx, jpg...) dahil edilmez
+                "extensions": [
+                    ".txt", ".md", ".csv", ".json", ".xml", ".html",
+                    ".doc", ".xls", ".ppt", ".bmp", ".tiff"
+                ]
+            },
+            "sharing": {
+                "cache_ttl_seconds": 60,
+                "negative_cache_ttl_seconds": 30,
+                "cache_size": 10000,
+                "access_mark_interval_seconds": 3600
+            },
+            "batch_operations": {
+                "max_documents": 10000
+            },
+            "sync": {
+                "settle_seconds": 2,
+                "tombstone_retention_days": 90,
+                "page_size": 200
+            },
+            "housekeeping": {
+                "enabled": True,
+                "interval_minutes": 60,
+                "batch_size": 500,
+                "temp_max_age_hours": 24,
+                "orphan_min_age_hours": 6,
+                "expired_link_retention_days": 30,
+                "reconcile_quotas": True,
+                "event_retention_days": 30
+            },
+            "logging": {
+                "level": "INFO",
+                "format": "json",  # json, text
+                "file": "",  # boş değilse JSON kayıtlar bu dosyaya da yazılır
+                "levels": {}  # ör. {"doxagon.manager": "DEBUG"}
+            },
+            "profiling": {
+                "enabled": False,
+                "mode": "cprofile",  # cprofile, sample
+                "sample_rate": 0.0,  # başlıksız isteklerin profillenme oranı (0-1)
+                "sample_interval_ms": 5,
+                "max_profiles": 200
+            },
+            "metrics": {
+                "enabled": True,
+                "token": ""  # /metrics için Bearer token; boşsa uç nokta kimseye açık değildir
+            },
+            "query_audit": {
+                "enabled": True,
+                "slow_query_ms": 200,  # bu süreyi aşan sorgular planıyla kaydedilir
+                "explain_slow": True,
+                "hot_calls": 20,  # bu kadar çalışan ifadenin planı bir kez denetlenir
+                "strict": False,  # test/ölçüm: sık sorguda tam tablo taraması hata fırlatır
+                "scan_allowlist": [],
+                "max_statements": 500
+            },
+            "backup": {
+                "directory": "backups",
+                "keep_snapshots": 14,
+                "pages_per_step": -1,  # -1: veritabanı tek adımda kopyalanır
+                "exclude": ["temp", "keys"]  # keys: anahtarlık şifreli dosyalarla aynı yedeğe girmez
+            },
             "ocr": {
                 "enabled": OCR_AVAILABLE,
                 "languages": ["tur", "eng"],
@@ -312,14 +662,44 @@ class DoxagonEnterpriseManager:
                 "session_timeout_hours": 8,
                 "max_login_attempts": 5,
                 "password_min_length": 8,
-                "require_2fa": False
+                "require_2fa": False,
+                "login_window_minutes": 15,
+                "lockout_minutes": 15,
+                "ip_max_login_attempts": 50,
+                "principal_cache_size": 10000,
+                "principal_cache_ttl_seconds": 60,
+                "trusted_proxy_hops": 0,  # ters vekil arkasında vekil sayısı (ör. 1); doğrudan yayında 0
+                "persist_lockouts": True,
+                "rate_limits": {
+                    "upload": {"limit": 30, "window_seconds": 60},
+                    "search": {"limit": 120, "window_seconds": 60},
+                    "export": {"limit": 5, "window_seconds": 60}
+                },
+                "password_hashing": {
+                    "algorithm": "scrypt",
+                    "scrypt_n": 16384,
+                    "scrypt_r": 8,
+                    "scrypt_p": 1,
+                    "pbkdf2_iterations": 600000,
+                    "max_workers": 4,
+                    "max_queue": 32,
+                    "timeout_seconds": 10
+                }
             },
             "notifications": {
                 "email_enabled": False,
                 "smtp_server": None,
                 "smtp_port": 587,
                 "smtp_username": None,
-                "smtp_password": None
+                "smtp_password": None,
+                "smtp_use_tls": True,
+                "from_address": None,
+                "smtp_batch_size": 50,
+                "smtp_idle_timeout_seconds": 60,
+                "reminder_scheduler_enabled": True,
+                "reminder_window": 500,
+                "reminder_max_sleep_seconds": 300,
+                "reminder_refill_seconds": 60
             },
             "retention": {
                 "default_years": 7,
@@ -329,17 +709,26 @@ class DoxagonEnterpriseManager:
                     "İnsan Kaynakları": 5,
                     "Sözleşme": 7,
                     "Fatura": 10
-                }
+                },
+                # Pasifleştirilen belgeler bu kadar gün sonra kalıcı silinir
+                "grace_days": 30,
+                "batch_size": 200,
+                "pause_between_batches_ms": 100,
+                "max_bytes_per_second": 50 * 1024 * 1024
             }
         }
 
+        loaded_config = None
         if config_file.exists():
             with open(config_file, 'r', encoding='utf-8') as f:
                 loaded_config = json.load(f)
                 # Varsayılan değerleri güncelle
                 self.deep_update(default_config, loaded_config)
 
-        self.save_config(default_config)
+        # Dosya yalnızca yeni anahtar eklendiyse yeniden yazılır (JSON karşılaştırması
+        # tuple/list farkını yok sayar)
+        if json.loads(json.dumps(default_config)) != loaded_config:
+            self.save_config(default_config)
         return default_config
 
     def deep_update(self, base_dict, update_dict):
@@ -359,11 +748,234 @@ class DoxagonEnterpriseManager:
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
 
+    def load_keyring(self) -> KeyRing:
+        """Şifreleme anahtar halkasını yükle (ilk kullanımda)"""
+        if self._keyring is None:
+            self._keyring = KeyRing(self.base_directory / self.config['storage']['key_file'])
+        return self._keyring
+
+    def should_compress(self, file_path: Path, file_size: int) -> bool:
+        """Dosyanın sıkıştırma katmanına girip girmeyeceğini belirle"""
+        settings = self.config['compression']
+        return (settings['enabled']
+                and file_path.suffix.lower() in settings['extensions']
+                and file_size >= settings['min_size_bytes'])
+
+    def write_blob(self, source, original_size: int, dest_path: Path,
+                   compress: bool) -> Tuple[int, str]:
+        """Akışı depo formatında yaz (sıkıştırma → şifreleme); (yazılan boyut, format) döndür"""
+        settings = self.config['compression']
+        codec = resolve_codec(settings['codec']) if compress else None
+        if compress:
+            source = CompressingReader(source, original_size, codec, settings['level'])
+
+        encrypt = self.config['storage']['encryption_enabled'] and CRYPTO_AVAILABLE
+        with open(dest_path, 'wb') as dest:
+            if encrypt:
+                segment_size = self.config['storage']['encryption_segment_kb'] * 1024
+                encrypt_stream(source, dest, self.load_keyring(), segment_size)
+            else:
+                shutil.copyfileobj(source, dest, 1024 * 1024)
+
+        if compress:
+            with self.db.connect() as conn:
+                record_savings(conn.cursor(), 'blob', original_size, source.bytes_out)
+                conn.commit()
+
+        return dest_path.stat().st_size, storage_format(codec, encrypt)
+
+    @metrics.timed('doxagon_stage_seconds', stage='copy')
+    def store_blob(self, source_path: Path, dest_path: Path) -> str:
+        """Dosyayı depoya yaz (yapılandırmaya göre sıkıştırıp şifreleyerek), formatı döndür
+
+        Format belge/versiyon kaydına yazılır; okurken blob başlığına güvenilmez
+        (içeriği tesadüfen magic baytlarla başlayan düz dosya yanlış açılmasın).
+        """
+        file_size = source_path.stat().st_size
+        compress = (self.config['compression']['on_write']
+                    and self.should_compress(source_path, file_size))
+        encrypt = self.config['storage']['encryption_enabled'] and CRYPTO_AVAILABLE
+
+        if not (compress or encrypt):
+            shutil.copy2(source_path, dest_path)
+            return FORMAT_PLAIN
+
+        with open(source_path, 'rb') as source:
+            return self.write_blob(source, file_size, dest_path, compress)[1]
+
+    def register_metrics(self) -> None:
+        """Kuyruk derinliği ve önbellek göstergelerini metrik kaydına bağla"""
+        metrics.histogram('doxagon_stage_seconds', 'Belge işleme aşaması süresi (saniye)')
+        metrics.histogram('doxagon_sql_seconds', 'SQL ifadesi süresi (saniye)')
+        metrics.gauge('doxagon_cache_hit_ratio', 'Önbellek isabet oranı',
+                      lambda: {'principals': self.principals.stats()['hit_rate'],
+                               'share_links': self.share_links.stats()['hit_rate']}, label='cache')
+        metrics.gauge('doxagon_cache_entries', 'Önbellekteki kayıt sayısı',
+                      lambda: {'principals': self.principals.stats()['entries'],
+                               'share_links': self.share_links.stats()['entries']}, label='cache')
+        metrics.gauge('doxagon_queue_depth', 'Bekleyen iş sayısı',
+                      lambda: {'password_hasher': self.password_hasher.queue_depth,
+                               'reminders': (self.reminder_scheduler.queue_depth
+                                             if self.reminder_scheduler else 0),
+                               'event_outbox': self.events.backlog()}, label='queue')
+        metrics.gauge('doxagon_startup_seconds', 'Açılış süresi (saniye)',
+                      lambda: self.startup_timings, label='phase')
+
+    def open_raw_blob(self, file_path, blob_format: str = None):
+        """Depodaki dosyayı şifresi çözülmüş ama sıkıştırması açılmamış olarak aç
+
+        blob_format kayıttaki storage_format'tır; yoksa (eski kayıt) başlığa bakılır.
+        """
+        _, encrypted = storage_layers(blob_format)
+        if encrypted is None:
+            encrypted = CRYPTO_AVAILABLE and is_encrypted(file_path)
+        keyring = self.load_keyring() if encrypted else None
+        return open_blob(file_path, keyring, encrypted)
+
+    def open_blob(self, file_path, blob_format: str = None):
+        """Depodaki dosyayı okumak için aç (şifre ve sıkıştırma akış halinde açılır)"""
+        compressed, _ = storage_layers(blob_format)
+        return wrap_decompress(self.open_raw_blob(file_path, blob_format), compressed)
+
+    def is_blob_compressed(self, file_path, blob_format: str = None) -> bool:
+        """Depodaki dosya sıkıştırılmış mı (şifreli olsa bile)"""
+        compressed, _ = storage_layers(blob_format)
+        if compressed is not None:
+            return compressed
+        with self.open_raw_blob(file_path) as raw:
+            return raw.read(len(COMPRESSION_MAGIC)) == COMPRESSION_MAGIC
+
+    def pack_text(self, text: str):
+        """OCR metnini yapılandırmaya göre sıkıştırılmış BLOB'a çevir"""
+        settings = self.config['compression']
+        if not (settings['enabled'] and settings['compress_ocr_text'] and text):
+            return text
+        if len(text.encode('utf-8')) < settings['min_size_bytes']:
+            return text
+        return compress_text(text, resolve_codec(settings['codec']), settings['level'])
+
+    def mark_accessed(self, document_id: str) -> None:
+        """Belgenin son erişim zamanını güncelle (soğuk katman için)"""
+        # Sık indirilen belgeler için her istekte yazma yapılmaz
+        now = time.monotonic()
+        interval = self.config['sharing']['access_mark_interval_seconds']
+        if now - self._access_marks.get(document_id, -interval) < interval:
+            return
+        if len(self._access_marks) > 100000:
+            self._access_marks.clear()
+        self._access_marks[document_id] = now
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE documents SET last_accessed_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (document_id,))
+            conn.commit()
+
+    def compress_document(self, document_id: str, dry_run: bool = False) -> Dict[str, int]:
+        """Belgenin tüm versiyonlarını ve OCR metnini sıkıştır"""
+        result = {'blobs': 0, 'texts': 0, 'saved_bytes': 0}
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT file_path, storage_format FROM document_versions WHERE document_id = ?
+            ''', (document_id,))
+            versions = [(Path(row[0]), row[1]) for row in cursor.fetchall()]
+
+            cursor.execute('SELECT ocr_text FROM document_texts WHERE document_id = ?',
+                           (document_id,))
+            row = cursor.fetchone()
+            ocr_text = row[0] if row else None
+
+        for path, blob_format in versions:
+            if not path.exists() or self.is_blob_compressed(path, blob_format):
+                continue
+
+            with self.open_blob(path, blob_format) as reader:
+                original_size = blob_size(reader)
+                if not self.should_compress(path, original_size):
+                    continue
+
+                result['blobs'] += 1
+                if dry_run:
+                    continue
+
+                stored_before = path.stat().st_size
+                # Sıkıştırılmış kopya yeni yola yazılır; yol ve format tek işlemde
+                # değişir, böylece okuyucular hiçbir zaman format/bayt uyuşmazlığı görmez
+                new_path = path.with_name(f"{path.stem}.dxz{path.suffix}")
+                temp_path = new_path.with_name(new_path.name + '.tmp')
+                stored_after, new_format = self.write_blob(reader, original_size, temp_path,
+                                                           compress=True)
+
+            os.replace(temp_path, new_path)
+            try:
+                with self.db.connect() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        UPDATE document_versions SET file_path = ?, storage_format = ?
+                        WHERE file_path = ?
+                    ''', (str(new_path), new_format, str(path)))
+                    cursor.execute('''
+                        UPDATE documents SET file_path = ?, storage_format = ? WHERE file_path = ?
+                    ''', (str(new_path), new_format, str(path)))
+                    conn.commit()
+            except Exception:
+                new_path.unlink(missing_ok=True)
+                raise
+            self.share_links.invalidate(document_id=document_id)
+            path.unlink(missing_ok=True)
+            result['saved_bytes'] += stored_before - stored_after
+
+        packed_text = None
+        if isinstance(ocr_text, str):
+            packed_text = self.pack_text(ocr_text)
+            if isinstance(packed_text, bytes):
+                result['texts'] += 1
+                result['saved_bytes'] += len(ocr_text.encode('utf-8')) - len(packed_text)
+
+        if dry_run:
+            return result
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            if isinstance(packed_text, bytes):
+                cursor.execute('UPDATE document_texts SET ocr_text = ? WHERE document_id = ?',
+                               (packed_text, document_id))
+                record_savings(cursor, 'ocr_text', len(ocr_text.encode('utf-8')), len(packed_text))
+            cursor.execute('''
+                UPDATE documents SET compressed_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (document_id,))
+            conn.commit()
+
+        return result
+
+    def get_compression_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Sıkıştırma katmanının kazandırdığı alan"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT target, items, original_bytes, stored_bytes FROM compression_stats
+            ''')
+            rows = cursor.fetchall()
+
+        return {
+            target: {
+                'items': items,
+                'original_bytes': original_bytes,
+                'stored_bytes': stored_bytes,
+                'saved_bytes': original_bytes - stored_bytes,
+                'ratio': (stored_bytes / original_bytes) if original_bytes else 1.0
+            }
+            for target, items, original_bytes, stored_bytes in rows
+        }
+
     def create_organization(self, name: str, plan: str = "free") -> str:
         """Yeni organizasyon oluştur"""
         org_id = str(uuid.uuid4())
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO organizations (id, name, plan)
@@ -377,10 +989,12 @@ class DoxagonEnterpriseManager:
                    role: str = "viewer", organization_id: str = None) -> str:
         """Yeni kullanıcı oluştur"""
         user_id = str(uuid.uuid4())
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        password_hash = self.password_hasher.hash_offloaded(password)
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
+            # Kullanıcı kotası aşılırsa işlem geri alınır
+            charge(cursor, organization_id, users=1)
             cursor.execute('''
                 INSERT INTO users (id, username, email, password_hash, role, organization_id)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -389,33 +1003,132 @@ class DoxagonEnterpriseManager:
 
         return user_id
 
-    def authenticate_user(self, username: str, password: str) -> bool:
+    def authenticate_user(self, username: str, password: str, client_ip: str = None) -> bool:
         """Kullanıcı doğrulama"""
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        # Kilitli kullanıcı/IP için veritabanı ve hash işi yapılmaz
+        self.login_guard.check(username, client_ip)
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT u.*, o.name as org_name 
-                FROM users u 
+                SELECT u.id, u.username, u.email, u.password_hash, u.role,
+                       u.organization_id, o.name as org_name
+                FROM users u
                 LEFT JOIN organizations o ON u.organization_id = o.id
-                WHERE u.username = ? AND u.password_hash = ? AND u.is_active = 1
-            ''', (username, password_hash))
+                WHERE u.username = ? AND u.is_active = 1
+            ''', (username,))
+            user = cursor.fetchone()
+
+        # KDF doğrulaması bağlantı dışında ve havuzda yapılır; olmayan kullanıcıda da
+        # sabit bir hash doğrulanır (yanıt süresinden kullanıcı adı anlaşılmasın)
+        stored_hash = user[3] if user else self.password_hasher.dummy_hash
+        if not self.password_hasher.verify_offloaded(password, stored_hash) or not user:
+            self.login_guard.record_failure(username, client_ip)
+            return False
+
+        self.login_guard.record_success(username, client_ip)
+
+        # Eski (tuzsuz SHA-256) veya düşük maliyetli hash'ler girişte yenilenir
+        if self.password_hasher.needs_rehash(user[3]):
+            new_hash = self.password_hasher.hash_offloaded(password)
+            with self.db.connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?
+                ''', (new_hash, user[0], user[3]))
+                conn.commit()
+
+        # Girişte önbellekteki kayıt tazelenir
+        self.principals.invalidate(user_id=user[0])
+        principal = self.principals.get(user[0])
+        if principal is None:
+            return False
+
+        self.current_user = principal
+        self.session_expires_at = (time.monotonic()
+                                   + self.config['security']['session_timeout_hours'] * 3600)
+        return True
+
+    def current_principal(self) -> Optional[Dict]:
+        """Oturumdaki kullanıcının güncel yetki bilgisi (süresi dolduysa veya pasifse None)"""
+        if not self.current_user:
+            return None
+
+        if self.session_expires_at is not None and time.monotonic() > self.session_expires_at:
+            self.logout()
+            return None
+
+        # Önbellekten gelir; rol/kullanıcı değişikliklerinde önbellek düşürülür
+        principal = self.principals.get(self.current_user['id'])
+        if principal is None:
+            self.logout()
+            return None
 
+        self.current_user = principal
+        return principal
+
+    def logout(self) -> None:
+        """Oturumu kapat"""
+        self.current_user = None
+        self.session_expires_at = None
+
+    def update_user_role(self, user_id: str, role: str) -> bool:
+        """Kullanıcının rolünü değiştir"""
+        if role not in ('viewer', 'editor', 'admin'):
+            raise ValueError(f"Geçersiz rol: {role}")
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE users SET role = ? WHERE id = ?', (role, user_id))
+            conn.commit()
+            updated = cursor.rowcount == 1
+
+        if updated:
+            self.principals.invalidate(user_id=user_id)
+            self.log_action("UPDATE_ROLE", "user", user_id, f"Yeni rol: {role}")
+        return updated
+
+    def deactivate_user(self, user_id: str) -> bool:
+        """Kullanıcıyı pasifleştir (oturumu bir sonraki istekte düşer)"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT organization_id FROM users WHERE id = ?', (user_id,))
             user = cursor.fetchone()
-            if user:
-                self.current_user = {
-                    'id': user[0],
-                    'username': user[1],
-                    'email': user[2],
-                    'role': user[4],
-                    'organization_id': user[5],
-                    'organization_name': user[10] if user[10] else 'Bireysel'
-                }
-                return True
+            cursor.execute('UPDATE users SET is_active = 0 WHERE id = ? AND is_active = 1',
+                           (user_id,))
+            updated = cursor.rowcount == 1
+            if updated:
+                release(cursor, user[0], users=1)
+            conn.commit()
 
-        return False
+        if updated:
+            self.principals.invalidate(user_id=user_id)
+            self.log_action("DEACTIVATE", "user", user_id)
+        return updated
+
+    def update_organization_plan(self, organization_id: str, plan: str,
+                                 storage_quota_gb: int = None, user_quota: int = None,
+                                 document_quota: int = None) -> bool:
+        """Organizasyonun planını ve kotalarını güncelle"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE organizations
+                SET plan = ?,
+                    storage_quota_gb = COALESCE(?, storage_quota_gb),
+                    user_quota = COALESCE(?, user_quota),
+                    document_quota = COALESCE(?, document_quota)
+                WHERE id = ?
+            ''', (plan, storage_quota_gb, user_quota, document_quota, organization_id))
+            conn.commit()
+            updated = cursor.rowcount == 1
+
+        if updated:
+            self.principals.invalidate(organization_id=organization_id)
+            self.log_action("UPDATE_PLAN", "organization", organization_id, f"Plan: {plan}")
+        return updated
 
+    @metrics.timed('doxagon_stage_seconds', stage='hash')
     def calculate_file_hash(self, file_path: Path) -> str:
         """Dosyanın SHA-256 hash değerini hesapla"""
         sha256_hash = hashlib.sha256()
@@ -424,6 +1137,7 @@ class DoxagonEnterpriseManager:
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
 
+    @metrics.timed('doxagon_stage_seconds', stage='thumbnail')
     def create_thumbnail(self, file_path: Path, document_id: str) -> Optional[str]:
         """Belge thumbnail'i oluştur"""
         try:
@@ -432,6 +1146,7 @@ class DoxagonEnterpriseManager:
 
             if file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff']:
                 # Resim dosyaları için thumbnail
+                from PIL import Image
                 with Image.open(file_path) as img:
                     img.thumbnail((200, 200), Image.Resampling.LANCZOS)
                     img.convert('RGB').save(thumbnail_path, 'JPEG', quality=85)
@@ -443,11 +1158,13 @@ class DoxagonEnterpriseManager:
                 # Şimdilik basit bir placeholder
                 return None
 
-        except Exception as e:
-            print(f"Thumbnail oluşturma hatası: {e}")
+        except Exception:
+            logger.warning("Thumbnail oluşturma hatası", exc_info=True,
+                           extra={'document_id': document_id, 'path': str(file_path)})
 
         return None
 
+    @metrics.timed('doxagon_stage_seconds', stage='extract')
     def extract_text_content(self, file_path: Path) -> str:
         """Dosyadan metin içeriği çıkar"""
         try:
@@ -460,6 +1177,7 @@ class DoxagonEnterpriseManager:
 
             # PDF dosyaları
             elif file_ext == '.pdf' and PDF_AVAILABLE:
+                import PyPDF2
                 with open(file_path, 'rb') as f:
                     reader = PyPDF2.PdfReader(f)
                     text = ""
@@ -469,6 +1187,7 @@ class DoxagonEnterpriseManager:
 
             # Word dosyaları
             elif file_ext in ['.docx'] and DOCX_AVAILABLE:
+                import docx
                 doc = docx.Document(file_path)
                 text = ""
                 for paragraph in doc.paragraphs:
@@ -478,16 +1197,20 @@ class DoxagonEnterpriseManager:
             # Resim dosyaları (OCR)
             elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff'] and OCR_AVAILABLE:
                 if self.config['ocr']['enabled']:
+                    from PIL import Image
+                    import pytesseract
                     image = Image.open(file_path)
                     languages = '+'.join(self.config['ocr']['languages'])
-                    text = pytesseract.image_to_string(image, lang=languages)
+                    with metrics.timer('doxagon_stage_seconds', stage='ocr'):
+                        text = pytesseract.image_to_string(image, lang=languages)
                     return text
 
-        except Exception as e:
-            print(f"Metin çıkarma hatası: {e}")
+        except Exception:
+            logger.warning("Metin çıkarma hatası", exc_info=True, extra={'path': str(file_path)})
 
         return ""
 
+    @metrics.timed('doxagon_stage_seconds', stage='classify')
     def classify_document_ai(self, content: str, filename: str) -> str:
         """AI ile belge sınıflandırma"""
         if not self.config['ai']['classification_enabled']:
@@ -542,32 +1265,37 @@ class DoxagonEnterpriseManager:
                        metadata: Dict[str, Any] = None, 
                        confidentiality: str = "Normal") -> Optional[str]:
         """Belge yükleme (versiyonlama ile)"""
+        started = time.perf_counter()
 
         if not self.current_user:
-            print("❌ Oturum açmanız gerekiyor!")
+            logger.warning("Oturum açmanız gerekiyor")
             return None
 
         source_path = Path(file_path)
         if not source_path.exists():
-            print(f"❌ Dosya bulunamadı: {file_path}")
+            logger.warning("Dosya bulunamadı", extra={'path': file_path})
             return None
 
         # Dosya boyutu kontrolü
         file_size = source_path.stat().st_size
         max_size = self.config['storage']['max_file_size_mb'] * 1024 * 1024
         if file_size > max_size:
-            print(f"❌ Dosya çok büyük! Maksimum: {self.config['storage']['max_file_size_mb']}MB")
+            logger.warning("Dosya çok büyük", extra={
+                'path': file_path, 'size': file_size,
+                'max_mb': self.config['storage']['max_file_size_mb']
+            })
             return None
 
         # Dosya türü kontrolü
         if source_path.suffix.lower() not in self.config['storage']['allowed_extensions']:
-            print(f"❌ Desteklenmeyen dosya türü: {source_path.suffix}")
+            logger.warning("Desteklenmeyen dosya türü", extra={'path': file_path,
+                                                               'extension': source_path.suffix})
             return None
 
         # Hash hesapla ve duplikasyon kontrolü
         file_hash = self.calculate_file_hash(source_path)
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, original_name FROM documents 
@@ -576,9 +1304,18 @@ class DoxagonEnterpriseManager:
 
             existing = cursor.fetchone()
             if existing:
-                print(f"⚠️  Bu dosya zaten mevcut: {existing[1]}")
+                logger.info("Bu dosya zaten mevcut", extra={'document_id': existing[0],
+                                                             'document_name': existing[1]})
                 return existing[0]
 
+        # Kota kontrolü (dosya yazılmadan önce, kullanım defterinden)
+        try:
+            self.quota.check(self.current_user['organization_id'],
+                             storage_bytes=file_size, documents=1)
+        except QuotaExceededError as e:
+            logger.warning("Kota aşıldı: %s", e)
+            return None
+
         # Belge ID oluştur
         document_id = str(uuid.uuid4())
 
@@ -586,20 +1323,21 @@ class DoxagonEnterpriseManager:
         doc_dir = self.uploads_dir / document_id / "v1"
         doc_dir.mkdir(parents=True, exist_ok=True)
 
-        # Dosyayı kopyala
+        # Dosyayı depoya yaz
         dest_path = doc_dir / source_path.name
-        shutil.copy2(source_path, dest_path)
+        blob_format = self.store_blob(source_path, dest_path)
 
-        # İçerik çıkar
-        text_content = self.extract_text_content(dest_path)
+        # İçerik çıkar (depodaki kopya şifreli olabilir, kaynaktan okunur)
+        text_content = self.extract_text_content(source_path)
 
         # Otomatik sınıflandırma
         if not category:
             category = self.classify_document_ai(text_content, source_path.name)
-            print(f"🤖 Otomatik sınıflandırma: {category}")
+            logger.info("Otomatik sınıflandırma", extra={'category': category,
+                                                       'document_name': source_path.name})
 
         # Thumbnail oluştur
-        thumbnail_path = self.create_thumbnail(dest_path, document_id)
+        thumbnail_path = self.create_thumbnail(source_path, document_id)
 
         # Saklama tarihi hesapla
         retention_years = self.config['retention']['policies'].get(
@@ -608,34 +1346,52 @@ class DoxagonEnterpriseManager:
         retention_date = datetime.now() + timedelta(days=retention_years * 365)
 
         # Veritabanına kaydet
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
 
+            # Kullanım aynı işlemde düşülür; eşzamanlı yüklemeler kotayı aşarsa geri alınır
+            try:
+                charge(cursor, self.current_user['organization_id'],
+                       storage_bytes=file_size, documents=1)
+            except QuotaExceededError as e:
+                conn.rollback()
+                shutil.rmtree(self.uploads_dir / document_id, ignore_errors=True)
+                if thumbnail_path:
+                    Path(thumbnail_path).unlink(missing_ok=True)
+                logger.warning("Kota aşıldı: %s", e)
+                return None
+
             # Ana belge kaydı
             cursor.execute('''
                 INSERT INTO documents (
                     id, original_name, current_name, file_path, file_hash, 
                     file_size, mime_type, category, document_type, 
                     organization_id, uploaded_by, description, confidentiality,
-                    retention_date, thumbnail_path, ocr_text, ai_classification
+                    retention_date, thumbnail_path, ai_classification, storage_format
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 document_id, source_path.name, source_path.name, str(dest_path),
                 file_hash, file_size, self.get_mime_type(source_path), category,
                 category, self.current_user['organization_id'], self.current_user['id'],
                 description, confidentiality, retention_date.isoformat(),
-                thumbnail_path, text_content, category
+                thumbnail_path, category, blob_format
             ))
 
+            # Çıkarılan metin ayrı tabloda
+            if text_content:
+                cursor.execute('''
+                    INSERT INTO document_texts (document_id, ocr_text) VALUES (?, ?)
+                ''', (document_id, self.pack_text(text_content)))
+
             # Versiyon kaydı
             cursor.execute('''
                 INSERT INTO document_versions (
                     id, document_id, version_number, file_path, file_hash,
-                    file_size, created_by, is_current, change_notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    file_size, created_by, is_current, change_notes, storage_format
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 str(uuid.uuid4()), document_id, 1, str(dest_path),
-                file_hash, file_size, self.current_user['id'], True, "İlk versiyon"
+                file_hash, file_size, self.current_user['id'], True, "İlk versiyon", blob_format
             ))
 
             # Metadata kaydet
@@ -671,16 +1427,22 @@ class DoxagonEnterpriseManager:
                         VALUES (?, ?)
                     ''', (document_id, tag_id))
 
+            record(cursor, 'document.created', self.current_user['organization_id'],
+                   'document', document_id,
+                   {'name': source_path.name, 'category': category, 'size': file_size})
             conn.commit()
 
         # Audit log
         self.log_action("CREATE", "document", document_id, f"Belge yüklendi: {source_path.name}")
 
-        print(f"✅ Belge başarıyla yüklendi!")
-        print(f"📄 Belge ID: {document_id}")
-        print(f"📂 Kategori: {category}")
-        print(f"💾 Boyut: {self.format_size(file_size)}")
-        print(f"📅 Saklama Süresi: {retention_date.strftime('%Y-%m-%d')} tarihine kadar")
+        logger.info("Belge yüklendi", extra={
+            'document_id': document_id,
+            'document_name': source_path.name,
+            'category': category,
+            'size': file_size,
+            'retention_until': retention_date.strftime('%Y-%m-%d'),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+        })
 
         return document_id
 
@@ -710,15 +1472,15 @@ class DoxagonEnterpriseManager:
         """Belgenin yeni versiyonunu oluştur"""
 
         if not self.current_user:
-            print("❌ Oturum açmanız gerekiyor!")
+            logger.warning("Oturum açmanız gerekiyor")
             return False
 
         source_path = Path(new_file_path)
         if not source_path.exists():
-            print(f"❌ Dosya bulunamadı: {new_file_path}")
+            logger.warning("Dosya bulunamadı", extra={'path': new_file_path})
             return False
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
 
             # Belge var mı kontrol et
@@ -729,7 +1491,7 @@ class DoxagonEnterpriseManager:
 
             doc = cursor.fetchone()
             if not doc:
-                print("❌ Belge bulunamadı!")
+                logger.warning("Belge bulunamadı", extra={'document_id': document_id})
                 return False
 
             # Mevcut en yüksek versiyon numarasını bul
@@ -744,13 +1506,30 @@ class DoxagonEnterpriseManager:
             doc_dir = self.uploads_dir / document_id / f"v{new_version}"
             doc_dir.mkdir(parents=True, exist_ok=True)
 
-            # Dosyayı kopyala
+            # Hash hesapla (depodaki kopya şifreli olabilir, kaynaktan okunur)
+            file_hash = self.calculate_file_hash(source_path)
+            file_size = source_path.stat().st_size
+
+            # Kota kontrolü (dosya yazılmadan önce)
+            try:
+                self.quota.check(self.current_user['organization_id'], storage_bytes=file_size)
+            except QuotaExceededError as e:
+                shutil.rmtree(doc_dir, ignore_errors=True)
+                logger.warning("Kota aşıldı: %s", e)
+                return False
+
+            # Dosyayı depoya yaz
             dest_path = doc_dir / source_path.name
-            shutil.copy2(source_path, dest_path)
+            blob_format = self.store_blob(source_path, dest_path)
 
-            # Hash hesapla
-            file_hash = self.calculate_file_hash(dest_path)
-            file_size = dest_path.stat().st_size
+            # Kullanım versiyon kaydıyla aynı işlemde düşülür
+            try:
+                charge(cursor, self.current_user['organization_id'], storage_bytes=file_size)
+            except QuotaExceededError as e:
+                conn.rollback()
+                shutil.rmtree(doc_dir, ignore_errors=True)
+                logger.warning("Kota aşıldı: %s", e)
+                return False
 
             # Mevcut versiyonu deaktif et
             cursor.execute('''
@@ -761,42 +1540,245 @@ class DoxagonEnterpriseManager:
             cursor.execute('''
                 INSERT INTO document_versions (
                     id, document_id, version_number, file_path, file_hash,
-                    file_size, created_by, is_current, change_notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    file_size, created_by, is_current, change_notes, storage_format
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 str(uuid.uuid4()), document_id, new_version, str(dest_path),
-                file_hash, file_size, self.current_user['id'], True, change_notes
+                file_hash, file_size, self.current_user['id'], True, change_notes, blob_format
             ))
 
             # Ana belge güncelle
             cursor.execute('''
                 UPDATE documents SET 
-                    current_name = ?, file_path = ?, file_hash = ?, 
-                    file_size = ?, updated_at = CURRENT_TIMESTAMP
+                    current_name = ?, file_path = ?, file_hash = ?, storage_format = ?,
+                    file_size = ?, updated_at = CURRENT_TIMESTAMP, compressed_at = NULL
                 WHERE id = ?
-            ''', (source_path.name, str(dest_path), file_hash, file_size, document_id))
+            ''', (source_path.name, str(dest_path), file_hash, blob_format, file_size, document_id))
 
+            record(cursor, 'document.version_created', self.current_user['organization_id'],
+                   'document', document_id, {'version': new_version, 'size': file_size})
             conn.commit()
 
         self.log_action("UPDATE", "document", document_id, f"Yeni versiyon oluşturuldu: v{new_version}")
 
-        print(f"✅ Belgenin v{new_version} versiyonu oluşturuldu!")
+        logger.info("Yeni versiyon oluşturuldu", extra={'document_id': document_id,
+                                                      'version': new_version})
         return True
 
-    def search_documents(self, query: str, filters: Dict[str, Any] = None, 
-                        page: int = 1, per_page: int = 20) -> Dict[str, Any]:
-        """Gelişmiş belge arama"""
-
+    def delete_document(self, document_id: str) -> bool:
+        """Belgeyi sil (pasifleştirir; dosyalar saklama servisi tarafından temizlenir)"""
         if not self.current_user:
-            return {"documents": [], "total": 0}
+            logger.warning("Oturum açmanız gerekiyor")
+            return False
 
+        organization_id = self.current_user['organization_id']
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE documents
+                SET is_active = 0, deleted_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND organization_id = ? AND is_active = 1
+            ''', (document_id, organization_id))
+            if cursor.rowcount != 1:
+                logger.warning("Belge bulunamadı", extra={'document_id': document_id})
+                return False
+
+            # Depolama alanı kalıcı silmede, belge sayısı burada düşülür
+            release(cursor, organization_id, documents=1)
+            record(cursor, 'document.deleted', organization_id, 'document', document_id)
+            add_tombstones(cursor, [(document_id, organization_id)])
+            conn.commit()
+
+        self.log_action("DELETE", "document", document_id, "Belge silindi")
+        return True
+
+    @staticmethod
+    def _chunks(items: List[str], size: int = BATCH_CHUNK_SIZE):
+        """Listeyi SQL değişken sınırına uygun parçalara böl"""
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    def _resolve_batch(self, cursor: sqlite3.Cursor, document_ids: List[str]) -> List[str]:
+        """Kullanıcının organizasyonuna ait aktif belgeleri süz (sıra korunur)"""
+        unique_ids = list(dict.fromkeys(document_ids))
+        max_documents = self.config['batch_operations']['max_documents']
+        if len(unique_ids) > max_documents:
+            raise ValueError(f"Tek seferde en fazla {max_documents} belge işlenebilir")
+
+        found = set()
+        for chunk in self._chunks(unique_ids):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f'''
+                SELECT id FROM documents
+                WHERE id IN ({placeholders}) AND organization_id = ? AND is_active = 1
+            ''', [*chunk, self.current_user['organization_id']])
+            found.update(row[0] for row in cursor.fetchall())
+
+        return [document_id for document_id in unique_ids if document_id in found]
+
+    def batch_tag_documents(self, document_ids: List[str], add_tags: List[str] = None,
+                            remove_tags: List[str] = None) -> Dict[str, Any]:
+        """Belgelere toplu etiket ekle/çıkar (tek işlem, tek audit kaydı)"""
+        organization_id = self.current_user['organization_id']
+        add_tags = [tag.strip() for tag in add_tags or [] if tag.strip()]
+        remove_tags = [tag.strip() for tag in remove_tags or [] if tag.strip()]
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            ids = self._resolve_batch(cursor, document_ids)
+            if not ids:
+                # Eşleşen belge yoksa etiket de oluşturulmaz
+                return {'updated': 0, 'missing': sorted(set(document_ids))}
+
+            # Etiketler belge başına değil, parti başına bir kez çözülür
+            tag_ids = []
+            for tag_name in add_tags:
+                cursor.execute('SELECT id FROM tags WHERE name = ? AND organization_id = ?',
+                               (tag_name, organization_id))
+                tag_row = cursor.fetchone()
+                if tag_row:
+                    tag_ids.append(tag_row[0])
+                else:
+                    tag_id = str(uuid.uuid4())
+                    cursor.execute('INSERT INTO tags (id, name, organization_id) VALUES (?, ?, ?)',
+                                   (tag_id, tag_name, organization_id))
+                    tag_ids.append(tag_id)
+
+            if tag_ids:
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO document_tags (document_id, tag_id) VALUES (?, ?)
+                ''', [(document_id, tag_id) for document_id in ids for tag_id in tag_ids])
+
+            if remove_tags:
+                tag_placeholders = ','.join('?' for _ in remove_tags)
+                for chunk in self._chunks(ids):
+                    placeholders = ','.join('?' for _ in chunk)
+                    cursor.execute(f'''
+                        DELETE FROM document_tags
+                        WHERE document_id IN ({placeholders}) AND tag_id IN (
+                            SELECT id FROM tags
+                            WHERE organization_id = ? AND name IN ({tag_placeholders})
+                        )
+                    ''', [*chunk, organization_id, *remove_tags])
+
+            self._touch_batch(cursor, ids, 'document.updated')
+            conn.commit()
+
+        self.log_action("BATCH_TAG", "document", "batch",
+                        f"{len(ids)} belge | eklenen: {', '.join(add_tags) or '-'} | "
+                        f"çıkarılan: {', '.join(remove_tags) or '-'}")
+        return {'updated': len(ids), 'missing': sorted(set(document_ids) - set(ids))}
+
+    def batch_update_documents(self, document_ids: List[str], category: str = None,
+                               confidentiality: str = None) -> Dict[str, Any]:
+        """Belgelerin kategori/gizlilik düzeyini toplu değiştir"""
+        if category is None and confidentiality is None:
+            raise ValueError("Değiştirilecek alan belirtilmedi")
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            ids = self._resolve_batch(cursor, document_ids)
+
+            for chunk in self._chunks(ids):
+                placeholders = ','.join('?' for _ in chunk)
+                cursor.execute(f'''
+                    UPDATE documents SET
+                        category = COALESCE(?, category),
+                        document_type = COALESCE(?, document_type),
+                        confidentiality = COALESCE(?, confidentiality),
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id IN ({placeholders})
+                ''', [category, category, confidentiality, *chunk])
+
+            record_many(cursor, 'document.updated',
+                        ((self.current_user['organization_id'], 'document', document_id)
+                         for document_id in ids))
+            conn.commit()
+
+        changes = ', '.join(f"{name}: {value}" for name, value in
+                            (('kategori', category), ('gizlilik', confidentiality)) if value)
+        self.log_action("BATCH_UPDATE", "document", "batch", f"{len(ids)} belge | {changes}")
+        return {'updated': len(ids), 'missing': sorted(set(document_ids) - set(ids))}
+
+    def batch_delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Belgeleri toplu sil (pasifleştirir)"""
+        organization_id = self.current_user['organization_id']
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            ids = self._resolve_batch(cursor, document_ids)
+
+            for chunk in self._chunks(ids):
+                placeholders = ','.join('?' for _ in chunk)
+                cursor.execute(f'''
+                    UPDATE documents
+                    SET is_active = 0, deleted_at = CURRENT_TIMESTAMP,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id IN ({placeholders})
+                ''', chunk)
+
+            release(cursor, organization_id, documents=len(ids))
+            record_many(cursor, 'document.deleted',
+                        ((organization_id, 'document', document_id) for document_id in ids))
+            add_tombstones(cursor, ((document_id, organization_id) for document_id in ids))
+            conn.commit()
+
+        self.log_action("BATCH_DELETE", "document", "batch", f"{len(ids)} belge silindi")
+        return {'deleted': len(ids), 'missing': sorted(set(document_ids) - set(ids))}
+
+    def batch_create_share_links(self, document_ids: List[str], expires_hours: int = 24,
+                                 password: str = None,
+                                 max_downloads: int = None) -> Dict[str, Any]:
+        """Belgeler için toplu paylaşım linki oluştur"""
+        organization_id = self.current_user['organization_id']
+        expires_at = datetime.now() + timedelta(hours=expires_hours)
+        # Aynı parola için KDF bir kez çalışır
+        password_hash = self.password_hasher.hash_offloaded(password) if password else None
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            ids = self._resolve_batch(cursor, document_ids)
+            tokens = {document_id: secrets.token_urlsafe(32) for document_id in ids}
+
+            cursor.executemany('''
+                INSERT INTO share_links (
+                    id, document_id, token, created_by, expires_at,
+                    password_hash, max_downloads
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(str(uuid.uuid4()), document_id, token, self.current_user['id'],
+                   expires_at.isoformat(), password_hash, max_downloads)
+                  for document_id, token in tokens.items()])
+            record_many(cursor, 'share.created',
+                        ((organization_id, 'document', document_id) for document_id in ids))
+            conn.commit()
+
+        self.log_action("BATCH_SHARE", "share_link", "batch",
+                        f"{len(ids)} belge için paylaşım linki oluşturuldu")
+        return {
+            'links': {document_id: f"http://localhost:5000/share/{token}"
+                      for document_id, token in tokens.items()},
+            'expires_at': expires_at.isoformat(),
+            'missing': sorted(set(document_ids) - set(ids))
+        }
+
+    def _touch_batch(self, cursor: sqlite3.Cursor, ids: List[str], event_type: str) -> None:
+        """Değişen belgelerin updated_at değerini ilerlet ve olay yaz (senkronizasyon için)"""
+        for chunk in self._chunks(ids):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f'''
+                UPDATE documents SET updated_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})
+            ''', chunk)
+        organization_id = self.current_user['organization_id']
+        record_many(cursor, event_type,
+                    ((organization_id, 'document', document_id) for document_id in ids))
+
+    def build_search_query(self, organization_id: str, query: str, filters: Dict[str, Any] = None,
+                           columns: str = SEARCH_COLUMNS) -> Tuple[str, List[Any]]:
+        """Arama filtrelerinden GROUP BY'sız SELECT ... WHERE sorgusunu ve parametrelerini kur"""
         filters = filters or {}
-        offset = (page - 1) * per_page
 
-        # Base query
-        base_query = '''
-            SELECT DISTINCT d.*, u.username as uploaded_by_name,
-                   GROUP_CONCAT(t.name) as tag_names
+        base_query = f'''
+            SELECT {columns}
             FROM documents d
             LEFT JOIN users u ON d.uploaded_by = u.id
             LEFT JOIN document_tags dt ON d.id = dt.document_id
@@ -804,11 +1786,16 @@ class DoxagonEnterpriseManager:
             WHERE d.organization_id = ? AND d.is_active = 1
         '''
 
-        params = [self.current_user['organization_id']]
+        params = [organization_id]
 
         # Metin arama
         if query:
-            base_query += ' AND (d.original_name LIKE ? OR d.description LIKE ? OR d.ocr_text LIKE ?)'
+            base_query += '''
+                AND (d.original_name LIKE ? OR d.description LIKE ? OR EXISTS (
+                    SELECT 1 FROM document_texts dx
+                    WHERE dx.document_id = d.id AND dx_text(dx.ocr_text) LIKE ?
+                ))
+            '''
             search_term = f'%{query}%'
             params.extend([search_term, search_term, search_term])
 
@@ -842,13 +1829,26 @@ class DoxagonEnterpriseManager:
             base_query += f' AND t.name IN ({tag_placeholders})'
             params.extend(filters['tags'])
 
+        return base_query, params
+
+    def search_documents(self, query: str, filters: Dict[str, Any] = None, 
+                        page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """Gelişmiş belge arama"""
+
+        if not self.current_user:
+            return {"documents": [], "total": 0}
+
+        offset = (page - 1) * per_page
+        base_query, params = self.build_search_query(self.current_user['organization_id'],
+                                                     query, filters)
+
         # Grup by ekle
         base_query += ' GROUP BY d.id'
 
         # Toplam sayı
         count_query = f"SELECT COUNT(*) FROM ({base_query})"
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
 
             # Toplam sayı
@@ -868,14 +1868,14 @@ class DoxagonEnterpriseManager:
                     'id': row[0],
                     'original_name': row[1],
                     'current_name': row[2],
-                    'file_size': row[5],
-                    'category': row[7],
-                    'document_type': row[8],
-                    'description': row[11],
-                    'confidentiality': row[12],
-                    'created_at': row[10],
-                    'uploaded_by_name': row[19],
-                    'tags': row[20].split(',') if row[20] else []
+                    'file_size': row[3],
+                    'category': row[4],
+                    'document_type': row[5],
+                    'description': row[6],
+                    'confidentiality': row[7],
+                    'created_at': row[8],
+                    'uploaded_by_name': row[9],
+                    'tags': row[10].split(',') if row[10] else []
                 })
 
         return {
@@ -886,16 +1886,35 @@ class DoxagonEnterpriseManager:
             'total_pages': (total + per_page - 1) // per_page
         }
 
+    def get_document_text(self, document_id: str) -> Optional[str]:
+        """Belgenin çıkarılmış metnini yükle (yalnızca istendiğinde)"""
+        if not self.current_user:
+            return None
+
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT dx.ocr_text FROM documents d
+                LEFT JOIN document_texts dx ON dx.document_id = d.id
+                WHERE d.id = ? AND d.organization_id = ? AND d.is_active = 1
+            ''', (document_id, self.current_user['organization_id']))
+
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+        return decompress_text(row[0]) or ""
+
     def create_share_link(self, document_id: str, expires_hours: int = 24, 
                          password: str = None, max_downloads: int = None) -> Optional[str]:
         """Paylaşım linki oluştur"""
 
         if not self.current_user:
-            print("❌ Oturum açmanız gerekiyor!")
+            logger.warning("Oturum açmanız gerekiyor")
             return None
 
         # Belge var mı kontrol et
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT original_name FROM documents 
@@ -904,15 +1923,15 @@ class DoxagonEnterpriseManager:
 
             doc = cursor.fetchone()
             if not doc:
-                print("❌ Belge bulunamadı!")
+                logger.warning("Belge bulunamadı", extra={'document_id': document_id})
                 return None
 
         # Token oluştur
         token = secrets.token_urlsafe(32)
         expires_at = datetime.now() + timedelta(hours=expires_hours)
-        password_hash = hashlib.sha256(password.encode()).hexdigest() if password else None
+        password_hash = self.password_hasher.hash_offloaded(password) if password else None
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO share_links (
@@ -923,19 +1942,22 @@ class DoxagonEnterpriseManager:
                 str(uuid.uuid4()), document_id, token, self.current_user['id'],
                 expires_at.isoformat(), password_hash, max_downloads
             ))
+            record(cursor, 'share.created', self.current_user['organization_id'],
+                   'document', document_id,
+                   {'expires_at': expires_at.isoformat(), 'max_downloads': max_downloads})
             conn.commit()
 
         share_url = f"http://localhost:5000/share/{token}"
 
         self.log_action("CREATE", "share_link", document_id, f"Paylaşım linki oluşturuldu")
 
-        print(f"✅ Paylaşım linki oluşturuldu!")
-        print(f"🔗 Link: {share_url}")
-        print(f"⏰ Geçerlilik: {expires_at.strftime('%Y-%m-%d %H:%M')} tarihine kadar")
-        if password:
-            print(f"🔒 Şifre korumalı")
-        if max_downloads:
-            print(f"📥 Maksimum indirme: {max_downloads}")
+        # Link (token) kayda yazılmaz
+        logger.info("Paylaşım linki oluşturuldu", extra={
+            'document_id': document_id,
+            'expires_at': expires_at.strftime('%Y-%m-%d %H:%M'),
+            'password_protected': bool(password),
+            'max_downloads': max_downloads
+        })
 
         return share_url
 
@@ -944,12 +1966,12 @@ class DoxagonEnterpriseManager:
         """Hatırlatıcı oluştur"""
 
         if not self.current_user:
-            print("❌ Oturum açmanız gerekiyor!")
+            logger.warning("Oturum açmanız gerekiyor")
             return False
 
         reminder_id = str(uuid.uuid4())
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO reminders (
@@ -962,9 +1984,34 @@ class DoxagonEnterpriseManager:
             ))
             conn.commit()
 
-        print(f"✅ Hatırlatıcı oluşturuldu: {title}")
+        # Çalışan servis varsa sıraya ekle (yeni kayıt en yakınsa servis uyanır)
+        if self.reminder_scheduler is not None:
+            self.reminder_scheduler.notify(reminder_id, reminder_date)
+
+        logger.info("Hatırlatıcı oluşturuldu", extra={'reminder_id': reminder_id,
+                                                    'document_id': document_id})
         return True
 
+    def start_reminder_scheduler(self) -> Optional[ReminderScheduler]:
+        """Hatırlatıcı servisini arka planda başlat"""
+        if not self.config['notifications']['reminder_scheduler_enabled']:
+            return None
+
+        if self.reminder_scheduler is None:
+            self.reminder_scheduler = ReminderScheduler(self.db.db_path, self.config['notifications'])
+            self.reminder_scheduler.start()
+        return self.reminder_scheduler
+
+    def start_housekeeping(self) -> Optional[Housekeeper]:
+        """Süresi dolan link ve geçici dosya temizliğini arka planda başlat"""
+        if not self.config['housekeeping']['enabled']:
+            return None
+
+        if self.housekeeper is None:
+            self.housekeeper = Housekeeper(self)
+            self.housekeeper.start()
+        return self.housekeeper
+
     def log_action(self, action: str, resource_type: str, resource_id: str, 
                    details: str = None) -> None:
         """Audit log kaydı"""
@@ -972,7 +2019,7 @@ class DoxagonEnterpriseManager:
         if not self.current_user:
             return
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO audit_logs (
@@ -982,8 +2029,20 @@ class DoxagonEnterpriseManager:
                 str(uuid.uuid4()), self.current_user['id'], action,
                 resource_type, resource_id, details
             ))
+            record(cursor, f"audit.{action.lower()}", self.current_user['organization_id'],
+                   resource_type, resource_id,
+                   {'user_id': self.current_user['id'], 'details': details})
             conn.commit()
 
+        # Bu ve önceki işlemlerde outbox'a yazılan olaylar abonelere iletilir
+        self.events.dispatch()
+
+    def _on_document_event(self, event: Dict[str, Any]) -> None:
+        """Belge silindiğinde veya dosyası değiştiğinde paylaşım linki önbelleğini düşür"""
+        if event['type'] in ('document.deleted', 'document.expired', 'document.purged',
+                             'document.updated', 'document.version_created'):
+            self.share_links.invalidate(document_id=event['resource_id'])
+
     def format_size(self, size_bytes: int) -> str:
         """Dosya boyutunu formatla"""
         if size_bytes < 1024:
@@ -1001,7 +2060,7 @@ class DoxagonEnterpriseManager:
         if not self.current_user:
             return {}
 
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.connect() as conn:
             cursor = conn.cursor()
 
             # Temel istatistikler
@@ -1047,6 +2106,8 @@ def main():
 
     # Sistem başlat
     doxagon = DoxagonEnterpriseManager()
+    # Etkileşimli oturumda kayıtlar konsolda okunabilir biçimde gösterilir
+    configure_logging(doxagon.config['logging'], fmt='text')
 
     # Varsayılan organizasyon ve kullanıcı oluştur (ilk çalıştırmada)
     with sqlite3.connect(doxagon.db.db_path) as conn:
@@ -1071,7 +2132,13 @@ def main():
         username = input("Kullanıcı adı: ").strip()
         password = input("Şifre: ").strip()
 
-        if doxagon.authenticate_user(username, password):
+        try:
+            authenticated = doxagon.authenticate_user(username, password)
+        except RateLimitExceeded as e:
+            print(f"⛔ {e}. {e.retry_after} saniye sonra tekrar deneyin.")
+            continue
+
+        if authenticated:
             print(f"✅ Hoş geldiniz, {doxagon.current_user['username']}!")
             print(f"🏢 Organizasyon: {doxagon.current_user['organization_name']}")
         else:
@@ -1221,7 +2288,9 @@ def main():
             max_downloads = input("📥 Maksimum indirme (boş=sınırsız): ").strip()
             max_downloads = int(max_downloads) if max_downloads else None
 
-            doxagon.create_share_link(document_id, expires_hours, password, max_downloads)
+            share_url = doxagon.create_share_link(document_id, expires_hours, password, max_downloads)
+            if share_url:
+                print(f"🔗 Link: {share_url}")
 
         elif choice == "6":
             # Hatırlatıcı ekle
@@ -1307,6 +2376,8 @@ def main():
             print("\n👥 KULLANICI YÖNETİMİ")
             print("1. Yeni Kullanıcı Ekle")
             print("2. Kullanıcıları Listele")
+            print("3. Rol Değiştir")
+            print("4. Kullanıcıyı Pasifleştir")
 
             user_choice = input("Seçim: ").strip()
 
@@ -1347,6 +2418,28 @@ def main():
                         print(f"   🎭 {user[2]} | 📅 {user[3][:10]} | {status}")
                         print()
 
+            elif user_choice in ("3", "4"):
+                username = input("Kullanıcı adı: ").strip()
+                with sqlite3.connect(doxagon.db.db_path) as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        SELECT id FROM users WHERE username = ? AND organization_id = ?
+                    ''', (username, doxagon.current_user['organization_id']))
+                    user = cursor.fetchone()
+
+                if not user:
+                    print("❌ Kullanıcı bulunamadı!")
+                    continue
+
+                if user_choice == "3":
+                    role_choice = input("Yeni rol (1: Viewer, 2: Editor, 3: Admin): ").strip()
+                    role = {"1": "viewer", "2": "editor", "3": "admin"}.get(role_choice, "viewer")
+                    doxagon.update_user_role(user[0], role)
+                    print(f"✅ {username} kullanıcısının rolü güncellendi: {role}")
+                else:
+                    doxagon.deactivate_user(user[0])
+                    print(f"✅ {username} kullanıcısı pasifleştirildi")
+
         elif choice == "10":
             # Audit logs
             if doxagon.current_user['role'] not in ['admin', 'editor']:
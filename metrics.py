@@ -0,0 +1,236 @@
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from functools import wraps, lru_cache
+from time import perf_counter
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[str, str] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Yalnızca artan sayaç (etiket kombinasyonu başına)"""
+
+    def __init__(self, name: str, help_text: str = ''):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(key)} {value}' for key, value in values]
+
+
+class Histogram:
+    """Sabit kovalı süre dağılımı (Prometheus histogram biçimi)"""
+
+    def __init__(self, name: str, help_text: str = '', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # etiketler -> [kova sayıları..., +Inf], toplam
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(key, ("le", repr(bound)))} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{_format_labels(key, ("le", "+Inf"))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """Okunduğu anda hesaplanan değer (kuyruk derinliği, önbellek isabet oranı)
+
+    fn bir sayı ya da {etiket_değeri: sayı} sözlüğü döndürür.
+    """
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], Any], label: str = None):
+        self.name = name
+        self.help_text = help_text
+        self.fn = fn
+        self.label = label
+
+    def render(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [f'{self.name}{_format_labels(((self.label, str(k)),))} {v}'
+                    for k, v in value.items()]
+        return [f'{self.name} {value}']
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Süreç içi metrik kaydı; /metrics uç noktası için metin biçiminde dışa verir
+
+    enabled False iken zamanlayıcılar hiçbir iş yapmaz (ölçüm maliyeti yok).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, Counter(name, help_text))
+        return metric
+
+    def histogram(self, name: str, help_text: str = '',
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+        return metric
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], Any], label: str = None) -> None:
+        """Okuma anında fn ile hesaplanan gösterge kaydet (aynı ad yeniden kaydedilirse değişir)"""
+        with self._lock:
+            self._metrics[name] = Gauge(name, help_text, fn, label)
+
+    def timer(self, name: str, **labels):
+        """with bloğunun süresini histograma yaz"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name), labels)
+
+    def timed(self, name: str, **labels):
+        """Fonksiyon süresini ölçen dekoratör"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.histogram(name).observe(perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        """Prometheus metin biçimi (text/plain; version=0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+        lines = []
+        for metric in metrics:
+            kind = {Counter: 'counter', Histogram: 'histogram', Gauge: 'gauge'}[type(metric)]
+            if metric.help_text:
+                lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Süreç genelinde tek kayıt (modül düzeyindeki dekoratörler de bunu kullanır)
+registry = MetricsRegistry()
+
+
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([A-Za-z_][A-Za-z0-9_]*)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def classify_statement(sql: str) -> Tuple[str, str]:
+    """SQL ifadesini (işlem, tablo) kategorisine ayır: ('SELECT', 'documents') gibi"""
+    words = sql.split(None, 1)
+    operation = words[0].upper() if words else 'UNKNOWN'
+    match = _STATEMENT_TABLE.search(sql)
+    return operation, match.group(1).lower() if match else '-'
+
+
+class TimedCursor(sqlite3.Cursor):
+    """execute/executemany sürelerini işlem ve tabloya göre ölçen imleç"""
+
+    def execute(self, sql, parameters=()):
+        operation, table = classify_statement(sql)
+        with registry.timer('doxagon_sql_seconds', operation=operation, table=table):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        operation, table = classify_statement(sql)
+        with registry.timer('doxagon_sql_seconds', operation=operation, table=table):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class TimedConnection(sqlite3.Connection):
+    """cursor() çağrıları TimedCursor döndürür"""
+
+    def cursor(self, factory: Optional[type] = None):
+        return super().cursor(factory or TimedCursor)
@@ -0,0 +1,215 @@
+import hmac
+import time
+import base64
+import hashlib
+import secrets
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, Any, Optional
+
+# Eski sürümlerin tuzsuz tek turluk SHA-256 hash'i (64 hex karakter)
+LEGACY_HASH_LENGTH = 64
+
+DEFAULT_SETTINGS = {
+    "algorithm": "scrypt",  # scrypt, pbkdf2_sha256
+    "scrypt_n": 2 ** 14,
+    "scrypt_r": 8,
+    "scrypt_p": 1,
+    "pbkdf2_iterations": 600000,
+    "max_workers": 4,
+    "max_queue": 32,
+    "timeout_seconds": 10
+}
+
+
+class HasherBusyError(Exception):
+    """Doğrulama havuzu dolu (giriş patlaması sırasında istek reddedilir)"""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class PasswordHasher:
+    """Ayarlanabilir maliyetli KDF ile parola hash'leme ve sınırlı havuzda doğrulama"""
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self._executor = ThreadPoolExecutor(max_workers=self.settings['max_workers'],
+                                            thread_name_prefix="password-kdf")
+        # Çalışan + bekleyen iş sayısını sınırlar
+        self._slots = threading.BoundedSemaphore(
+            self.settings['max_workers'] + self.settings['max_queue']
+        )
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._dummy_hash: Optional[str] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Havuzda çalışan + bekleyen KDF işi sayısı"""
+        return self._in_flight
+
+    @property
+    def dummy_hash(self) -> str:
+        """Olmayan kullanıcılar için doğrulanan sabit hash (yanıt süresi kullanıcı adını ele vermesin)"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(secrets.token_urlsafe(16))
+        return self._dummy_hash
+
+    def _run_offloaded(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError("Parola doğrulama kuyruğu dolu")
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._finish()
+            raise
+        # Yuva ve sayaç iş bitene kadar tutulur; zaman aşımında KDF arka planda sürer
+        future.add_done_callback(lambda _: self._finish())
+        try:
+            return future.result(timeout=self.settings['timeout_seconds'])
+        except FuturesTimeoutError:
+            raise HasherBusyError("Parola doğrulama zaman aşımına uğradı")
+
+    def _finish(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _scrypt(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p + 1024 * 1024, dklen=32)
+
+    def _pbkdf2(self, password: str, salt: bytes, iterations: int) -> bytes:
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+    def hash(self, password: str) -> str:
+        """Parolayı yapılandırılan algoritma ve maliyetle hash'le"""
+        salt = secrets.token_bytes(16)
+        if self.settings['algorithm'] == 'pbkdf2_sha256':
+            iterations = self.settings['pbkdf2_iterations']
+            digest = self._pbkdf2(password, salt, iterations)
+            return f"pbkdf2_sha256${iterations}${_b64encode(salt)}${_b64encode(digest)}"
+
+        n, r, p = self.settings['scrypt_n'], self.settings['scrypt_r'], self.settings['scrypt_p']
+        digest = self._scrypt(password, salt, n, r, p)
+        return f"scrypt${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        """Parolayı kayıtlı hash ile karşılaştır (eski SHA-256 hash'leri de desteklenir)"""
+        if not stored_hash:
+            return False
+
+        if len(stored_hash) == LEGACY_HASH_LENGTH and '$' not in stored_hash:
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(candidate, stored_hash)
+
+        parts = stored_hash.split('$')
+        try:
+            if parts[0] == 'scrypt' and len(parts) == 6:
+                n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+                digest = self._scrypt(password, _b64decode(parts[4]), n, r, p)
+                return hmac.compare_digest(digest, _b64decode(parts[5]))
+
+            if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+                digest = self._pbkdf2(password, _b64decode(parts[2]), int(parts[1]))
+                return hmac.compare_digest(digest, _b64decode(parts[3]))
+        except ValueError:
+            return False
+
+        return False
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """Hash eski formatta veya güncel maliyetin altında mı"""
+        parts = (stored_hash or '').split('$')
+        if self.settings['algorithm'] == 'pbkdf2_sha256':
+            return not (parts[0] == 'pbkdf2_sha256' and len(parts) == 4
+                        and int(parts[1]) >= self.settings['pbkdf2_iterations'])
+
+        return not (parts[0] == 'scrypt' and len(parts) == 6
+                    and int(parts[1]) >= self.settings['scrypt_n']
+                    and int(parts[2]) == self.settings['scrypt_r']
+                    and int(parts[3]) >= self.settings['scrypt_p'])
+
+    def verify_offloaded(self, password: str, stored_hash: str) -> bool:
+        """Doğrulamayı sınırlı iş parçacığı havuzunda çalıştır"""
+        return self._run_offloaded(self.verify, password, stored_hash)
+
+    def hash_offloaded(self, password: str) -> str:
+        """Hash'lemeyi sınırlı iş parçacığı havuzunda çalıştır"""
+        return self._run_offloaded(self.hash, password)
+
+
+def _measure(hasher: PasswordHasher, rounds: int = 3) -> float:
+    """Tek doğrulamanın ortalama süresini milisaniye olarak ölç"""
+    stored = hasher.hash("benchmark-password")
+    started = time.perf_counter()
+    for _ in range(rounds):
+        hasher.verify("benchmark-password", stored)
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def benchmark(target_ms: float, algorithm: str = "scrypt") -> Dict[str, Any]:
+    """Hedef giriş gecikmesini aşmayan en yüksek maliyet parametrelerini bul"""
+    best: Optional[Dict[str, Any]] = None
+    results = []
+
+    if algorithm == "pbkdf2_sha256":
+        iterations = 100000
+        while iterations <= 10000000:
+            settings = {"algorithm": algorithm, "pbkdf2_iterations": iterations}
+            elapsed = _measure(PasswordHasher(settings))
+            results.append({"pbkdf2_iterations": iterations, "ms": round(elapsed, 1)})
+            if elapsed > target_ms:
+                break
+            best = settings
+            iterations *= 2
+    else:
+        n = 2 ** 12
+        while n <= 2 ** 20:
+            settings = {"algorithm": algorithm, "scrypt_n": n, "scrypt_r": 8, "scrypt_p": 1}
+            elapsed = _measure(PasswordHasher(settings))
+            results.append({"scrypt_n": n, "ms": round(elapsed, 1)})
+            if elapsed > target_ms:
+                break
+            best = settings
+            n *= 2
+
+    return {"target_ms": target_ms, "recommended": best, "measurements": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon parola hash'leme araçları")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    bench_parser = subparsers.add_parser('benchmark', help='Hedef gecikmeye göre maliyet seç')
+    bench_parser.add_argument('--target-ms', type=float, default=250,
+                              help='Tek giriş için hedef doğrulama süresi (ms)')
+    bench_parser.add_argument('--algorithm', choices=['scrypt', 'pbkdf2_sha256'], default='scrypt')
+
+    args = parser.parse_args()
+
+    report = benchmark(args.target_ms, args.algorithm)
+    for measurement in report['measurements']:
+        params = ', '.join(f"{k}={v}" for k, v in measurement.items() if k != 'ms')
+        print(f"⏱️  {params}: {measurement['ms']} ms")
+
+    if report['recommended']:
+        print("\n✅ Önerilen ayar (security.password_hashing):")
+        for key, value in report['recommended'].items():
+            print(f"   {key}: {value}")
+    else:
+        print("\n⚠️  Hedef süre en düşük maliyetle bile aşıldı")
+
+
+if __name__ == "__main__":
+    main()
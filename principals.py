@@ -0,0 +1,94 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+class PrincipalCache:
+    """Yetkilendirme için kullanıcı/rol/organizasyon bilgisini tutan sınırlı LRU önbellek"""
+
+    def __init__(self, db_path: str, ttl_seconds: float, max_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+
+        # user_id -> (geçerlilik sonu, principal veya pasif kullanıcı için None)
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT u.id, u.username, u.email, u.role, u.organization_id,
+                       o.name, o.plan, o.storage_quota_gb, o.user_quota, o.document_quota
+                FROM users u
+                LEFT JOIN organizations o ON u.organization_id = o.id
+                WHERE u.id = ? AND u.is_active = 1
+                  AND (o.id IS NULL OR o.is_active = 1)
+            ''', (user_id,))
+            row = cursor.fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'id': row[0],
+            'username': row[1],
+            'email': row[2],
+            'role': row[3],
+            'organization_id': row[4],
+            'organization_name': row[5] if row[5] else 'Bireysel',
+            'plan': row[6],
+            'storage_quota_gb': row[7],
+            'user_quota': row[8],
+            'document_quota': row[9]
+        }
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Kullanıcının yetki bilgisini döndür (pasif/silinmiş kullanıcı için None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        principal = self._load(user_id)
+
+        with self._lock:
+            self._cache[user_id] = (now + self.ttl, principal)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return principal
+
+    def invalidate(self, user_id: str = None, organization_id: str = None) -> None:
+        """Önbellekteki kayıtları düşür (kullanıcı, organizasyon veya tümü)"""
+        with self._lock:
+            if user_id is not None:
+                self._cache.pop(user_id, None)
+            elif organization_id is not None:
+                for key in [key for key, (_, principal) in self._cache.items()
+                            if principal is not None
+                            and principal['organization_id'] == organization_id]:
+                    del self._cache[key]
+            else:
+                self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Önbellek isabet istatistikleri"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,170 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+MODE_CPROFILE = 'cprofile'
+MODE_SAMPLE = 'sample'
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}_[0-9]{6}_[0-9]{6}_[0-9a-f]{8}$')
+
+# Python 3.12+ süreçte aynı anda tek cProfile'a izin verir (ikincisi ValueError)
+_CPROFILE_LOCK = threading.Lock()
+
+
+class StackSampler:
+    """Tek bir iş parçacığının yığınını aralıklarla örnekleyen düşük maliyetli profilci
+
+    Örnekler 'dış;...;iç sayı' biçiminde (flamegraph.pl / speedscope ile
+    uyumlu katlanmış yığın) toplanır. İzlenen iş parçacığı yavaşlatılmaz;
+    örnekleme ayrı bir iş parçacığında yapılır.
+    """
+
+    def __init__(self, thread_id: int, interval_ms: float = 5):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+class RequestProfile:
+    """Bir isteğin profilini başlatır/durdurur (cProfile veya yığın örnekleme)
+
+    Başka bir istek cProfile ile profilleniyorsa bu istek örnekleme moduna düşer.
+    """
+
+    def __init__(self, mode: str, interval_ms: float = 5):
+        self.mode = mode
+        self.started = time.perf_counter()
+        if mode == MODE_CPROFILE and self._enable_cprofile():
+            return
+        self.mode = MODE_SAMPLE
+        self._profiler = StackSampler(threading.get_ident(), interval_ms)
+        self._profiler.start()
+
+    def _enable_cprofile(self) -> bool:
+        if not _CPROFILE_LOCK.acquire(blocking=False):
+            return False
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Süreçte başka bir profilci (ör. harici araç) etkin
+            _CPROFILE_LOCK.release()
+            return False
+        return True
+
+    def stop(self) -> Any:
+        """Profili durdur; cProfile için Profile, örnekleme için katlanmış yığın metni"""
+        if self.mode == MODE_CPROFILE:
+            self._profiler.disable()
+            _CPROFILE_LOCK.release()
+            return self._profiler
+        return self._profiler.stop()
+
+
+class ProfileStore:
+    """Profilleri doxagon_storage/profiles/ altında saklar (en yeni max_profiles adet)
+
+    Her profil için <id>.prof (pstats) veya <id>.folded (katlanmış yığın)
+    ve istek bilgilerini tutan <id>.json yazılır.
+    """
+
+    def __init__(self, directory: Path, max_profiles: int = 200):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, profile: RequestProfile, data: Any, info: Dict[str, Any]) -> str:
+        # Kimlik zamana göre sıralanır (liste ve budama dosya adıyla yapılır)
+        profile_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{uuid.uuid4().hex[:8]}"
+        if profile.mode == MODE_CPROFILE:
+            data_file = self.directory / f"{profile_id}.prof"
+            data.dump_stats(str(data_file))
+            top = self._top_functions(data)
+        else:
+            data_file = self.directory / f"{profile_id}.folded"
+            data_file.write_text(data, encoding='utf-8')
+            top = [line.rsplit(';', 1)[-1] for line in data.splitlines()[:5]]
+
+        meta = {
+            'id': profile_id,
+            'mode': profile.mode,
+            'file': data_file.name,
+            'created_at': datetime.now().isoformat(),
+            'top': top,
+            **info
+        }
+        with open(self.directory / f"{profile_id}.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        self._prune()
+        return profile_id
+
+    @staticmethod
+    def _top_functions(profiler: cProfile.Profile, limit: int = 5) -> List[str]:
+        """Kümülatif süreye göre en pahalı fonksiyonlar (liste görünümü için)"""
+        stats = pstats.Stats(profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [f"{os.path.basename(filename)}:{line}({name}) {cumulative * 1000:.1f}ms"
+                for (filename, line, name), (_, _, _, cumulative, _) in rows[:limit]]
+
+    def _prune(self) -> None:
+        with self._lock:
+            metas = sorted(self.directory.glob('*.json'))
+            for meta_file in metas[:max(0, len(metas) - self.max_profiles)]:
+                for path in self.directory.glob(f"{meta_file.stem}.*"):
+                    path.unlink(missing_ok=True)
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Profiller (en yeni önce)"""
+        profiles = []
+        for meta_file in sorted(self.directory.glob('*.json'), reverse=True)[:limit]:
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        """Profil veri dosyasının yolu (geçersiz kimlikte None; yol dışına çıkılamaz)"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        for suffix in ('.prof', '.folded'):
+            data_file = self.directory / f"{profile_id}{suffix}"
+            if data_file.exists():
+                return data_file
+        return None
@@ -0,0 +1,208 @@
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict, Any, List, Optional, Set
+
+from metrics import TimedCursor, TimedConnection
+from logs import get_logger
+
+logger = get_logger('sql')
+
+# Planı çıkarılabilen ifadeler (PRAGMA, BEGIN, DDL için EXPLAIN yapılmaz)
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+# "SCAN d", "SCAN TABLE documents AS d" (eski SQLite); USING INDEX içerenler indeks taramasıdır
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$')
+_TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_NOT_ALIAS = {
+    'where', 'join', 'left', 'right', 'inner', 'outer', 'cross', 'on', 'group', 'order',
+    'limit', 'offset', 'set', 'values', 'select', 'union', 'having', 'using', 'indexed',
+    'natural', 'as', 'and', 'or', 'default'
+}
+
+
+class FullTableScanError(AssertionError):
+    """Sık çalışan sorgu tam tablo taraması yapıyor (yalnızca strict modda fırlatılır)"""
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """Kayıt ve gruplama için tek satırlık SQL"""
+    return ' '.join(sql.split())
+
+
+@lru_cache(maxsize=2048)
+def table_aliases(sql: str) -> Dict[str, str]:
+    """FROM/JOIN'deki takma adları tablo adlarına eşle: {'d': 'documents', ...}"""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def explain(connection: sqlite3.Connection, sql: str, parameters=()) -> List[str]:
+    """EXPLAIN QUERY PLAN çıktısı (alt adımlar girintili)"""
+    # Düz Cursor: denetlenen imlecin execute'u tekrar çağrılmasın
+    rows = sqlite3.Cursor(connection).execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+    return plan
+
+
+def full_scans(plan: List[str], sql: str) -> Set[str]:
+    """Plandaki tam tablo taramalarının tablo adları (alt sorgu ve indeks taramaları hariç)"""
+    aliases = table_aliases(sql)
+    tables = set()
+    for line in plan:
+        match = _FULL_SCAN.match(line.strip())
+        if match:
+            name = match.group(1).lower()
+            tables.add(aliases.get(name, name))
+    return tables
+
+
+class _StatementStats:
+    __slots__ = ('sql', 'count', 'total', 'max', 'plan', 'scans', 'checked')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.plan: Optional[List[str]] = None
+        self.scans: Set[str] = set()
+        self.checked = False
+
+
+class QueryAuditor:
+    """İfade başına süre istatistiği, yavaş sorgu kaydı ve sorgu planı denetimi
+
+    - slow_query_ms'i aşan her çalıştırma planıyla birlikte kaydedilir.
+    - hot_calls kez çalışan ifadenin planı bir kez çıkarılır; izin listesi
+      dışındaki bir tabloyu tam tarıyorsa uyarı yazılır, strict modda
+      FullTableScanError fırlatılır (test ve ölçüm çalıştırmaları için).
+    """
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        self._lock = threading.Lock()
+        self._statements: Dict[str, _StatementStats] = {}
+        self.configure(settings or {})
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        self.enabled = settings.get('enabled', False)
+        self.slow_query_ms = settings.get('slow_query_ms', 200)
+        self.explain_slow = settings.get('explain_slow', True)
+        self.hot_calls = max(1, settings.get('hot_calls', 20))
+        self.strict = settings.get('strict', False)
+        self.scan_allowlist = {table.lower() for table in settings.get('scan_allowlist', [])}
+        self.max_statements = settings.get('max_statements', 500)
+
+    def _stats(self, sql: str) -> Optional[_StatementStats]:
+        stats = self._statements.get(sql)
+        if stats is None and len(self._statements) < self.max_statements:
+            stats = self._statements.setdefault(sql, _StatementStats(normalize_sql(sql)))
+        return stats
+
+    def observe(self, connection: sqlite3.Connection, sql: str, parameters, elapsed: float) -> None:
+        """Çalıştırılan ifadeyi kaydet (executemany için parameters None)"""
+        explainable = sql.lstrip()[:7].upper().startswith(_EXPLAINABLE)
+        with self._lock:
+            stats = self._stats(sql)
+            if stats is not None:
+                stats.count += 1
+                stats.total += elapsed
+                stats.max = max(stats.max, elapsed)
+                check = explainable and not stats.checked and stats.count >= self.hot_calls
+                if check:
+                    stats.checked = True
+            else:
+                check = False
+
+        if check and parameters is not None:
+            self._check_plan(connection, sql, parameters, stats)
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            plan = stats.plan if stats is not None else None
+            if plan is None and self.explain_slow and explainable and parameters is not None:
+                plan = self._explain(connection, sql, parameters)
+            logger.warning("Yavaş sorgu", extra={
+                'sql': normalize_sql(sql)[:2000],
+                'duration_ms': round(elapsed * 1000, 1),
+                'plan': plan
+            })
+
+    def _explain(self, connection: sqlite3.Connection, sql: str, parameters) -> Optional[List[str]]:
+        try:
+            return explain(connection, sql, parameters)
+        except sqlite3.Error:
+            return None
+
+    def _check_plan(self, connection: sqlite3.Connection, sql: str, parameters,
+                    stats: _StatementStats) -> None:
+        plan = self._explain(connection, sql, parameters)
+        if plan is None:
+            return
+        scans = full_scans(plan, sql) - self.scan_allowlist
+        with self._lock:
+            stats.plan = plan
+            stats.scans = scans
+        if not scans:
+            return
+
+        message = f"Sık çalışan sorgu tam tablo taraması yapıyor: {', '.join(sorted(scans))}"
+        logger.warning(message, extra={'sql': stats.sql[:2000], 'calls': stats.count, 'plan': plan})
+        if self.strict:
+            raise FullTableScanError(f"{message}\n{stats.sql}\n" + '\n'.join(plan))
+
+    def report(self, limit: int = 50, sort: str = 'total') -> List[Dict[str, Any]]:
+        """İfadeler (toplam, en uzun veya çağrı sayısına göre sıralı)"""
+        key = {'total': lambda s: s.total, 'max': lambda s: s.max, 'count': lambda s: s.count}[sort]
+        with self._lock:
+            statements = sorted(self._statements.values(), key=key, reverse=True)[:limit]
+            return [{
+                'sql': stats.sql,
+                'calls': stats.count,
+                'total_ms': round(stats.total * 1000, 3),
+                'mean_ms': round(stats.total / stats.count * 1000, 3) if stats.count else 0.0,
+                'max_ms': round(stats.max * 1000, 3),
+                'plan': stats.plan,
+                'full_scans': sorted(stats.scans)
+            } for stats in statements]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+
+# Süreç genelinde tek denetçi (DoxagonEnterpriseManager konfigürasyonla ayarlar)
+auditor = QueryAuditor()
+
+
+class AuditedCursor(TimedCursor):
+    """Her ifadeyi metriklere ve sorgu denetçisine bildiren imleç"""
+
+    def execute(self, sql, parameters=()):
+        started = perf_counter()
+        cursor = super().execute(sql, parameters)
+        auditor.observe(self.connection, sql, parameters, perf_counter() - started)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        started = perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        auditor.observe(self.connection, sql, None, perf_counter() - started)
+        return cursor
+
+
+class AuditedConnection(TimedConnection):
+    """cursor() çağrıları AuditedCursor döndürür"""
+
+    def cursor(self, factory: Optional[type] = None):
+        return super().cursor(factory or AuditedCursor)
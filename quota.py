@@ -0,0 +1,223 @@
+import sqlite3
+import argparse
+from typing import Dict, Any, Optional
+
+GB = 1024 ** 3
+
+
+class QuotaExceededError(Exception):
+    """Organizasyon kotası aşıldı"""
+
+
+def _ensure_usage_row(cursor: sqlite3.Cursor, organization_id: str) -> None:
+    """Defterde satır yoksa mevcut verilerden bir kez hesaplayıp oluştur"""
+    cursor.execute('SELECT 1 FROM organization_usage WHERE organization_id = ?',
+                   (organization_id,))
+    if cursor.fetchone():
+        return
+    _recompute(cursor, organization_id)
+
+
+def _recompute(cursor: sqlite3.Cursor, organization_id: str) -> Dict[str, int]:
+    """Kullanımı kaynak tablolardan baştan hesapla ve deftere yaz"""
+    cursor.execute('''
+        SELECT COALESCE(SUM(v.file_size), 0) FROM document_versions v
+        JOIN documents d ON v.document_id = d.id
+        WHERE d.organization_id = ?
+    ''', (organization_id,))
+    storage_bytes = cursor.fetchone()[0]
+
+    cursor.execute('''
+        SELECT COUNT(*) FROM documents WHERE organization_id = ? AND is_active = 1
+    ''', (organization_id,))
+    document_count = cursor.fetchone()[0]
+
+    cursor.execute('''
+        SELECT COUNT(*) FROM users WHERE organization_id = ? AND is_active = 1
+    ''', (organization_id,))
+    user_count = cursor.fetchone()[0]
+
+    cursor.execute('''
+        INSERT OR REPLACE INTO organization_usage (
+            organization_id, storage_bytes, document_count, user_count, updated_at
+        ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ''', (organization_id, storage_bytes, document_count, user_count))
+
+    return {'storage_bytes': storage_bytes, 'document_count': document_count,
+            'user_count': user_count}
+
+
+def charge(cursor: sqlite3.Cursor, organization_id: Optional[str], storage_bytes: int = 0,
+           documents: int = 0, users: int = 0) -> None:
+    """Kullanımı çağıranın işlemi içinde artır; kota aşılırsa QuotaExceededError fırlat
+
+    Koşullu UPDATE sayesinde eşzamanlı yüklemeler kotayı birlikte aşamaz; hata
+    fırlatıldığında çağıranın işlemi geri alınmalıdır.
+    """
+    if not organization_id:
+        return
+
+    _ensure_usage_row(cursor, organization_id)
+    cursor.execute('''
+        SELECT storage_quota_gb, document_quota, user_quota FROM organizations WHERE id = ?
+    ''', (organization_id,))
+    storage_quota_gb, document_quota, user_quota = cursor.fetchone() or (None, None, None)
+
+    # Yalnızca artan kalemler için limit uygulanır (None: sınırsız)
+    storage_limit = storage_quota_gb * GB if storage_bytes > 0 and storage_quota_gb is not None else None
+    document_limit = document_quota if documents > 0 else None
+    user_limit = user_quota if users > 0 else None
+
+    cursor.execute('''
+        UPDATE organization_usage SET
+            storage_bytes = storage_bytes + ?,
+            document_count = document_count + ?,
+            user_count = user_count + ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE organization_id = ?
+          AND (? IS NULL OR storage_bytes + ? <= ?)
+          AND (? IS NULL OR document_count + ? <= ?)
+          AND (? IS NULL OR user_count + ? <= ?)
+    ''', (storage_bytes, documents, users, organization_id,
+          storage_limit, storage_bytes, storage_limit,
+          document_limit, documents, document_limit,
+          user_limit, users, user_limit))
+
+    if cursor.rowcount != 1:
+        raise QuotaExceededError("Organizasyon kotası aşıldı")
+
+
+def release(cursor: sqlite3.Cursor, organization_id: Optional[str], storage_bytes: int = 0,
+            documents: int = 0, users: int = 0) -> None:
+    """Silme/pasifleştirme sonrası kullanımı çağıranın işlemi içinde düşür"""
+    if not organization_id:
+        return
+
+    _ensure_usage_row(cursor, organization_id)
+    cursor.execute('''
+        UPDATE organization_usage SET
+            storage_bytes = MAX(0, storage_bytes - ?),
+            document_count = MAX(0, document_count - ?),
+            user_count = MAX(0, user_count - ?),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE organization_id = ?
+    ''', (storage_bytes, documents, users, organization_id))
+
+
+class QuotaService:
+    """Organizasyon kullanım defteri üzerinden hızlı kota kontrolü ve mutabakat"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def usage(self, organization_id: str) -> Dict[str, Any]:
+        """Organizasyonun kullanımını ve limitlerini döndür"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            _ensure_usage_row(cursor, organization_id)
+            cursor.execute('''
+                SELECT u.storage_bytes, u.document_count, u.user_count,
+                       o.storage_quota_gb, o.document_quota, o.user_quota
+                FROM organization_usage u
+                JOIN organizations o ON o.id = u.organization_id
+                WHERE u.organization_id = ?
+            ''', (organization_id,))
+            row = cursor.fetchone()
+            conn.commit()
+
+        if not row:
+            return {}
+
+        return {
+            'storage_bytes': row[0],
+            'document_count': row[1],
+            'user_count': row[2],
+            'storage_quota_bytes': row[3] * GB if row[3] is not None else None,
+            'document_quota': row[4],
+            'user_quota': row[5]
+        }
+
+    def check(self, organization_id: Optional[str], storage_bytes: int = 0,
+              documents: int = 0, users: int = 0) -> None:
+        """Dosya yazılmadan önce kabul kontrolü (tek birincil anahtar sorgusu)"""
+        if not organization_id:
+            return
+
+        usage = self.usage(organization_id)
+        if not usage:
+            return
+
+        if (storage_bytes > 0 and usage['storage_quota_bytes'] is not None
+                and usage['storage_bytes'] + storage_bytes > usage['storage_quota_bytes']):
+            raise QuotaExceededError("Depolama kotası aşıldı")
+        if (documents > 0 and usage['document_quota'] is not None
+                and usage['document_count'] + documents > usage['document_quota']):
+            raise QuotaExceededError("Belge kotası aşıldı")
+        if (users > 0 and usage['user_quota'] is not None
+                and usage['user_count'] + users > usage['user_quota']):
+            raise QuotaExceededError("Kullanıcı kotası aşıldı")
+
+    def reconcile(self, organization_id: str = None) -> Dict[str, Dict[str, Any]]:
+        """Defteri kaynak tablolarla karşılaştırıp düzelt, sapmaları raporla"""
+        drift = {}
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            if organization_id:
+                organization_ids = [organization_id]
+            else:
+                cursor.execute('SELECT id FROM organizations')
+                organization_ids = [row[0] for row in cursor.fetchall()]
+
+            for org_id in organization_ids:
+                # Her organizasyon kendi yazma işleminde düzeltilir (eşzamanlı yüklemelerle yarışmaz)
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('''
+                    SELECT storage_bytes, document_count, user_count
+                    FROM organization_usage WHERE organization_id = ?
+                ''', (org_id,))
+                before = cursor.fetchone()
+                after = _recompute(cursor, org_id)
+                conn.commit()
+
+                if before is None or tuple(after.values()) != tuple(before):
+                    drift[org_id] = {
+                        'before': dict(zip(after.keys(), before)) if before else None,
+                        'after': after
+                    }
+
+        return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon organizasyon kotaları")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('reconcile', help='Kullanım defterini kaynak tablolarla eşitle')
+    usage_parser = subparsers.add_parser('usage', help='Organizasyon kullanımını göster')
+    usage_parser.add_argument('organization_id')
+
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+
+    if args.command == 'reconcile':
+        drift = doxagon.quota.reconcile()
+        for org_id, values in drift.items():
+            print(f"🔧 {org_id}: {values['before']} → {values['after']}")
+        print(f"✅ Mutabakat tamamlandı ({len(drift)} organizasyonda düzeltme)")
+        return
+
+    usage = doxagon.quota.usage(args.organization_id)
+    if not usage:
+        print("❌ Organizasyon bulunamadı!")
+        return
+    quota = usage['storage_quota_bytes']
+    print(f"💾 Depolama: {doxagon.format_size(usage['storage_bytes'])} / "
+          f"{doxagon.format_size(quota) if quota is not None else 'sınırsız'}")
+    print(f"📄 Belge: {usage['document_count']} / {usage['document_quota']}")
+    print(f"👥 Kullanıcı: {usage['user_count']} / {usage['user_quota']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import time
+import sqlite3
+import threading
+from collections import deque, OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class RateLimitExceeded(Exception):
+    """İstek sınırı aşıldı (retry_after saniye sonra tekrar denenebilir)"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class SlidingWindowLimiter:
+    """Anahtar başına kayan pencereli istek sayacı (bellekte, sınırlı sayıda anahtar)"""
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100000):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, now: float) -> deque:
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = deque()
+            self._hits[key] = hits
+            # En uzun süredir görülmeyen anahtarlar düşürülür
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        return hits
+
+    def retry_after(self, key: str, now: float = None) -> float:
+        """Sınır doluysa kaç saniye beklenmesi gerektiğini döndür (doluysa > 0)"""
+        now = now or time.time()
+        with self._lock:
+            hits = self._prune(key, now)
+            if len(hits) < self.limit:
+                return 0
+            return hits[0] + self.window - now
+
+    def hit(self, key: str, now: float = None) -> Tuple[bool, float]:
+        """İsteği say; sınır aşıldıysa (False, bekleme süresi) döndür"""
+        now = now or time.time()
+        with self._lock:
+            hits = self._prune(key, now)
+            if len(hits) >= self.limit:
+                return False, hits[0] + self.window - now
+            hits.append(now)
+            return True, 0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class LoginGuard:
+    """Kullanıcı adı ve IP başına başarısız giriş sınırı ve geçici kilitleme"""
+
+    def __init__(self, settings: Dict[str, Any], db_path: str = None):
+        window = settings['login_window_minutes'] * 60
+        self.lockout_seconds = settings['lockout_minutes'] * 60
+        self.users = SlidingWindowLimiter(settings['max_login_attempts'], window)
+        self.ips = SlidingWindowLimiter(settings['ip_max_login_attempts'], window)
+
+        # Kilitler yeniden başlatmada kaybolmasın diye isteğe bağlı olarak SQLite'a yazılır
+        self.db_path = db_path if settings.get('persist_lockouts') else None
+        self._lockouts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_lockouts()
+
+    def _load_lockouts(self) -> None:
+        if not self.db_path:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM login_lockouts WHERE locked_until < ?', (time.time(),))
+            cursor.execute('SELECT lock_key, locked_until FROM login_lockouts')
+            self._lockouts = dict(cursor.fetchall())
+            conn.commit()
+
+    def _persist(self, key: str, locked_until: Optional[float]) -> None:
+        if not self.db_path:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            if locked_until is None:
+                cursor.execute('DELETE FROM login_lockouts WHERE lock_key = ?', (key,))
+            else:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO login_lockouts (lock_key, locked_until) VALUES (?, ?)
+                ''', (key, locked_until))
+            conn.commit()
+
+    def _keys(self, username: str, ip: str = None):
+        keys = [('user', f"user:{(username or '').lower()}")]
+        if ip:
+            keys.append(('ip', f"ip:{ip}"))
+        return keys
+
+    def check(self, username: str, ip: str = None) -> None:
+        """Kilitli kullanıcı/IP için veritabanına gitmeden RateLimitExceeded fırlat"""
+        now = time.time()
+        for kind, key in self._keys(username, ip):
+            locked_until = self._lockouts.get(key)
+            if locked_until and locked_until > now:
+                raise RateLimitExceeded("Çok fazla başarısız giriş denemesi", locked_until - now)
+
+            limiter = self.users if kind == 'user' else self.ips
+            wait = limiter.retry_after(key, now)
+            if wait > 0:
+                raise RateLimitExceeded("Çok fazla başarısız giriş denemesi", wait)
+
+    def record_failure(self, username: str, ip: str = None) -> None:
+        """Başarısız girişi say; sınır aşılırsa kilitle"""
+        now = time.time()
+        for kind, key in self._keys(username, ip):
+            limiter = self.users if kind == 'user' else self.ips
+            limiter.hit(key, now)
+            if limiter.retry_after(key, now) <= 0:
+                continue
+
+            locked_until = now + self.lockout_seconds
+            with self._lock:
+                if len(self._lockouts) > 100000:
+                    self._lockouts = {k: v for k, v in self._lockouts.items() if v > now}
+                self._lockouts[key] = locked_until
+            self._persist(key, locked_until)
+
+    def record_success(self, username: str, ip: str = None) -> None:
+        """Başarılı girişte kullanıcı sayacını sıfırla (IP sayacı korunur)"""
+        key = self._keys(username)[0][1]
+        self.users.reset(key)
+        with self._lock:
+            had_lock = self._lockouts.pop(key, None) is not None
+        if had_lock:
+            self._persist(key, None)
+
+
+class RouteLimiter:
+    """Rota adı başına yapılandırılan kayan pencereli sınırlayıcılar"""
+
+    def __init__(self, rules: Dict[str, Dict[str, Any]]):
+        self._limiters = {
+            name: SlidingWindowLimiter(rule['limit'], rule['window_seconds'])
+            for name, rule in rules.items()
+        }
+
+    def hit(self, route: str, client: str) -> None:
+        """İsteği say; sınır aşıldıysa RateLimitExceeded fırlat"""
+        limiter = self._limiters.get(route)
+        if limiter is None:
+            return
+        allowed, wait = limiter.hit(client)
+        if not allowed:
+            raise RateLimitExceeded("İstek sınırı aşıldı", wait)
@@ -0,0 +1,373 @@
+import heapq
+import sqlite3
+import calendar
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Optional, List, Dict, Any, Tuple
+
+from logs import get_logger
+
+logger = get_logger('reminders')
+
+
+_smtp_module = None
+
+
+def _smtplib():
+    """smtplib (ve ssl) yalnızca e-posta gönderilecekse yüklenir"""
+    global _smtp_module
+    if _smtp_module is None:
+        import smtplib
+        _smtp_module = smtplib
+    return _smtp_module
+
+
+def next_occurrence(current: datetime, repeat_interval: Optional[str]) -> Optional[datetime]:
+    """Tekrarlayan hatırlatıcının bir sonraki zamanını hesapla"""
+    if repeat_interval == 'daily':
+        return current + timedelta(days=1)
+    if repeat_interval == 'weekly':
+        return current + timedelta(weeks=1)
+    if repeat_interval == 'monthly':
+        year = current.year + current.month // 12
+        month = current.month % 12 + 1
+        day = min(current.day, calendar.monthrange(year, month)[1])
+        return current.replace(year=year, month=month, day=day)
+    return None
+
+
+class SMTPBatchMailer:
+    """Tek SMTP oturumunda toplu gönderim yapan, bağlantıyı yeniden kullanan postacı"""
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        smtp = _smtplib().SMTP(self.settings['smtp_server'], self.settings['smtp_port'], timeout=30)
+        if self.settings.get('smtp_use_tls'):
+            smtp.starttls()
+        if self.settings.get('smtp_username'):
+            smtp.login(self.settings['smtp_username'], self.settings['smtp_password'])
+        return smtp
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+            except _smtplib().SMTPException:
+                self.close()
+
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def send_batch(self, messages: List[EmailMessage]) -> int:
+        """Mesajları tek bağlantı üzerinden gönder, gönderilen sayıyı döndür"""
+        sent = 0
+        for message in messages:
+            try:
+                self._connection().send_message(message)
+            except _smtplib().SMTPServerDisconnected:
+                # Sunucu boşta kalan bağlantıyı kapatmış olabilir; bir kez yeniden dene
+                self.close()
+                self._connection().send_message(message)
+            sent += 1
+
+        self._last_used = time.monotonic()
+        return sent
+
+    def close_if_idle(self) -> None:
+        """Belirlenen süreden uzun boşta kalan bağlantıyı kapat"""
+        idle_timeout = self.settings.get('smtp_idle_timeout_seconds', 60)
+        if self._smtp is not None and time.monotonic() - self._last_used > idle_timeout:
+            self.close()
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except _smtplib().SMTPException:
+                pass
+            except OSError:
+                pass
+            self._smtp = None
+
+
+class ReminderScheduler:
+    """Zamana göre sıralı min-heap ile hatırlatıcıları tetikleyen servis"""
+
+    def __init__(self, db_path: str, settings: Dict[str, Any],
+                 mailer: Optional[SMTPBatchMailer] = None):
+        self.db_path = db_path
+        self.settings = settings
+        self.mailer = mailer
+        if self.mailer is None and settings.get('email_enabled') and settings.get('smtp_server'):
+            self.mailer = SMTPBatchMailer(settings)
+
+        self.window_size = settings.get('reminder_window', 500)
+        self.max_sleep = settings.get('reminder_max_sleep_seconds', 300)
+        # Başka süreçlerin eklediği hatırlatıcılar bu aralıkla yeniden yüklenir
+        self.refill_interval = settings.get('reminder_refill_seconds', 60)
+        self.batch_size = settings.get('smtp_batch_size', 50)
+
+        self._heap: List[Tuple[datetime, str]] = []
+        self._queued = set()
+        # Heap'e yüklenen en geç zaman; bunun ötesindekiler veritabanında bekler
+        self._horizon: Optional[datetime] = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._next_refill = 0.0
+
+        self.fired_count = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._heap)
+
+    def _push(self, due: datetime, reminder_id: str) -> None:
+        if reminder_id not in self._queued:
+            heapq.heappush(self._heap, (due, reminder_id))
+            self._queued.add(reminder_id)
+
+    def refill(self) -> None:
+        """Sıradaki en yakın hatırlatıcıları indeks üzerinden yükle"""
+        self._next_refill = time.monotonic() + self.refill_interval
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, reminder_date FROM reminders
+                WHERE is_active = 1
+                ORDER BY reminder_date
+                LIMIT ?
+            ''', (self.window_size,))
+            rows = cursor.fetchall()
+
+        with self._condition:
+            self._heap = []
+            self._queued = set()
+            for reminder_id, reminder_date in rows:
+                self._push(datetime.fromisoformat(reminder_date), reminder_id)
+
+            # Pencere dolduysa son kayıttan sonrası henüz yüklenmedi
+            if len(rows) >= self.window_size:
+                self._horizon = datetime.fromisoformat(rows[-1][1])
+            else:
+                self._horizon = None
+
+    def notify(self, reminder_id: str, due: datetime) -> None:
+        """Yeni/güncellenen hatırlatıcıyı sıraya al ve gerekirse servisi uyandır"""
+        with self._condition:
+            if self._horizon is not None and due > self._horizon:
+                return
+            self._push(due, reminder_id)
+            if self._heap[0][1] == reminder_id:
+                self._condition.notify()
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now and len(due_ids) < self.batch_size:
+            _, reminder_id = heapq.heappop(self._heap)
+            self._queued.discard(reminder_id)
+            due_ids.append(reminder_id)
+        return due_ids
+
+    def run_pending(self, now: datetime = None) -> int:
+        """Vadesi gelmiş hatırlatıcıları toplu olarak işle, işlenen sayıyı döndür"""
+        now = now or datetime.now()
+        processed = 0
+
+        while True:
+            with self._condition:
+                due_ids = self._pop_due(now)
+                needs_refill = not self._heap and self._horizon is not None
+            if due_ids:
+                processed += self.fire(due_ids, now)
+            if needs_refill:
+                self.refill()
+                continue
+            if not due_ids:
+                return processed
+
+    def fire(self, reminder_ids: List[str], now: datetime) -> int:
+        """Hatırlatıcıları gönder ve tekrar aralıklarını ilerlet
+
+        Her hatırlatıcı göndermeden önce koşullu UPDATE ile sahiplenilir ve ayrı
+        işlemde kaydedilir: aynı hatırlatıcıyı başka bir süreç göndermez, SMTP
+        partinin ortasında hata verirse önceden gidenler tekrar gönderilmez.
+        Gönderilemeyen hatırlatıcı geri alınır ve sonraki yenilemede denenir.
+        """
+        placeholders = ','.join('?' for _ in reminder_ids)
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT r.id, r.title, r.description, r.reminder_date, r.repeat_interval,
+                       u.email, u.username, d.original_name
+                FROM reminders r
+                JOIN users u ON r.user_id = u.id
+                LEFT JOIN documents d ON r.document_id = d.id
+                WHERE r.id IN ({placeholders}) AND r.is_active = 1
+            ''', reminder_ids)
+            rows = [row for row in cursor.fetchall()
+                    if datetime.fromisoformat(row[3]) <= now]
+
+            fired = 0
+            for row in rows:
+                reminder_id, _, _, reminder_date, repeat_interval, *_ = row
+                next_date = next_occurrence(datetime.fromisoformat(reminder_date), repeat_interval)
+                # Kaçırılan tekrarlar tek tek gönderilmez, ileriye atlanır
+                while next_date is not None and next_date <= now:
+                    next_date = next_occurrence(next_date, repeat_interval)
+
+                if next_date is None:
+                    cursor.execute('''
+                        UPDATE reminders SET is_active = 0
+                        WHERE id = ? AND reminder_date = ? AND is_active = 1
+                    ''', (reminder_id, reminder_date))
+                else:
+                    cursor.execute('''
+                        UPDATE reminders SET reminder_date = ?
+                        WHERE id = ? AND reminder_date = ? AND is_active = 1
+                    ''', (next_date.isoformat(), reminder_id, reminder_date))
+                claimed = cursor.rowcount == 1
+                conn.commit()
+                if not claimed:
+                    continue
+
+                try:
+                    self.deliver([row])
+                except Exception:
+                    cursor.execute('''
+                        UPDATE reminders SET reminder_date = ?, is_active = 1
+                        WHERE id = ? AND reminder_date = ?
+                    ''', (reminder_date, reminder_id,
+                          next_date.isoformat() if next_date else reminder_date))
+                    conn.commit()
+                    self.fired_count += fired
+                    raise
+
+                fired += 1
+                if next_date is not None:
+                    self.notify(reminder_id, next_date)
+
+        self.fired_count += fired
+        return fired
+
+    def deliver(self, rows: List[tuple]) -> None:
+        """Bildirimleri tek SMTP oturumunda gönder (e-posta kapalıysa günlüğe yaz)"""
+        if self.mailer is None:
+            for reminder_id, title, _, _, _, _, username, document_name in rows:
+                logger.info("Hatırlatıcı", extra={'reminder_id': reminder_id, 'username': username,
+                                                  'title': title, 'document_name': document_name})
+            return
+
+        sender = self.settings.get('from_address') or self.settings.get('smtp_username')
+        messages = []
+        for _, title, description, reminder_date, _, email, _, document_name in rows:
+            message = EmailMessage()
+            message['Subject'] = f"Hatırlatıcı: {title}"
+            message['From'] = sender
+            message['To'] = email
+            message.set_content(
+                f"{title}\n\nBelge: {document_name or '-'}\n"
+                f"Tarih: {reminder_date[:16]}\n\n{description or ''}"
+            )
+            messages.append(message)
+
+        self.mailer.send_batch(messages)
+
+    def _seconds_until_next(self) -> float:
+        # Heap meşgul olsa da periyodik yenileme ertelenmez
+        limit = min(self.max_sleep, max(0.0, self._next_refill - time.monotonic()))
+        if not self._heap:
+            return limit
+        delay = (self._heap[0][0] - datetime.now()).total_seconds()
+        return max(0.0, min(delay, limit))
+
+    def run_forever(self) -> None:
+        """Sıradaki hatırlatıcının zamanı geldiğinde veya yenileme aralığında uyanan döngü"""
+        self._running = True
+        self.refill()
+
+        while self._running:
+            with self._condition:
+                timeout = self._seconds_until_next()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+
+            if not self._running:
+                break
+
+            try:
+                # Başka süreçlerin eklediği hatırlatıcılar sabit aralıkla yüklenir
+                if time.monotonic() >= self._next_refill:
+                    self.refill()
+                self.run_pending()
+                if self.mailer is not None:
+                    self.mailer.close_if_idle()
+            except Exception:
+                logger.exception("Hatırlatıcı servisi hatası")
+
+        if self.mailer is not None:
+            self.mailer.close()
+
+    def start(self) -> None:
+        """Servisi arka plan iş parçacığında başlat"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run_forever, name="reminder-scheduler",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        with self._condition:
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon hatırlatıcı servisi")
+    parser.add_argument('--once', action='store_true',
+                        help='Vadesi gelenleri işle ve çık (cron/test için)')
+    parser.add_argument('--smtp-server', help='SMTP sunucusunu geçersiz kıl (ör. yerel test sunucusu)')
+    parser.add_argument('--smtp-port', type=int)
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+
+    settings = dict(doxagon.config['notifications'])
+    if args.smtp_server:
+        settings.update(email_enabled=True, smtp_server=args.smtp_server,
+                        smtp_use_tls=False, smtp_username=None)
+    if args.smtp_port:
+        settings['smtp_port'] = args.smtp_port
+
+    scheduler = ReminderScheduler(doxagon.db.db_path, settings)
+
+    if args.once:
+        scheduler.refill()
+        count = scheduler.run_pending()
+        if scheduler.mailer is not None:
+            scheduler.mailer.close()
+        print(f"✅ {count} hatırlatıcı gönderildi")
+        return
+
+    print("⏰ Hatırlatıcı servisi çalışıyor (durdurmak için Ctrl+C)")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+        print("👋 Hatırlatıcı servisi durduruldu")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import json
+import time
+import shutil
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any
+
+from quota import release
+from events import record_many
+from sync import add_tombstones
+
+# Belgeye bağlı satırların silineceği tablolar (belgenin kendisinden önce)
+DEPENDENT_TABLES = [
+    ('document_versions', 'document_id'),
+    ('document_tags', 'document_id'),
+    ('document_metadata', 'document_id'),
+    ('document_texts', 'document_id'),
+    ('share_links', 'document_id'),
+    ('reminders', 'document_id'),
+]
+
+
+class RetentionEnforcer:
+    """Saklama süresi dolan belgeleri önce pasifleştirip sonra kalıcı olarak temizler"""
+
+    def __init__(self, manager, batch_size: int = None, dry_run: bool = False):
+        self.manager = manager
+        self.settings = manager.config['retention']
+        self.batch_size = batch_size or self.settings['batch_size']
+        self.dry_run = dry_run
+
+        self._throttle_started = time.monotonic()
+        self._throttle_bytes = 0
+
+    def _throttle(self, bytes_done: int) -> None:
+        """Disk G/Ç hızını yapılandırılan sınırın altında tut"""
+        limit = self.settings['max_bytes_per_second']
+        if not limit:
+            return
+
+        self._throttle_bytes += bytes_done
+        expected = self._throttle_bytes / limit
+        elapsed = time.monotonic() - self._throttle_started
+        if expected > elapsed:
+            time.sleep(expected - elapsed)
+
+    def _pause(self) -> None:
+        """Partiler arasında diğer yazarların kilidi alabilmesi için bekle"""
+        pause_ms = self.settings['pause_between_batches_ms']
+        if pause_ms:
+            time.sleep(pause_ms / 1000)
+
+    def _system_log(self, cursor, action: str, details: str) -> None:
+        cursor.execute('''
+            INSERT INTO audit_logs (id, user_id, action, resource_type, resource_id, details)
+            VALUES (lower(hex(randomblob(16))), NULL, ?, 'document', 'retention', ?)
+        ''', (action, details))
+
+    def expire(self, now: datetime = None, max_batches: int = None) -> Dict[str, Any]:
+        """Saklama süresi dolmuş aktif belgeleri partiler halinde pasifleştir"""
+        now_iso = (now or datetime.now()).isoformat()
+        report = {'documents': 0, 'bytes': 0, 'batches': 0, 'sample': []}
+        last_key = ('', '')
+
+        while max_batches is None or report['batches'] < max_batches:
+            with self.manager.db.connect() as conn:
+                cursor = conn.cursor()
+                # Deneme modunda satırlar değişmediği için anahtar tabanlı sayfalama yapılır
+                cursor.execute('''
+                    SELECT id, retention_date, original_name, file_size, organization_id
+                    FROM documents
+                    WHERE is_active = 1 AND retention_date < ?
+                      AND (retention_date, id) > (?, ?)
+                    ORDER BY retention_date, id
+                    LIMIT ?
+                ''', (now_iso, *last_key, self.batch_size))
+                rows = cursor.fetchall()
+
+                if not rows:
+                    break
+
+                ids = [row[0] for row in rows]
+                if not self.dry_run:
+                    placeholders = ','.join('?' for _ in ids)
+                    cursor.execute(f'''
+                        UPDATE documents
+                        SET is_active = 0, deleted_at = CURRENT_TIMESTAMP,
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE id IN ({placeholders})
+                    ''', ids)
+                    # Pasifleşen belgeler organizasyonun belge sayısından düşülür
+                    for organization_id, count in Counter(row[4] for row in rows).items():
+                        release(cursor, organization_id, documents=count)
+                    record_many(cursor, 'document.expired',
+                                ((row[4], 'document', row[0]) for row in rows))
+                    add_tombstones(cursor, ((row[0], row[4]) for row in rows))
+                    self._system_log(cursor, 'RETENTION_EXPIRE',
+                                     f"{len(ids)} belge saklama süresi dolduğu için pasifleştirildi")
+                    conn.commit()
+
+            report['documents'] += len(rows)
+            report['bytes'] += sum(row[3] or 0 for row in rows)
+            report['batches'] += 1
+            if len(report['sample']) < 100:
+                report['sample'].extend(
+                    {'id': row[0], 'name': row[2], 'retention_date': row[1]}
+                    for row in rows[:100 - len(report['sample'])]
+                )
+
+            last_key = (rows[-1][1], rows[-1][0])
+            self.manager.events.dispatch()
+            self._pause()
+
+        return report
+
+    def _collect_files(self, cursor, document_ids: List[str]) -> List[Path]:
+        placeholders = ','.join('?' for _ in document_ids)
+        cursor.execute(f'''
+            SELECT thumbnail_path FROM documents
+            WHERE id IN ({placeholders}) AND thumbnail_path IS NOT NULL
+        ''', document_ids)
+        files = [Path(row[0]) for row in cursor.fetchall()]
+        files.extend(self.manager.uploads_dir / document_id for document_id in document_ids)
+        return files
+
+    def _remove(self, path: Path) -> int:
+        """Dosya veya dizini sil, serbest kalan bayt sayısını döndür"""
+        if not path.exists():
+            return 0
+
+        if path.is_dir():
+            freed = 0
+            for child in path.rglob('*'):
+                if child.is_file():
+                    size = child.stat().st_size
+                    child.unlink()
+                    freed += size
+                    self._throttle(size)
+            shutil.rmtree(path, ignore_errors=True)
+            return freed
+
+        size = path.stat().st_size
+        path.unlink()
+        self._throttle(size)
+        return size
+
+    def purge(self, now: datetime = None, max_batches: int = None) -> Dict[str, Any]:
+        """Bekleme süresini doldurmuş pasif belgeleri ve dosyalarını kalıcı olarak sil"""
+        # deleted_at CURRENT_TIMESTAMP ile (UTC) yazılır, karşılaştırma da UTC yapılır
+        now = now or datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=self.settings['grace_days'])).strftime('%Y-%m-%d %H:%M:%S')
+        report = {'documents': 0, 'bytes': 0, 'files': 0, 'batches': 0, 'sample': []}
+        last_id = ''
+
+        while max_batches is None or report['batches'] < max_batches:
+            with self.manager.db.connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, original_name, organization_id FROM documents
+                    WHERE is_active = 0 AND deleted_at IS NOT NULL AND deleted_at < ?
+                      AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (cutoff, last_id, self.batch_size))
+                rows = cursor.fetchall()
+
+                if not rows:
+                    break
+
+                ids = [row[0] for row in rows]
+                files = self._collect_files(cursor, ids)
+                placeholders = ','.join('?' for _ in ids)
+                cursor.execute(f'''
+                    SELECT d.organization_id, COALESCE(SUM(v.file_size), 0)
+                    FROM document_versions v
+                    JOIN documents d ON v.document_id = d.id
+                    WHERE v.document_id IN ({placeholders})
+                    GROUP BY d.organization_id
+                ''', ids)
+                freed_by_org = cursor.fetchall()
+                report['bytes'] += sum(freed for _, freed in freed_by_org)
+
+            if not self.dry_run:
+                # Önce dosyalar: yarıda kesilirse satırlar kalır ve sonraki çalıştırma devam eder
+                for path in files:
+                    if path.exists():
+                        report['files'] += 1
+                    self._remove(path)
+
+                with self.manager.db.connect() as conn:
+                    cursor = conn.cursor()
+                    for table, column in DEPENDENT_TABLES:
+                        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', ids)
+                    cursor.execute(f'''
+                        DELETE FROM workflow_steps WHERE workflow_id IN (
+                            SELECT id FROM workflows WHERE document_id IN ({placeholders})
+                        )
+                    ''', ids)
+                    cursor.execute(f'DELETE FROM workflows WHERE document_id IN ({placeholders})', ids)
+                    cursor.execute(f'DELETE FROM documents WHERE id IN ({placeholders})', ids)
+                    for organization_id, freed in freed_by_org:
+                        release(cursor, organization_id, storage_bytes=freed)
+                    record_many(cursor, 'document.purged',
+                                ((row[2], 'document', row[0]) for row in rows))
+                    self._system_log(cursor, 'RETENTION_PURGE',
+                                     f"{len(ids)} belge kalıcı olarak silindi")
+                    conn.commit()
+
+            report['documents'] += len(rows)
+            report['batches'] += 1
+            if len(report['sample']) < 100:
+                report['sample'].extend(
+                    {'id': row[0], 'name': row[1]} for row in rows[:100 - len(report['sample'])]
+                )
+
+            last_id = ids[-1]
+            self.manager.events.dispatch()
+            self._pause()
+
+        return report
+
+    def run(self, now: datetime = None, max_batches: int = None) -> Dict[str, Any]:
+        """Pasifleştirme ve kalıcı silme adımlarını sırayla çalıştır"""
+        return {
+            'dry_run': self.dry_run,
+            'expired': self.expire(now, max_batches),
+            'purged': self.purge(max_batches=max_batches)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon saklama politikası uygulayıcı")
+    parser.add_argument('--dry-run', action='store_true', help='Hiçbir şeyi silmeden rapor üret')
+    parser.add_argument('--batch-size', type=int, help='Parti başına belge sayısı')
+    parser.add_argument('--max-batches', type=int, help='Bu çalıştırmada işlenecek en fazla parti')
+    parser.add_argument('--phase', choices=['expire', 'purge', 'all'], default='all')
+    parser.add_argument('--json', action='store_true', help='Raporu JSON olarak yaz')
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+    enforcer = RetentionEnforcer(doxagon, args.batch_size, args.dry_run)
+
+    if args.phase == 'expire':
+        report = {'dry_run': args.dry_run, 'expired': enforcer.expire(max_batches=args.max_batches)}
+    elif args.phase == 'purge':
+        report = {'dry_run': args.dry_run, 'purged': enforcer.purge(max_batches=args.max_batches)}
+    else:
+        report = enforcer.run(max_batches=args.max_batches)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    prefix = "🔍 (deneme) " if args.dry_run else "✅ "
+    if 'expired' in report:
+        expired = report['expired']
+        print(f"{prefix}Süresi dolan: {expired['documents']} belge "
+              f"({doxagon.format_size(expired['bytes'])})")
+    if 'purged' in report:
+        purged = report['purged']
+        print(f"{prefix}Kalıcı silinen: {purged['documents']} belge, {purged['files']} dosya "
+              f"({doxagon.format_size(purged['bytes'])})")
+
+
+if __name__ == "__main__":
+    main()
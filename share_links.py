@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple, Dict, Any
+
+# resolve() sonuçları
+SHARE_OK = 'ok'
+SHARE_INVALID = 'invalid'
+SHARE_EXPIRED = 'expired'
+SHARE_EXHAUSTED = 'exhausted'
+SHARE_PASSWORD = 'password'
+
+
+class ShareInfo:
+    """Doğrulanmış paylaşım linki bilgisi (önbellekte tutulur)"""
+
+    __slots__ = ('id', 'document_id', 'original_name', 'file_path', 'storage_format',
+                 'expires_at', 'password_hash', 'max_downloads', 'exhausted')
+
+    def __init__(self, row: tuple):
+        (self.id, self.document_id, expires_at, self.password_hash, self.max_downloads,
+         download_count, self.original_name, self.file_path, self.storage_format) = row
+        # Tarih yalnızca önbelleğe alınırken bir kez ayrıştırılır
+        self.expires_at = datetime.fromisoformat(expires_at) if expires_at else None
+        # max_downloads NULL veya 0: sınırsız (consume() ile aynı kural)
+        self.exhausted = bool(self.max_downloads) and download_count >= self.max_downloads
+
+
+class ShareLinkResolver:
+    """Paylaşım token'larını TTL'li bellek önbelleği üzerinden çözer"""
+
+    def __init__(self, db_path: str, ttl_seconds: float = 60, negative_ttl_seconds: float = 30,
+                 max_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        self.max_entries = max_entries
+
+        # token -> (geçerlilik sonu, ShareInfo veya geçersiz token için None)
+        self._cache: "OrderedDict[str, Tuple[float, Optional[ShareInfo]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, token: str) -> Optional[ShareInfo]:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT sl.id, sl.document_id, sl.expires_at, sl.password_hash,
+                       sl.max_downloads, sl.download_count, d.original_name, d.file_path,
+                       d.storage_format
+                FROM share_links sl
+                JOIN documents d ON sl.document_id = d.id
+                WHERE sl.token = ? AND sl.is_active = 1 AND d.is_active = 1
+            ''', (token,))
+            row = cursor.fetchone()
+
+        return ShareInfo(row) if row else None
+
+    def _lookup(self, token: str) -> Optional[ShareInfo]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(token)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        info = self._load(token)
+        ttl = self.ttl if info is not None else self.negative_ttl
+
+        with self._lock:
+            self._cache[token] = (now + ttl, info)
+            self._cache.move_to_end(token)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return info
+
+    def resolve(self, token: str) -> Tuple[str, Optional[ShareInfo]]:
+        """Token'ı doğrula ve durumunu döndür"""
+        info = self._lookup(token)
+        if info is None:
+            return SHARE_INVALID, None
+        if info.expires_at is not None and datetime.now() > info.expires_at:
+            return SHARE_EXPIRED, info
+        if info.exhausted:
+            return SHARE_EXHAUSTED, info
+        if info.password_hash:
+            return SHARE_PASSWORD, info
+        return SHARE_OK, info
+
+    def consume(self, info: ShareInfo) -> bool:
+        """İndirme hakkını atomik olarak düş; sınır aşıldıysa veya belge silindiyse False döndür
+
+        Önbellekteki kayıt başka bir süreçte silinmiş (veya saklama süresi
+        dolup temizlenmiş) bir belgeyi gösterebilir; koşul veritabanında
+        yeniden denetlenir ve dosya konumu güncel satırdan okunur.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            # Koşullu UPDATE: eşzamanlı isteklerde max_downloads aşılamaz
+            cursor.execute('''
+                UPDATE share_links SET download_count = download_count + 1
+                WHERE id = ? AND is_active = 1
+                  AND (max_downloads IS NULL OR max_downloads = 0
+                       OR download_count < max_downloads)
+                  AND EXISTS (SELECT 1 FROM documents
+                              WHERE id = share_links.document_id AND is_active = 1)
+            ''', (info.id,))
+            consumed = cursor.rowcount == 1
+            cursor.execute('''
+                SELECT file_path, storage_format FROM documents WHERE id = ? AND is_active = 1
+            ''', (info.document_id,))
+            row = cursor.fetchone()
+            conn.commit()
+
+        if row is None:
+            self.invalidate(document_id=info.document_id)
+        elif consumed:
+            info.file_path, info.storage_format = row
+        else:
+            info.exhausted = True
+        return consumed
+
+    def invalidate(self, token: str = None, document_id: str = None) -> None:
+        """Önbellekteki kayıtları düşür (token, belge veya tümü)"""
+        with self._lock:
+            if token is not None:
+                self._cache.pop(token, None)
+            elif document_id is not None:
+                for key in [key for key, (_, info) in self._cache.items()
+                            if info is not None and info.document_id == document_id]:
+                    del self._cache[key]
+            else:
+                self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Önbellek isabet istatistikleri"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
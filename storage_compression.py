@@ -0,0 +1,314 @@
+import io
+import zlib
+import struct
+import sqlite3
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union, BinaryIO, Dict, Any, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Sıkıştırılmış blob/metin formatı:
+#   [magic][codec (1 bayt)][orijinal boyut (8 bayt)][sıkıştırılmış akış]
+MAGIC = b"DXZIP01\n"
+HEADER_STRUCT = struct.Struct(">8sBQ")
+HEADER_SIZE = HEADER_STRUCT.size
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {"zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+CODEC_NAMES = {code: name for name, code in CODECS.items()}
+
+# Blob depo formatı (documents/document_versions.storage_format): katmanlar '+'
+# ile birleştirilir, ör. 'enc+zlib'; hiçbiri yoksa 'plain'. Format kaydı olmayan
+# eski satırlarda katmanlar dosya başındaki magic baytlardan anlaşılır.
+FORMAT_PLAIN = 'plain'
+FORMAT_ENCRYPTED = 'enc'
+
+CHUNK_SIZE = 64 * 1024
+
+
+def resolve_codec(name: str) -> int:
+    """Yapılandırmadaki codec adını çöz (zstd yoksa zlib'e düş)"""
+    codec = CODECS.get(name, CODEC_ZLIB)
+    if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+        return CODEC_ZLIB
+    return codec
+
+
+def _compressor(codec: int, level: int):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    return zlib.compressobj(level)
+
+
+def _decompressor(codec: int):
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd ile sıkıştırılmış veri için 'zstandard' paketi gerekli")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj()
+
+
+def storage_format(codec: Optional[int], encrypted: bool) -> str:
+    """Yazılan blob'un katmanlarını DB'de saklanacak format değerine çevir"""
+    layers = ([FORMAT_ENCRYPTED] if encrypted else []) + ([CODEC_NAMES[codec]] if codec else [])
+    return '+'.join(layers) or FORMAT_PLAIN
+
+
+def storage_layers(value: Optional[str]) -> Tuple[Optional[bool], Optional[bool]]:
+    """Format değerinden (sıkıştırılmış, şifreli); kayıt yoksa (None, None)"""
+    if not value:
+        return None, None
+    layers = value.split('+')
+    return any(layer in CODECS for layer in layers), FORMAT_ENCRYPTED in layers
+
+
+def is_compressed(file_path) -> bool:
+    """Dosyanın sıkıştırılmış blob formatında olup olmadığını kontrol et"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class CompressingReader(io.RawIOBase):
+    """Kaynağı okurken sıkıştıran akış (şifreleme katmanına girdi olarak verilebilir)"""
+
+    def __init__(self, source: BinaryIO, original_size: int,
+                 codec: int = CODEC_ZLIB, level: int = 6):
+        super().__init__()
+        self._source = source
+        self._compressor = _compressor(codec, level)
+        self._pending = bytearray(HEADER_STRUCT.pack(MAGIC, codec, original_size))
+        self._eof = False
+        self.bytes_out = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size is None or size < 0 or len(self._pending) < size):
+            chunk = self._source.read(CHUNK_SIZE)
+            if chunk:
+                self._pending += self._compressor.compress(chunk)
+            else:
+                self._pending += self._compressor.flush()
+                self._eof = True
+
+        if size is None or size < 0:
+            size = len(self._pending)
+
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        self.bytes_out += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class DecompressingReader(io.RawIOBase):
+    """Sıkıştırılmış blob'u akış halinde açan okuyucu (ileri seek açarak atlar)"""
+
+    def __init__(self, raw: BinaryIO):
+        super().__init__()
+        self._raw = raw
+        header = raw.read(HEADER_SIZE)
+        magic, self._codec, self.size = HEADER_STRUCT.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("Sıkıştırılmış blob başlığı geçersiz")
+        self._reset()
+
+    def _reset(self):
+        self._raw.seek(HEADER_SIZE)
+        self._decompressor = _decompressor(self._codec)
+        self._buffer = bytearray()
+        self._raw_eof = False
+        self._position = 0
+
+    def _fill(self, wanted: int):
+        """Arabellekte en az istenen kadar açılmış veri biriktir"""
+        while len(self._buffer) < wanted and not self._raw_eof:
+            if self._codec == CODEC_ZLIB:
+                data = self._decompressor.unconsumed_tail or self._raw.read(CHUNK_SIZE)
+                if not data:
+                    self._buffer += self._decompressor.flush()
+                    self._raw_eof = True
+                    break
+                limit = max(wanted - len(self._buffer), CHUNK_SIZE)
+                self._buffer += self._decompressor.decompress(data, limit)
+            else:
+                data = self._raw.read(CHUNK_SIZE)
+                if not data:
+                    self._raw_eof = True
+                    break
+                self._buffer += self._decompressor.decompress(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = max(0, self.size - self._position)
+
+        self._fill(size)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        target = min(max(0, offset), self.size)
+
+        # Geriye seek akışı baştan başlatır, ileri seek açıp atar
+        if target < self._position:
+            self._reset()
+        while self._position < target:
+            if not self.read(min(CHUNK_SIZE, target - self._position)):
+                break
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+
+def wrap_decompress(raw: BinaryIO, compressed: Optional[bool] = None) -> BinaryIO:
+    """Açık blob sıkıştırılmışsa açan okuyucu ile sar (bilinmiyorsa başlığa bakılır)"""
+    if compressed is None:
+        compressed = raw.read(len(MAGIC)) == MAGIC
+        raw.seek(0)
+    if compressed:
+        return DecompressingReader(raw)
+    return raw
+
+
+def compress_text(text: str, codec: int = CODEC_ZLIB, level: int = 6) -> bytes:
+    """Metni sıkıştırılmış BLOB değerine çevir"""
+    data = text.encode('utf-8')
+    compressor = _compressor(codec, level)
+    return HEADER_STRUCT.pack(MAGIC, codec, len(data)) + compressor.compress(data) + compressor.flush()
+
+
+def decompress_text(value: Union[str, bytes, None]) -> Optional[str]:
+    """Sıkıştırılmış BLOB değerini metne çevir (düz metin olduğu gibi döner)"""
+    if not isinstance(value, bytes):
+        return value
+    if not value.startswith(MAGIC):
+        return value.decode('utf-8', errors='ignore')
+
+    _, codec, _ = HEADER_STRUCT.unpack(value[:HEADER_SIZE])
+    decompressor = _decompressor(codec)
+    data = decompressor.decompress(value[HEADER_SIZE:])
+    if codec == CODEC_ZLIB:
+        data += decompressor.flush()
+    return data.decode('utf-8', errors='ignore')
+
+
+def record_savings(cursor: sqlite3.Cursor, target: str, original_bytes: int,
+                   stored_bytes: int) -> None:
+    """Sıkıştırma kazancını istatistik tablosuna ekle"""
+    cursor.execute('''
+        INSERT INTO compression_stats (target, items, original_bytes, stored_bytes, updated_at)
+        VALUES (?, 1, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(target) DO UPDATE SET
+            items = items + 1,
+            original_bytes = original_bytes + excluded.original_bytes,
+            stored_bytes = stored_bytes + excluded.stored_bytes,
+            updated_at = CURRENT_TIMESTAMP
+    ''', (target, original_bytes, stored_bytes))
+
+
+def sweep_cold_documents(manager, older_than_days: int = None, batch_size: int = 100,
+                         dry_run: bool = False) -> Dict[str, Any]:
+    """Uzun süredir erişilmeyen belgelerin blob ve OCR metnini sıkıştır"""
+    settings = manager.config['compression']
+    older_than_days = older_than_days or settings['cold_after_days']
+    # Zaman damgaları CURRENT_TIMESTAMP ile (UTC) yazılır
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    report = {'documents': 0, 'blobs': 0, 'texts': 0, 'saved_bytes': 0, 'dry_run': dry_run}
+    last_id = ''
+
+    while True:
+        with manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id FROM documents
+                WHERE compressed_at IS NULL AND id > ?
+                  AND COALESCE(last_accessed_at, updated_at, created_at) < ?
+                ORDER BY id LIMIT ?
+            ''', (last_id, cutoff, batch_size))
+            document_ids = [row[0] for row in cursor.fetchall()]
+
+        if not document_ids:
+            return report
+
+        for document_id in document_ids:
+            result = manager.compress_document(document_id, dry_run=dry_run)
+            report['documents'] += 1
+            report['blobs'] += result['blobs']
+            report['texts'] += result['texts']
+            report['saved_bytes'] += result['saved_bytes']
+
+        last_id = document_ids[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon soğuk depolama sıkıştırma katmanı")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sweep_parser = subparsers.add_parser('sweep', help='Soğuk belgeleri sıkıştır')
+    sweep_parser.add_argument('--days', type=int, help='Bu kadar gündür erişilmeyen belgeler')
+    sweep_parser.add_argument('--batch-size', type=int, default=100)
+    sweep_parser.add_argument('--dry-run', action='store_true', help='Yalnızca rapor üret')
+    subparsers.add_parser('stats', help='Sıkıştırma kazancını göster')
+
+    args = parser.parse_args()
+
+    from main import DoxagonEnterpriseManager
+    doxagon = DoxagonEnterpriseManager()
+
+    if args.command == 'sweep':
+        report = sweep_cold_documents(doxagon, args.days, args.batch_size, args.dry_run)
+        prefix = "🔍 (deneme) " if args.dry_run else "✅ "
+        print(f"{prefix}{report['documents']} belge tarandı, {report['blobs']} blob ve "
+              f"{report['texts']} OCR metni sıkıştırıldı")
+        print(f"💾 Kazanılan alan: {doxagon.format_size(report['saved_bytes'])}")
+        return
+
+    stats = doxagon.get_compression_stats()
+    for target, values in stats.items():
+        print(f"📦 {target}: {values['items']} öğe, "
+              f"{doxagon.format_size(values['original_bytes'])} → "
+              f"{doxagon.format_size(values['stored_bytes'])} "
+              f"(kazanç: {doxagon.format_size(values['saved_bytes'])}, "
+              f"oran: {values['ratio']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
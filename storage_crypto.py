@@ -0,0 +1,419 @@
+import os
+import io
+import json
+import base64
+import struct
+import secrets
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Iterator, BinaryIO
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.exceptions import InvalidTag
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+# Şifreli blob dosya formatı:
+#   [başlık][segment 0][segment 1]...[segment n-1]
+# Her segment = AES-GCM(segment_size bayt düz metin) + 16 bayt etiket.
+# Son segment daha kısa olabilir ve AAD içinde "son" bayrağı taşır; böylece
+# dosya sonundan kırpma veya segment sırasını değiştirme tespit edilir.
+MAGIC = b"DXENC01\n"
+FORMAT_VERSION = 1
+TAG_SIZE = 16
+KEY_ID_SIZE = 16
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+
+# Konfigürasyonda storage.key_file yoksa (depolama dizinine göreli)
+DEFAULT_KEY_FILE = "keys/keyring.json"
+
+# magic, versiyon, segment boyutu, anahtar kimliği, sarma nonce'u,
+# sarılmış veri anahtarı (32 + 16 etiket), segment taban nonce'u
+HEADER_STRUCT = struct.Struct(">8sBI16s12s48s8s")
+HEADER_SIZE = HEADER_STRUCT.size
+
+
+class KeyRing:
+    """Yerel dosya tabanlı anahtar halkası (anahtar şifreleme anahtarları)"""
+
+    def __init__(self, key_file):
+        self.key_file = Path(key_file)
+        self.active_key_id = None
+        self.keys: Dict[str, bytes] = {}
+        self.load()
+
+    def load(self):
+        """Anahtar dosyasını yükle, yoksa ilk anahtarı oluştur"""
+        if not self.key_file.exists() and self._create():
+            return
+
+        with open(self.key_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        keys = {
+            key_id: base64.b64decode(entry['key'])
+            for key_id, entry in data['keys'].items()
+        }
+        self.keys = keys
+        self.active_key_id = data['active']
+
+    def _create(self) -> bool:
+        """İlk anahtarı yalnızca dosya hâlâ yoksa yaz; yarışı kaybeden False alır
+
+        Aynı anda açılan işçiler kendi anahtarlarını üretip birbirinin
+        dosyasının üzerine yazarsa, kaybedenlerin şifrelediği dosyalar artık
+        var olmayan bir anahtarla sarılmış kalır. os.link hedef varsa başarısız
+        olduğundan dosyayı tek bir işçi oluşturur, diğerleri onu okur.
+        """
+        key_id = secrets.token_hex(KEY_ID_SIZE // 2)
+        key = AESGCM.generate_key(bit_length=256)
+        tmp_file = self._write_tmp({
+            'active': key_id,
+            'keys': {key_id: {'key': base64.b64encode(key).decode('ascii'),
+                              'created_at': datetime.now().isoformat()}}
+        })
+        try:
+            os.link(tmp_file, self.key_file)
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp_file)
+
+        self.keys = {key_id: key}
+        self.active_key_id = key_id
+        return True
+
+    def _write_tmp(self, data: Dict) -> Path:
+        """Yazıcıya özgü geçici dosyaya yalnızca sahibinin okuyabileceği şekilde yaz"""
+        self.key_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.key_file.with_name(
+            f"{self.key_file.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return tmp_file
+
+    def save(self, created: Dict[str, str] = None):
+        """Anahtar halkasını yalnızca sahibinin okuyabileceği şekilde yaz"""
+        existing = {}
+        if self.key_file.exists():
+            with open(self.key_file, 'r', encoding='utf-8') as f:
+                existing = json.load(f).get('keys', {})
+
+        # Başka bir süreçte eklenmiş anahtarlar düşürülmez
+        for key_id, entry in existing.items():
+            self.keys.setdefault(key_id, base64.b64decode(entry['key']))
+
+        data = {
+            'active': self.active_key_id,
+            'keys': {
+                key_id: {
+                    'key': base64.b64encode(key).decode('ascii'),
+                    'created_at': (created or {}).get(key_id)
+                    or existing.get(key_id, {}).get('created_at')
+                }
+                for key_id, key in self.keys.items()
+            }
+        }
+
+        os.replace(self._write_tmp(data), self.key_file)
+
+    def rotate(self) -> str:
+        """Yeni anahtar üret ve aktif yap; eski anahtarlar çözme için saklanır"""
+        key_id = secrets.token_hex(KEY_ID_SIZE // 2)
+        self.keys[key_id] = AESGCM.generate_key(bit_length=256)
+        self.active_key_id = key_id
+        self.save({key_id: datetime.now().isoformat()})
+        return key_id
+
+    def get(self, key_id: str) -> bytes:
+        """Kimliği verilen anahtarı döndür
+
+        Bilinmeyen kimlikte dosya bir kez yeniden okunur; başka bir süreçte
+        (ör. rotate --rewrap) eklenen anahtarlar yeniden başlatmadan görülür.
+        """
+        if key_id not in self.keys:
+            self.load()
+        if key_id not in self.keys:
+            raise KeyError(f"Anahtar bulunamadı: {key_id}")
+        return self.keys[key_id]
+
+    @property
+    def active_key(self) -> bytes:
+        return self.keys[self.active_key_id]
+
+
+def is_encrypted(file_path) -> bool:
+    """Dosyanın şifreli blob formatında olup olmadığını kontrol et"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _segment_aad(segment_size: int, base_nonce: bytes, index: int, final: bool) -> bytes:
+    return MAGIC + struct.pack(">BI8sIB", FORMAT_VERSION, segment_size, base_nonce, index, final)
+
+
+def _segment_nonce(base_nonce: bytes, index: int) -> bytes:
+    return base_nonce + struct.pack(">I", index)
+
+
+def _wrap_aad(key_id: bytes) -> bytes:
+    return MAGIC + key_id
+
+
+def _build_header(keyring: KeyRing, data_key: bytes, segment_size: int,
+                  base_nonce: bytes) -> bytes:
+    key_id = keyring.active_key_id.encode('ascii')
+    wrap_nonce = secrets.token_bytes(12)
+    wrapped = AESGCM(keyring.active_key).encrypt(wrap_nonce, data_key, _wrap_aad(key_id))
+    return HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, segment_size, key_id,
+                              wrap_nonce, wrapped, base_nonce)
+
+
+def encrypt_stream(source: BinaryIO, dest: BinaryIO, keyring: KeyRing,
+                   segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+    """Kaynağı segment segment şifreleyerek hedefe yaz, düz metin boyutunu döndür"""
+    data_key = AESGCM.generate_key(bit_length=256)
+    base_nonce = secrets.token_bytes(8)
+    aead = AESGCM(data_key)
+
+    dest.write(_build_header(keyring, data_key, segment_size, base_nonce))
+
+    # Son segmenti işaretleyebilmek için bir segment ileriyi oku
+    total = 0
+    index = 0
+    current = source.read(segment_size)
+    while True:
+        following = source.read(segment_size) if len(current) == segment_size else b""
+        final = not following
+        dest.write(aead.encrypt(
+            _segment_nonce(base_nonce, index), current,
+            _segment_aad(segment_size, base_nonce, index, final)
+        ))
+        total += len(current)
+        if final:
+            return total
+        current = following
+        index += 1
+
+
+def encrypt_file(source_path, dest_path, keyring: KeyRing,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+    """Dosyayı şifreli blob olarak kaydet"""
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        return encrypt_stream(src, dst, keyring, segment_size)
+
+
+class DecryptingReader(io.RawIOBase):
+    """Şifreli blob için rastgele erişimli, akış halinde çözen okuyucu"""
+
+    def __init__(self, file_path, keyring: KeyRing):
+        super().__init__()
+        self._file = open(file_path, 'rb')
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            self._file.close()
+            raise ValueError("Şifreli blob başlığı eksik")
+
+        (magic, version, self.segment_size, key_id, wrap_nonce,
+         wrapped, self._base_nonce) = HEADER_STRUCT.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._file.close()
+            raise ValueError("Desteklenmeyen blob formatı")
+
+        kek = keyring.get(key_id.decode('ascii'))
+        self._aead = AESGCM(AESGCM(kek).decrypt(wrap_nonce, wrapped, _wrap_aad(key_id)))
+
+        body_size = os.fstat(self._file.fileno()).st_size - HEADER_SIZE
+        stored_segment = self.segment_size + TAG_SIZE
+        self.segment_count = max(1, -(-body_size // stored_segment))
+        self.size = body_size - self.segment_count * TAG_SIZE
+
+        self._position = 0
+        self._cached_index = None
+        self._cached_plain = b""
+
+    def _segment(self, index: int) -> bytes:
+        """Tek bir segmenti çöz (son çözülen segment önbellekte tutulur)"""
+        if index == self._cached_index:
+            return self._cached_plain
+
+        stored_segment = self.segment_size + TAG_SIZE
+        self._file.seek(HEADER_SIZE + index * stored_segment)
+        ciphertext = self._file.read(stored_segment)
+        final = index == self.segment_count - 1
+        try:
+            plain = self._aead.decrypt(
+                _segment_nonce(self._base_nonce, index), ciphertext,
+                _segment_aad(self.segment_size, self._base_nonce, index, final)
+            )
+        except InvalidTag:
+            raise ValueError(f"Blob bütünlük doğrulaması başarısız (segment {index})")
+
+        self._cached_index = index
+        self._cached_plain = plain
+        return plain
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = self.size + offset
+        self._position = max(0, self._position)
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        """Segment sınırlarını aşarak istenen kadar bayt oku"""
+        if size is None or size < 0:
+            size = max(0, self.size - self._position)
+
+        parts = []
+        while size > 0:
+            chunk = super().read(size)
+            if not chunk:
+                break
+            parts.append(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+
+        index, offset = divmod(self._position, self.segment_size)
+        chunk = self._segment(index)[offset:offset + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def open_blob(file_path, keyring: Optional[KeyRing] = None,
+              encrypted: Optional[bool] = None) -> BinaryIO:
+    """Blob'u aç; şifreliyse çözen okuyucu, değilse düz dosya döndür
+
+    encrypted verilmezse (format kaydı olmayan eski blob) başlığa bakılır.
+    """
+    if encrypted is None:
+        encrypted = is_encrypted(file_path)
+    if encrypted:
+        if keyring is None:
+            raise ValueError("Şifreli blob için anahtar halkası gerekli")
+        return DecryptingReader(file_path, keyring)
+
+    return open(file_path, 'rb')
+
+
+def blob_size(reader: BinaryIO) -> int:
+    """Açık blob'un düz metin boyutu"""
+    size = getattr(reader, 'size', None)
+    if size is not None:
+        return size
+    return os.fstat(reader.fileno()).st_size
+
+
+def iter_blob(reader: BinaryIO, start: int = 0, end: Optional[int] = None,
+              chunk_size: int = DEFAULT_SEGMENT_SIZE) -> Iterator[bytes]:
+    """Açık blob'dan [start, end) aralığını parça parça üret"""
+    end = blob_size(reader) if end is None else end
+    reader.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        data = reader.read(min(chunk_size, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        yield data
+
+
+def rewrap_file(file_path, keyring: KeyRing) -> bool:
+    """Blob'un veri anahtarını aktif anahtarla yeniden sar (içerik yeniden şifrelenmez)"""
+    with open(file_path, 'r+b') as f:
+        header = f.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or not header.startswith(MAGIC):
+            return False
+
+        (_, _, segment_size, key_id, wrap_nonce,
+         wrapped, base_nonce) = HEADER_STRUCT.unpack(header)
+        if key_id.decode('ascii') == keyring.active_key_id:
+            return False
+
+        kek = keyring.get(key_id.decode('ascii'))
+        data_key = AESGCM(kek).decrypt(wrap_nonce, wrapped, _wrap_aad(key_id))
+
+        f.seek(0)
+        f.write(_build_header(keyring, data_key, segment_size, base_nonce))
+
+    return True
+
+
+def configured_key_file(storage: Path) -> str:
+    """enterprise_config.json'daki storage.key_file (depolama dizinine göreli)"""
+    try:
+        with open(storage / "enterprise_config.json", 'r', encoding='utf-8') as f:
+            return json.load(f).get('storage', {}).get('key_file') or DEFAULT_KEY_FILE
+    except (OSError, ValueError):
+        return DEFAULT_KEY_FILE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doxagon depolama şifreleme anahtar yönetimi")
+    parser.add_argument('--storage', default='doxagon_storage', help='Depolama dizini')
+    parser.add_argument('--key-file',
+                        help='Anahtar halkası (varsayılan: konfigürasyondaki storage.key_file)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rotate_parser = subparsers.add_parser('rotate', help='Yeni anahtar üret ve aktif yap')
+    rotate_parser.add_argument('--rewrap', action='store_true',
+                               help='Mevcut blob anahtarlarını yeni anahtarla yeniden sar')
+    subparsers.add_parser('status', help='Anahtar halkası durumunu göster')
+
+    args = parser.parse_args()
+
+    if not CRYPTO_AVAILABLE:
+        print("❌ 'cryptography' paketi yüklü değil")
+        return
+
+    storage = Path(args.storage)
+    key_file = args.key_file or storage / configured_key_file(storage)
+    keyring = KeyRing(key_file)
+
+    if args.command == 'status':
+        print(f"🔑 Aktif anahtar: {keyring.active_key_id}")
+        print(f"🗝️  Toplam anahtar: {len(keyring.keys)}")
+        return
+
+    key_id = keyring.rotate()
+    print(f"✅ Yeni aktif anahtar: {key_id}")
+
+    if args.rewrap:
+        rewrapped = 0
+        for path in (storage / "uploads").rglob('*'):
+            if path.is_file() and rewrap_file(path, keyring):
+                rewrapped += 1
+        print(f"🔄 Yeniden sarılan blob sayısı: {rewrapped}")
+
+
+if __name__ == "__main__":
+    main()
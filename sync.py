@@ -0,0 +1,143 @@
+import json
+import base64
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, Tuple, Optional
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def add_tombstones(cursor: sqlite3.Cursor, items: Iterable[Tuple[str, Optional[str]]]) -> None:
+    """Silinen belgeler için mezar taşı yaz; items: (document_id, organization_id)"""
+    cursor.executemany('''
+        INSERT OR REPLACE INTO document_tombstones (document_id, organization_id, deleted_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+    ''', list(items))
+
+
+def encode_watermark(documents: Tuple[str, str], tombstones: Tuple[str, str]) -> str:
+    """İki akışın (belge, mezar taşı) konumunu istemciye verilecek opak imlece çevir"""
+    raw = json.dumps({'d': list(documents), 't': list(tombstones)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_watermark(token: str) -> Optional[Dict[str, Tuple[str, str]]]:
+    """İmleci çöz; biçimi bozuksa None (istemci tam senkronizasyona döner)"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        positions = [data['d'], data['t']]
+    except (ValueError, KeyError, TypeError):
+        return None
+    # Her akışın konumu (zaman damgası, kimlik) metin çifti olmalı
+    for position in positions:
+        if (not isinstance(position, list) or len(position) != 2
+                or not all(isinstance(part, str) for part in position)):
+            return None
+    return {'d': tuple(positions[0]), 't': tuple(positions[1])}
+
+
+class DocumentSync:
+    """updated_at ve mezar taşları üzerinden belge listesinin artımlı senkronizasyonu"""
+
+    def __init__(self, db_path: str, settings: Dict[str, Any]):
+        self.db_path = db_path
+        self.settings = settings
+
+    def _cap(self) -> str:
+        # Zaman damgaları saniye çözünürlüklü (UTC); içinde bulunulan saniyedeki
+        # yazımlar bir sonraki senkronizasyona bırakılır, böylece imleç hiçbir
+        # değişikliği atlamaz
+        settle = timedelta(seconds=self.settings['settle_seconds'])
+        return (datetime.now(timezone.utc) - settle).strftime(TIMESTAMP_FORMAT)
+
+    def _expired(self, timestamp: str) -> bool:
+        """İmleç mezar taşı saklama süresinden eskiyse tam senkronizasyon gerekir"""
+        limit = datetime.now(timezone.utc) - timedelta(days=self.settings['tombstone_retention_days'])
+        return timestamp < limit.strftime(TIMESTAMP_FORMAT)
+
+    def changes(self, organization_id: str, token: str = None, limit: int = 200,
+                uploaded_by: str = None) -> Dict[str, Any]:
+        """İmleçten sonra değişen/eklenen belgeler ve silinen belge kimlikleri"""
+        cap = self._cap()
+        watermark = decode_watermark(token) if token else None
+        reset = watermark is None or self._expired(watermark['t'][0])
+        if reset:
+            # İlk (veya tam) senkronizasyon: tüm aktif belgeler, mezar taşı yok
+            watermark = {'d': ('', ''), 't': (cap, '')}
+
+        owner_filter = ' AND d.uploaded_by = ?' if uploaded_by else ''
+        owner_params = [uploaded_by] if uploaded_by else []
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT d.id, d.original_name, d.current_name, d.file_size, d.category,
+                       d.confidentiality, d.updated_at, d.thumbnail_path IS NOT NULL,
+                       (SELECT GROUP_CONCAT(t.name) FROM document_tags dt
+                        JOIN tags t ON t.id = dt.tag_id WHERE dt.document_id = d.id)
+                FROM documents d
+                WHERE d.organization_id = ? AND d.is_active = 1
+                  AND (d.updated_at, d.id) > (?, ?) AND d.updated_at <= ?{owner_filter}
+                ORDER BY d.updated_at, d.id
+                LIMIT ?
+            ''', [organization_id, *watermark['d'], cap, *owner_params, limit])
+            rows = cursor.fetchall()
+
+            cursor.execute('''
+                SELECT document_id, deleted_at FROM document_tombstones
+                WHERE organization_id = ? AND (deleted_at, document_id) > (?, ?)
+                  AND deleted_at <= ?
+                ORDER BY deleted_at, document_id
+                LIMIT ?
+            ''', (organization_id, *watermark['t'], cap, limit))
+            tombstones = cursor.fetchall()
+
+        # Kısa alan adları: yavaş bağlantılarda yük boyutunu küçültür
+        changed = [{
+            'id': row[0],
+            'n': row[1],
+            'cn': row[2] if row[2] != row[1] else None,
+            's': row[3],
+            'c': row[4],
+            'cf': row[5],
+            'u': row[6],
+            'tg': row[8].split(',') if row[8] else []
+        } for row in rows]
+
+        documents_mark = (rows[-1][6], rows[-1][0]) if rows else watermark['d']
+        tombstones_mark = (tombstones[-1][1], tombstones[-1][0]) if tombstones else watermark['t']
+        if len(tombstones) < limit:
+            # cap'e kadarki tüm mezar taşları alındı; silme olmayan organizasyonda da
+            # imleç ilerlesin ki saklama süresi dolunca gereksiz tam senkronizasyon olmasın
+            tombstones_mark = max(tombstones_mark, (cap, ''))
+
+        return {
+            'reset': reset,
+            'changed': changed,
+            'deleted': [row[0] for row in tombstones],
+            'thumbnails': {row[0]: f"/api/documents/{row[0]}/thumbnail?v={row[6].replace(' ', 'T')}"
+                           for row in rows if row[7]},
+            'watermark': encode_watermark(documents_mark, tombstones_mark),
+            'has_more': len(rows) == limit or len(tombstones) == limit
+        }
+
+    def prune_tombstones(self, batch_size: int = 1000) -> int:
+        """Saklama süresini doldurmuş mezar taşlarını sil"""
+        cutoff = (datetime.now(timezone.utc)
+                  - timedelta(days=self.settings['tombstone_retention_days'])).strftime(TIMESTAMP_FORMAT)
+        total = 0
+        while True:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    DELETE FROM document_tombstones WHERE document_id IN (
+                        SELECT document_id FROM document_tombstones WHERE deleted_at < ? LIMIT ?
+                    )
+                ''', (cutoff, batch_size))
+                deleted = cursor.rowcount
+                conn.commit()
+
+            total += deleted
+            if deleted < batch_size:
+                return total
@@ -1,10 +1,38 @@
-from flask import Flask, request, jsonify, send_file, render_template_string
+import time
+# Açılış süresi içe aktarmaları da kapsasın diye diğer modüllerden önce alınır
+STARTUP_STARTED = time.perf_counter()
+
+from flask import (Flask, request, jsonify, send_file, render_template_string, Response,
+                   stream_with_context, g)
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 import tempfile
 import os
+import shutil
 import sqlite3
+import mimetypes
+import unicodedata
+import re
+import hmac
+import uuid
+import random
+import threading
+from urllib.parse import quote
 from main import DoxagonEnterpriseManager
+from storage_crypto import is_encrypted, blob_size, iter_blob
+from storage_compression import is_compressed, storage_layers
+from share_links import SHARE_INVALID, SHARE_EXPIRED, SHARE_EXHAUSTED, SHARE_PASSWORD
+from passwords import HasherBusyError
+from quota import QuotaExceededError
+from workflow import WorkflowError
+from rate_limit import RouteLimiter, RateLimitExceeded
+from export import iter_export
+from metrics import registry as metrics
+from logs import get_logger, set_correlation_id, reset_correlation_id, get_correlation_id
+from profiling import ProfileStore, RequestProfile, MODES
+from query_audit import auditor as query_auditor
+from functools import wraps
 import json
 from datetime import datetime
 
@@ -14,6 +42,26 @@ app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB
 
 # Doxagon sistemi
 doxagon = DoxagonEnterpriseManager()
+logger = get_logger('web')
+
+# Metin önizlemede okunacak en fazla bayt
+PREVIEW_MAX_BYTES = 1024 * 1024
+
+# Ters vekil (Cloud Run vb.) arkasında istemci IP'si X-Forwarded-For'dan alınır;
+# yalnızca yapılandırılan sayıda vekil atlamasına güvenilir (giriş ve rota sınırları IP'ye bağlı).
+# Varsayılan 0: vekil yokken başlık istemcinin elindedir ve sınırları aşmak için
+# değiştirilebilir; vekil arkasında security.trusted_proxy_hops vekil sayısına ayarlanmalı
+trusted_proxy_hops = doxagon.config['security']['trusted_proxy_hops']
+if trusted_proxy_hops:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxy_hops, x_proto=trusted_proxy_hops)
+
+# Rota başına istek sınırları (yükleme, arama)
+route_limiter = RouteLimiter(doxagon.config['security']['rate_limits'])
+
+# İstek profilleme (kapalıyken profil kancaları kaydedilmez, profiles/ dizini oluşturulmaz)
+profiling_settings = doxagon.config['profiling']
+profile_store = (ProfileStore(doxagon.base_directory / "profiles", profiling_settings['max_profiles'])
+                 if profiling_settings['enabled'] else None)
 
 # Basit HTML arayüzü
 HTML_TEMPLATE = """
@@ -535,11 +583,199 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Arka plan servisleri (hatırlatıcı, temizlik) ilk istekte başlatılır: WSGI
+# sunucusunda (Cloud Run, gunicorn) __main__ bloğu çalışmaz ve fork'tan önce
+# başlatılan iş parçacıkları işçi süreçlerine geçmez
+_background_started = False
+_background_lock = threading.Lock()
+
+@app.before_request
+def start_background_services():
+    global _background_started
+    if _background_started:
+        return
+    with _background_lock:
+        if not _background_started:
+            doxagon.start_reminder_scheduler()
+            doxagon.start_housekeeping()
+            _background_started = True
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # İstemcinin (veya önündeki proxy'nin) gönderdiği X-Request-ID korunur; böylece
+    # aynı yükleme farklı servis ve işçilerin kayıtlarında izlenebilir
+    request_id = request.headers.get('X-Request-ID', '')
+    if not re.fullmatch(r'[\w.-]{1,64}', request_id):
+        request_id = uuid.uuid4().hex
+    g.correlation_token = set_correlation_id(request_id)
+
+@app.after_request
+def record_request_metrics(response):
+    """Rota başına istek süresi ve sayısı (akış yanıtlarında ilk bayta kadar)"""
+    started = g.get('request_started')
+    if metrics.enabled and started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.histogram('doxagon_http_request_seconds', 'HTTP istek süresi (saniye)').observe(
+            time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        metrics.counter('doxagon_http_requests_total', 'HTTP istek sayısı').inc(
+            endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+@app.after_request
+def log_request(response):
+    """Her isteği ilişki kimliği ve süresiyle kaydet"""
+    started = g.get('request_started')
+    response.headers['X-Request-ID'] = get_correlation_id() or ''
+    logger.info("İstek tamamlandı", extra={
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.url_rule.rule if request.url_rule else None,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1) if started else None,
+        'user_id': doxagon.current_user['id'] if doxagon.current_user else None,
+        'remote_addr': request.remote_addr
+    })
+    return response
+
+@app.teardown_request
+def clear_correlation_id(exc):
+    token = g.pop('correlation_token', None)
+    if token is not None:
+        reset_correlation_id(token)
+
+def start_profile():
+    """Admin X-Doxagon-Profile başlığıyla veya örnekleme oranıyla isteği profille"""
+    mode = request.headers.get('X-Doxagon-Profile')
+    if mode:
+        if mode in ('1', 'true'):
+            mode = profiling_settings['mode']
+        principal = doxagon.current_principal()
+        if mode not in MODES or not principal or principal['role'] != 'admin':
+            return
+    elif random.random() < profiling_settings['sample_rate']:
+        mode = profiling_settings['mode']
+    else:
+        return
+    g.profile = RequestProfile(mode, profiling_settings['sample_interval_ms'])
+
+def finish_profile(response):
+    """Profili durdur ve kaydet (akış yanıtlarında gövde gönderimi dahil değildir)"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        duration_ms = round((time.perf_counter() - profile.started) * 1000, 1)
+        profile_id = profile_store.save(profile, profile.stop(), {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.url_rule.rule if request.url_rule else None,
+            'status': response.status_code,
+            'duration_ms': duration_ms,
+            'correlation_id': get_correlation_id(),
+            'user_id': doxagon.current_user['id'] if doxagon.current_user else None
+        })
+        response.headers['X-Doxagon-Profile-Id'] = profile_id
+        logger.info("İstek profillendi", extra={'profile_id': profile_id, 'mode': profile.mode,
+                                                'duration_ms': duration_ms})
+    return response
+
+def discard_profile(exc):
+    # after_request çalışmadıysa profilci açık kalmasın
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.stop()
+
+if profiling_settings['enabled']:
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(discard_profile)
+
+def rate_limit_response(error):
+    """429 yanıtı üret"""
+    response = jsonify({'success': False, 'message': str(error)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def rate_limited(route_name):
+    """Rotayı kullanıcı (yoksa IP) başına sınırla"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            client = doxagon.current_user['id'] if doxagon.current_user else request.remote_addr
+            try:
+                route_limiter.hit(route_name, client)
+            except RateLimitExceeded as e:
+                return rate_limit_response(e)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def send_blob(file_path, mimetype=None, as_attachment=False, download_name=None,
+              blob_format=None):
+    """Depodaki dosyayı gönder (şifreli/sıkıştırılmış dosyalar Range destekli akışla açılır)"""
+    compressed, encrypted = storage_layers(blob_format)
+    if compressed is None:
+        # Format kaydı olmayan eski belge: blob başlığına bakılır
+        compressed, encrypted = is_compressed(file_path), is_encrypted(file_path)
+    if not (compressed or encrypted):
+        return send_file(file_path, mimetype=mimetype, as_attachment=as_attachment,
+                         download_name=download_name)
+
+    download_name = download_name or os.path.basename(file_path)
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    reader = doxagon.open_blob(file_path, blob_format)
+    size = blob_size(reader)
+
+    status = 200
+    start, end = 0, size
+    if request.range and request.range.units == 'bytes':
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            reader.close()
+            return Response(status=416, headers={'Content-Range': f'bytes */{size}'})
+        start, end = byte_range
+        status = 206
+
+    def generate():
+        try:
+            yield from iter_blob(reader, start, end)
+        finally:
+            reader.close()
+
+    response = Response(generate(), status=status, mimetype=mimetype, direct_passthrough=True)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Content-Length'] = str(end - start)
+    if status == 206:
+        response.headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+
+    # RFC 6266: tırnaklanmış ASCII yedek ad + RFC 5987 kodlu özgün ad (send_file ile aynı)
+    disposition = 'attachment' if as_attachment else 'inline'
+    fallback = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+    response.headers.set('Content-Disposition', disposition, filename=fallback,
+                         **{'filename*': f"UTF-8''{quote(download_name, safe='')}"})
+
+    return response
+
 @app.route('/')
 def index():
     """Ana sayfa"""
     return render_template_string(HTML_TEMPLATE)
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metin biçiminde metrikler"""
+    if not metrics.enabled:
+        return Response('Metrikler devre dışı\n', status=404, mimetype='text/plain')
+
+    # Token yapılandırılmadıysa uç nokta kapalıdır
+    token = doxagon.config['metrics']['token']
+    if not token or not hmac.compare_digest(request.headers.get('Authorization', ''),
+                                            f'Bearer {token}'):
+        return Response('Yetkisiz\n', status=401, mimetype='text/plain')
+
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/auth/login', methods=['POST'])
 def api_login():
     """Kullanıcı girişi"""
@@ -547,7 +783,18 @@ def api_login():
     username = data.get('username')
     password = data.get('password')
 
-    if doxagon.authenticate_user(username, password):
+    try:
+        authenticated = doxagon.authenticate_user(username, password, request.remote_addr)
+    except RateLimitExceeded as e:
+        return rate_limit_response(e)
+    except HasherBusyError:
+        # Giriş patlamasında diğer isteklerin CPU'su korunur
+        return jsonify({
+            'success': False,
+            'message': 'Sunucu yoğun, lütfen tekrar deneyin'
+        }), 503
+
+    if authenticated:
         return jsonify({
             'success': True,
             'message': 'Giriş başarılı',
@@ -560,12 +807,21 @@ def api_login():
         }), 401
 
 @app.route('/api/documents/upload', methods=['POST'])
+@rate_limited('upload')
 def api_upload():
     """Belge yükleme"""
-    if not doxagon.current_user:
+    principal = doxagon.current_principal()
+    if not principal:
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
-    files = request.files.getlist('files')
+    # Kota kontrolü gövde okunmadan önce yapılır
+    try:
+        doxagon.quota.check(principal['organization_id'],
+                            storage_bytes=request.content_length or 0)
+        files = request.files.getlist('files')
+        doxagon.quota.check(principal['organization_id'], documents=len(files))
+    except QuotaExceededError as e:
+        return jsonify({'success': False, 'message': str(e)}), 413
     category = request.form.get('category') or None
     description = request.form.get('description', '')
     tags_str = request.form.get('tags', '')
@@ -578,9 +834,11 @@ def api_upload():
 
     for file in files:
         if file and file.filename:
-            # Geçici dosyaya kaydet
+            # Geçici dosyaya kaydet (her yükleme kendi dizininde; temizlik servisi
+            # yarıda kalan yüklemeleri doxagon_storage/temp altından süpürür)
             filename = secure_filename(file.filename)
-            temp_path = os.path.join(tempfile.gettempdir(), filename)
+            upload_dir = tempfile.mkdtemp(prefix='upload_', dir=doxagon.temp_dir)
+            temp_path = os.path.join(upload_dir, filename)
             file.save(temp_path)
 
             try:
@@ -598,13 +856,11 @@ def api_upload():
                 else:
                     errors.append(f"{filename}: Yükleme başarısız")
             except Exception as e:
+                logger.exception("Yükleme hatası", extra={'upload_name': filename})
                 errors.append(f"{filename}: {str(e)}")
             finally:
                 # Geçici dosyayı sil
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
+                shutil.rmtree(upload_dir, ignore_errors=True)
 
     if uploaded_docs:
         message = f"{len(uploaded_docs)} belge başarıyla yüklendi"
@@ -625,9 +881,10 @@ def api_upload():
         }), 400
 
 @app.route('/api/documents/search', methods=['POST'])
+@rate_limited('search')
 def api_search():
     """Belge arama"""
-    if not doxagon.current_user:
+    if not doxagon.current_principal():
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
     data = request.get_json()
@@ -646,15 +903,47 @@ def api_search():
             'results': results
         })
     except Exception as e:
+        logger.exception("Arama hatası")
         return jsonify({
             'success': False,
             'message': f'Arama hatası: {str(e)}'
         }), 500
 
+@app.route('/api/documents/export', methods=['POST'])
+@rate_limited('export')
+def api_export_documents():
+    """Arama sonuçlarını veya tüm organizasyonu ZIP olarak akış halinde dışa aktar"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    data = request.get_json(silent=True) or {}
+    whole_organization = data.get('scope') == 'organization'
+    if whole_organization and principal['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Yetkiniz yok'}), 403
+
+    query = '' if whole_organization else data.get('query') or ''
+    filters = {} if whole_organization else data.get('filters') or {}
+    if not isinstance(query, str) or not isinstance(filters, dict):
+        return jsonify({'success': False, 'message': 'Geçersiz sorgu veya filtre'}), 400
+    filters = {k: v for k, v in filters.items() if v}
+
+    doxagon.log_action("EXPORT", "organization", principal['organization_id'],
+                       'Tüm organizasyon' if whole_organization else f"Arama: {query}")
+
+    # Arşiv oluşturulurken parça parça gönderilir; boyut önceden bilinmez
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    response = Response(stream_with_context(iter_export(doxagon, principal['organization_id'],
+                                                        query, filters)),
+                        mimetype='application/zip', direct_passthrough=True)
+    response.headers['Content-Disposition'] = f'attachment; filename="doxagon_export_{stamp}.zip"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/api/documents/my-documents')
 def api_my_documents():
     """Kullanıcının belgeleri"""
-    if not doxagon.current_user:
+    if not doxagon.current_principal():
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
     try:
@@ -664,6 +953,7 @@ def api_my_documents():
             'results': results
         })
     except Exception as e:
+        logger.exception("Belge listesi alınamadı")
         return jsonify({
             'success': False,
             'message': f'Belge listesi alınamadı: {str(e)}'
@@ -672,7 +962,7 @@ def api_my_documents():
 @app.route('/api/documents/<document_id>/download')
 def api_download(document_id):
     """Belge indirme"""
-    if not doxagon.current_user:
+    if not doxagon.current_principal():
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
     try:
@@ -680,28 +970,31 @@ def api_download(document_id):
         with sqlite3.connect(doxagon.db.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT file_path, original_name FROM documents 
+                SELECT file_path, original_name, storage_format FROM documents 
                 WHERE id = ? AND organization_id = ? AND is_active = 1
             ''', (document_id, doxagon.current_user['organization_id']))
 
             result = cursor.fetchone()
             if result:
-                file_path, original_name = result
+                file_path, original_name, blob_format = result
 
                 # Erişim logla
+                doxagon.mark_accessed(document_id)
                 doxagon.log_action("DOWNLOAD", "document", document_id, f"Belge indirildi: {original_name}")
 
-                return send_file(file_path, as_attachment=True, download_name=original_name)
+                return send_blob(file_path, as_attachment=True, download_name=original_name,
+                                 blob_format=blob_format)
             else:
                 return jsonify({'success': False, 'message': 'Belge bulunamadı'}), 404
 
     except Exception as e:
+        logger.exception("İndirme hatası")
         return jsonify({'success': False, 'message': f'İndirme hatası: {str(e)}'}), 500
 
 @app.route('/api/documents/<document_id>/preview')
 def api_preview(document_id):
     """Belge önizleme"""
-    if not doxagon.current_user:
+    if not doxagon.current_principal():
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
     try:
@@ -709,39 +1002,198 @@ def api_preview(document_id):
         with sqlite3.connect(doxagon.db.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT file_path, original_name, mime_type FROM documents 
+                SELECT file_path, original_name, mime_type, storage_format FROM documents 
                 WHERE id = ? AND organization_id = ? AND is_active = 1
             ''', (document_id, doxagon.current_user['organization_id']))
 
             result = cursor.fetchone()
             if result:
-                file_path, original_name, mime_type = result
+                file_path, original_name, mime_type, blob_format = result
+                doxagon.mark_accessed(document_id)
 
                 # Dosya türüne göre önizleme yap
                 if mime_type and mime_type.startswith('text/'):
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
+                    with doxagon.open_blob(file_path, blob_format) as f:
+                        content = f.read(PREVIEW_MAX_BYTES).decode('utf-8', errors='ignore')
                     return render_template_string("<pre>{{ content }}</pre>", content=content)
                 elif mime_type and mime_type.startswith('image/'):
-                    return send_file(file_path, mimetype=mime_type)
+                    return send_blob(file_path, mimetype=mime_type, download_name=original_name,
+                                     blob_format=blob_format)
                 elif mime_type == 'application/pdf':
                     # PDF önizleme için genellikle özel kütüphaneler veya servisler gerekir.
                     # Basit bir yaklaşım olarak, PDF'yi doğrudan göstermeye çalışalım.
                     # Daha gelişmiş önizleme için pdf.js gibi bir kütüphane entegre edilebilir.
-                    return send_file(file_path, mimetype=mime_type)
+                    return send_blob(file_path, mimetype=mime_type, download_name=original_name,
+                                     blob_format=blob_format)
                 else:
                     return jsonify({'success': False, 'message': 'Bu dosya türü önizlenemez'}), 415
             else:
                 return jsonify({'success': False, 'message': 'Belge bulunamadı'}), 404
 
     except Exception as e:
+        logger.exception("Önizleme hatası")
         return jsonify({'success': False, 'message': f'Önizleme hatası: {str(e)}'}), 500
 
+@app.route('/api/sync/documents')
+def api_sync_documents():
+    """Artımlı senkronizasyon: imleçten sonra değişen ve silinen belgeler (?since=&limit=&mine=1)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    page_size = doxagon.config['sync']['page_size']
+    limit = min(page_size, max(1, request.args.get('limit', page_size, type=int)))
+    uploaded_by = principal['id'] if request.args.get('mine') == '1' else None
+    delta = doxagon.sync.changes(principal['organization_id'], request.args.get('since'),
+                                 limit, uploaded_by)
+    return jsonify({'success': True, **delta})
+
+@app.route('/api/documents/<document_id>/thumbnail')
+def api_thumbnail(document_id):
+    """Belge thumbnail'i (tarayıcı önbelleği için sürümlü URL ile çağrılır)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    with sqlite3.connect(doxagon.db.db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT thumbnail_path FROM documents
+            WHERE id = ? AND organization_id = ? AND is_active = 1
+        ''', (document_id, principal['organization_id']))
+        row = cursor.fetchone()
+
+    if not row or not row[0] or not os.path.exists(row[0]):
+        return jsonify({'success': False, 'message': 'Thumbnail bulunamadı'}), 404
+
+    response = send_file(os.path.abspath(row[0]), mimetype='image/jpeg', conditional=True)
+    if request.args.get('v'):
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+def batch_request(require_editor=True):
+    """Toplu işlem isteğini doğrula: (principal, belge kimlikleri, veri) veya hata yanıtı"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return None, jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if require_editor and principal['role'] not in ('admin', 'editor'):
+        return None, jsonify({'success': False, 'message': 'Bu işlem için yetki gerekiyor'}), 403
+
+    data = request.get_json() or {}
+    document_ids = data.get('ids')
+    if not isinstance(document_ids, list) or not document_ids:
+        return None, jsonify({'success': False, 'message': 'Belge listesi (ids) gerekli'}), 400
+    if not string_list(document_ids):
+        return None, jsonify({'success': False, 'message': 'Belge kimlikleri metin olmalı'}), 400
+    return data, None, None
+
+def string_list(value) -> bool:
+    """JSON değeri metinlerden oluşan bir liste mi"""
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def positive_int(value) -> bool:
+    """JSON değeri pozitif tam sayı mı (True/False sayılmaz)"""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+@app.route('/api/documents/batch/tags', methods=['POST'])
+def api_batch_tags():
+    """Toplu etiket ekle/çıkar"""
+    data, error, status = batch_request()
+    if error:
+        return error, status
+    for field in ('add', 'remove'):
+        if data.get(field) is not None and not string_list(data[field]):
+            return jsonify({'success': False, 'message': f'{field} etiket listesi olmalı'}), 400
+
+    try:
+        result = doxagon.batch_tag_documents(data['ids'], data.get('add'), data.get('remove'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **result})
+
+@app.route('/api/documents/batch/update', methods=['POST'])
+def api_batch_update():
+    """Toplu kategori/gizlilik değişikliği"""
+    data, error, status = batch_request()
+    if error:
+        return error, status
+
+    try:
+        result = doxagon.batch_update_documents(data['ids'], data.get('category'),
+                                                data.get('confidentiality'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **result})
+
+@app.route('/api/documents/batch/delete', methods=['POST'])
+def api_batch_delete():
+    """Toplu silme"""
+    data, error, status = batch_request()
+    if error:
+        return error, status
+
+    try:
+        result = doxagon.batch_delete_documents(data['ids'])
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **result})
+
+@app.route('/api/documents/batch/share', methods=['POST'])
+def api_batch_share():
+    """Toplu paylaşım linki oluştur"""
+    data, error, status = batch_request(require_editor=False)
+    if error:
+        return error, status
+
+    expires_hours = data.get('expires_hours', 24)
+    max_downloads = data.get('max_downloads')
+    if not positive_int(expires_hours):
+        return jsonify({'success': False, 'message': 'expires_hours pozitif tam sayı olmalı'}), 400
+    if max_downloads is not None and not positive_int(max_downloads):
+        return jsonify({'success': False, 'message': 'max_downloads pozitif tam sayı olmalı'}), 400
+
+    try:
+        result = doxagon.batch_create_share_links(
+            data['ids'], expires_hours, data.get('password'), max_downloads
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **result})
+
+@app.route('/api/documents/<document_id>', methods=['DELETE'])
+def api_delete_document(document_id):
+    """Belgeyi sil"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] not in ('admin', 'editor'):
+        return jsonify({'success': False, 'message': 'Bu işlem için yetki gerekiyor'}), 403
+
+    if not doxagon.delete_document(document_id):
+        return jsonify({'success': False, 'message': 'Belge bulunamadı'}), 404
+
+    return jsonify({'success': True, 'message': 'Belge silindi'})
+
+@app.route('/api/documents/<document_id>/text')
+def api_document_text(document_id):
+    """Belgenin çıkarılmış metni"""
+    if not doxagon.current_principal():
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    try:
+        text = doxagon.get_document_text(document_id)
+        if text is None:
+            return jsonify({'success': False, 'message': 'Belge bulunamadı'}), 404
+
+        return jsonify({'success': True, 'text': text})
+    except Exception as e:
+        logger.exception("Metin alınamadı")
+        return jsonify({'success': False, 'message': f'Metin alınamadı: {str(e)}'}), 500
 
 @app.route('/api/share/create', methods=['POST'])
 def api_create_share():
     """Paylaşım linki oluştur"""
-    if not doxagon.current_user:
+    if not doxagon.current_principal():
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
     data = request.get_json()
@@ -764,15 +1216,211 @@ def api_create_share():
                 'message': 'Paylaşım linki oluşturulamadı'
             }), 400
     except Exception as e:
+        logger.exception("Paylaşım hatası")
         return jsonify({
             'success': False,
             'message': f'Paylaşım hatası: {str(e)}'
         }), 500
 
+@app.route('/api/auth/logout', methods=['POST'])
+def api_logout():
+    """Oturumu kapat"""
+    doxagon.logout()
+    return jsonify({'success': True, 'message': 'Çıkış yapıldı'})
+
+@app.route('/api/users/<user_id>/role', methods=['PUT'])
+def api_update_user_role(user_id):
+    """Kullanıcı rolünü değiştir (sadece admin)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Bu işlem için admin yetkisi gerekiyor'}), 403
+
+    target = doxagon.principals.get(user_id)
+    if not target or target['organization_id'] != principal['organization_id']:
+        return jsonify({'success': False, 'message': 'Kullanıcı bulunamadı'}), 404
+
+    data = request.get_json() or {}
+    try:
+        if not doxagon.update_user_role(user_id, data.get('role')):
+            return jsonify({'success': False, 'message': 'Kullanıcı bulunamadı'}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return jsonify({'success': True, 'message': 'Rol güncellendi'})
+
+@app.route('/api/users/<user_id>/deactivate', methods=['POST'])
+def api_deactivate_user(user_id):
+    """Kullanıcıyı pasifleştir (sadece admin)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Bu işlem için admin yetkisi gerekiyor'}), 403
+
+    target = doxagon.principals.get(user_id)
+    if not target or target['organization_id'] != principal['organization_id']:
+        return jsonify({'success': False, 'message': 'Kullanıcı bulunamadı'}), 404
+
+    if not doxagon.deactivate_user(user_id):
+        return jsonify({'success': False, 'message': 'Kullanıcı bulunamadı'}), 404
+
+    return jsonify({'success': True, 'message': 'Kullanıcı pasifleştirildi'})
+
+@app.route('/api/admin/profiles')
+def api_list_profiles():
+    """Kaydedilmiş istek profilleri (sadece admin)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Bu işlem için admin yetkisi gerekiyor'}), 403
+
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    return jsonify({'success': True, 'enabled': profiling_settings['enabled'],
+                    'profiles': profile_store.list(limit) if profile_store else []})
+
+@app.route('/api/admin/profiles/<profile_id>')
+def api_download_profile(profile_id):
+    """Profil dosyasını indir (.prof: pstats/snakeviz, .folded: flamegraph/speedscope)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Bu işlem için admin yetkisi gerekiyor'}), 403
+
+    data_file = profile_store.path(profile_id) if profile_store else None
+    if data_file is None:
+        return jsonify({'success': False, 'message': 'Profil bulunamadı'}), 404
+    return send_file(os.path.abspath(data_file), mimetype='application/octet-stream',
+                     as_attachment=True, download_name=data_file.name)
+
+@app.route('/api/admin/queries')
+def api_query_report():
+    """İfade başına SQL süreleri ve denetlenen planlar (?sort=total|max|count&limit=)"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Bu işlem için admin yetkisi gerekiyor'}), 403
+
+    sort = request.args.get('sort', 'total')
+    if sort not in ('total', 'max', 'count'):
+        return jsonify({'success': False, 'message': 'Geçersiz sıralama'}), 400
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify({'success': True, 'enabled': query_auditor.enabled,
+                    'statements': query_auditor.report(limit, sort)})
+
+@app.route('/api/workflows', methods=['POST'])
+def api_start_workflow():
+    """Belge için onay iş akışı başlat"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] not in ('admin', 'editor'):
+        return jsonify({'success': False, 'message': 'Bu işlem için yetki gerekiyor'}), 403
+
+    data = request.get_json() or {}
+    try:
+        workflow_id = doxagon.workflows.start(
+            data.get('document_id'), data.get('name') or 'Onay', data.get('steps') or []
+        )
+    except WorkflowError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return jsonify({'success': True, 'workflow_id': workflow_id})
+
+@app.route('/api/workflows/tasks')
+def api_workflow_tasks():
+    """Kullanıcının bekleyen onay görevleri"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(200, max(1, request.args.get('per_page', 50, type=int)))
+    tasks = doxagon.workflows.pending_tasks(principal['id'], per_page, (page - 1) * per_page)
+    return jsonify({'success': True, 'tasks': tasks, 'page': page})
+
+@app.route('/api/workflows/<workflow_id>')
+def api_get_workflow(workflow_id):
+    """İş akışı ve adımları"""
+    if not doxagon.current_principal():
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    workflow = doxagon.workflows.get(workflow_id)
+    if not workflow:
+        return jsonify({'success': False, 'message': 'İş akışı bulunamadı'}), 404
+    return jsonify({'success': True, 'workflow': workflow})
+
+@app.route('/api/workflows/<workflow_id>/cancel', methods=['POST'])
+def api_cancel_workflow(workflow_id):
+    """İş akışını iptal et"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] not in ('admin', 'editor'):
+        return jsonify({'success': False, 'message': 'Bu işlem için yetki gerekiyor'}), 403
+
+    if not doxagon.workflows.cancel(workflow_id):
+        return jsonify({'success': False, 'message': 'İş akışı bulunamadı'}), 404
+    return jsonify({'success': True, 'message': 'İş akışı iptal edildi'})
+
+@app.route('/api/workflows/steps/<step_id>/<decision>', methods=['POST'])
+def api_decide_step(step_id, decision):
+    """Görevi onayla veya reddet"""
+    if not doxagon.current_principal():
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if decision not in ('approve', 'reject'):
+        return jsonify({'success': False, 'message': 'Geçersiz karar'}), 400
+
+    data = request.get_json(silent=True) or {}
+    try:
+        result = doxagon.workflows.decide(step_id, decision == 'approve', data.get('notes'))
+    except WorkflowError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+
+    return jsonify({'success': True, **result})
+
+@app.route('/api/workflows/steps/<step_id>/assign', methods=['PUT'])
+def api_assign_step(step_id):
+    """Adımı başka kullanıcıya ata"""
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+    if principal['role'] not in ('admin', 'editor'):
+        return jsonify({'success': False, 'message': 'Bu işlem için yetki gerekiyor'}), 403
+
+    data = request.get_json() or {}
+    try:
+        if not doxagon.workflows.reassign(step_id, data.get('user_id')):
+            return jsonify({'success': False, 'message': 'Adım bulunamadı'}), 404
+    except WorkflowError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return jsonify({'success': True, 'message': 'Adım atandı'})
+
+@app.route('/api/changes')
+def api_changes():
+    """Değişiklik akışı: imleçten sonraki olaylar (?since=<seq>&limit=&type=)
+
+    reset True ise imleç budanmış olayların gerisindedir; istemci tam senkronizasyon yapmalıdır.
+    """
+    principal = doxagon.current_principal()
+    if not principal:
+        return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
+
+    since = max(0, request.args.get('since', 0, type=int))
+    limit = min(1000, max(1, request.args.get('limit', 500, type=int)))
+    feed = doxagon.events.changes(principal['organization_id'], since, limit,
+                                  request.args.get('type'))
+    return jsonify({'success': True, **feed})
+
 @app.route('/api/statistics')
 def api_statistics():
     """Sistem istatistikleri"""
-    if not doxagon.current_user:
+    if not doxagon.current_principal():
         return jsonify({'success': False, 'message': 'Oturum açmanız gerekiyor'}), 401
 
     try:
@@ -782,6 +1430,7 @@ def api_statistics():
             'statistics': stats
         })
     except Exception as e:
+        logger.exception("İstatistik hatası")
         return jsonify({
             'success': False,
             'message': f'İstatistik hatası: {str(e)}'
@@ -791,53 +1440,53 @@ def api_statistics():
 def public_share(token):
     """Paylaşım linki ile belge erişimi"""
     try:
-        import sqlite3
-        with sqlite3.connect(doxagon.db.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT sl.*, d.original_name, d.file_path
-                FROM share_links sl
-                JOIN documents d ON sl.document_id = d.id
-                WHERE sl.token = ? AND sl.is_active = 1
-            ''', (token,))
-
-            share = cursor.fetchone()
-            if not share:
+        # Token önbellekten çözülür (geçersiz token'lar da kısa süre önbellekte tutulur)
+        status, share = doxagon.share_links.resolve(token)
+        if status == SHARE_INVALID:
+            return jsonify({'error': 'Geçersiz paylaşım linki'}), 404
+
+        # Süre kontrolü
+        if status == SHARE_EXPIRED:
+            return jsonify({'error': 'Paylaşım linkinin süresi dolmuş'}), 410
+
+        # İndirme sayısı kontrolü
+        if status == SHARE_EXHAUSTED:
+            return jsonify({'error': 'Maksimum indirme sayısına ulaşıldı'}), 410
+
+        # Şifre kontrolü (basit - gerçek uygulamada form gösterilmeli)
+        if status == SHARE_PASSWORD:
+            return jsonify({'error': 'Bu paylaşım şifre korumalı'}), 403
+
+        # İndirme sayısını atomik olarak artır
+        if not doxagon.share_links.consume(share):
+            if not share.exhausted:
+                # Belge başka bir süreçte silinmiş
                 return jsonify({'error': 'Geçersiz paylaşım linki'}), 404
+            return jsonify({'error': 'Maksimum indirme sayısına ulaşıldı'}), 410
+        doxagon.mark_accessed(share.document_id)
 
-            # Süre kontrolü
-            expires_at = datetime.fromisoformat(share[4])
-            if datetime.now() > expires_at:
-                return jsonify({'error': 'Paylaşım linkinin süresi dolmuş'}), 410
-
-            # İndirme sayısı kontrolü
-            if share[6] and share[7] >= share[6]:
-                return jsonify({'error': 'Maksimum indirme sayısına ulaşıldı'}), 410
-
-            # Şifre kontrolü (basit - gerçek uygulamada form gösterilmeli)
-            if share[5]:  # password_hash var
-                return jsonify({'error': 'Bu paylaşım şifre korumalı'}), 403
-
-            # İndirme sayısını artır
-            cursor.execute('''
-                UPDATE share_links SET download_count = download_count + 1 
-                WHERE id = ?
-            ''', (share[0],))
-            conn.commit()
-
-            # Dosyayı gönder
-            return send_file(share[11], as_attachment=True, download_name=share[10])
+        # Dosyayı gönder
+        return send_blob(share.file_path, as_attachment=True, download_name=share.original_name,
+                         blob_format=share.storage_format)
 
     except Exception as e:
+        logger.exception("Paylaşılan belge indirme hatası")
         return jsonify({'error': f'Paylaşım hatası: {str(e)}'}), 500
 
+# İçe aktarma, veritabanı/konfigürasyon ve rota kaydı dahil açılış süresi
+doxagon.startup_timings['web'] = time.perf_counter() - STARTUP_STARTED
+logger.info("Web uygulaması hazır", extra={
+    'startup_ms': round(doxagon.startup_timings['web'] * 1000, 1),
+    'manager_ms': round(doxagon.startup_timings['total'] * 1000, 1)
+})
+
 if __name__ == '__main__':
     # İlk kurulum kontrolü
     with sqlite3.connect(doxagon.db.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT COUNT(*) FROM organizations')
         if cursor.fetchone()[0] == 0:
-            print("🔧 İlk kurulum yapılıyor...")
+            logger.info("İlk kurulum yapılıyor")
 
             # Varsayılan organizasyon
             org_id = doxagon.create_organization("Demo Organizasyon", "enterprise")
@@ -845,15 +1494,14 @@ if __name__ == '__main__':
             # Admin kullanıcı
             admin_id = doxagon.create_user("admin", "admin@demo.com", "admin123", "admin", org_id)
 
-            print("✅ Demo organizasyon ve admin kullanıcısı oluşturuldu")
-            print("👤 Kullanıcı adı: admin")
-            print("🔑 Şifre: admin123")
+            logger.info("Demo organizasyon ve admin kullanıcısı oluşturuldu",
+                        extra={'organization_id': org_id, 'username': 'admin'})
+
+    # Arka plan servisleri
+    doxagon.start_reminder_scheduler()
+    doxagon.start_housekeeping()
 
-    print("\n🌐 DocuMaster HBA Pro Web Arayüzü")
-    print("=" * 50)
-    print("🔗 Web Arayüzü: http://localhost:5000")
-    print("📊 API Endpoint: http://localhost:5000/api")
-    print("👤 Demo Giriş: admin / admin123")
-    print("=" * 50)
+    logger.info("DocuMaster HBA Pro Web Arayüzü başlatılıyor",
+                extra={'url': 'http://localhost:5000', 'api': 'http://localhost:5000/api'})
 
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
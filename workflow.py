@@ -0,0 +1,282 @@
+import uuid
+import sqlite3
+from typing import Dict, Any, List, Optional, Callable
+
+from events import record
+
+# İş akışı durumları
+WORKFLOW_IN_PROGRESS = 'in_progress'
+WORKFLOW_APPROVED = 'approved'
+WORKFLOW_REJECTED = 'rejected'
+WORKFLOW_CANCELLED = 'cancelled'
+
+# Adım durumları (aynı anda yalnızca bir adım 'active' olur)
+STEP_PENDING = 'pending'
+STEP_ACTIVE = 'active'
+STEP_APPROVED = 'approved'
+STEP_REJECTED = 'rejected'
+STEP_SKIPPED = 'skipped'
+
+
+class WorkflowError(Exception):
+    """İş akışı geçişi yapılamadı"""
+
+
+class WorkflowEngine:
+    """Belge onay iş akışlarını başlatır ve karar geldikçe adımları ilerletir
+
+    İlerleme olay güdümlüdür: her karar aynı işlem içinde sonraki adımı
+    etkinleştirir, bekleyen iş akışları için tarama/yoklama yapılmaz. Geçişler
+    olay yoluna 'workflow.*' türüyle yazılır.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def on_event(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Geçiş olaylarına abone ol (işlem tamamlandıktan sonra çağrılır)"""
+        self.manager.events.subscribe('workflow.', listener)
+
+    def _record(self, cursor: sqlite3.Cursor, event_type: str, workflow_id: str,
+                payload: Dict[str, Any] = None) -> None:
+        record(cursor, f'workflow.{event_type}', self.manager.current_user['organization_id'],
+               'workflow', workflow_id, payload)
+
+    def _activate(self, cursor: sqlite3.Cursor, workflow_id: str, step_number: int) -> None:
+        cursor.execute('''
+            UPDATE workflow_steps SET status = ?, activated_at = CURRENT_TIMESTAMP
+            WHERE workflow_id = ? AND step_number = ?
+        ''', (STEP_ACTIVE, workflow_id, step_number))
+        cursor.execute('UPDATE workflows SET current_step = ? WHERE id = ?',
+                       (step_number, workflow_id))
+        cursor.execute('''
+            SELECT id, assigned_to, step_name FROM workflow_steps
+            WHERE workflow_id = ? AND step_number = ?
+        ''', (workflow_id, step_number))
+        step = cursor.fetchone()
+        self._record(cursor, 'step_activated', workflow_id,
+                     {'step_id': step[0], 'assigned_to': step[1], 'step_name': step[2]})
+
+    def _finish(self, cursor: sqlite3.Cursor, workflow_id: str, status: str) -> None:
+        cursor.execute('''
+            UPDATE workflow_steps SET status = ?
+            WHERE workflow_id = ? AND status IN (?, ?)
+        ''', (STEP_SKIPPED, workflow_id, STEP_PENDING, STEP_ACTIVE))
+        cursor.execute('''
+            UPDATE workflows SET status = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (status, workflow_id))
+        self._record(cursor, status, workflow_id)
+
+    def start(self, document_id: str, name: str, steps: List[Dict[str, str]]) -> str:
+        """Belge için onay iş akışı başlat; steps: [{'name': ..., 'assigned_to': user_id}]"""
+        user = self.manager.current_user
+        if not isinstance(document_id, str) or not isinstance(name, str):
+            raise WorkflowError("Belge veya iş akışı adı geçersiz")
+        if not steps or not isinstance(steps, list):
+            raise WorkflowError("İş akışı en az bir adım içermeli")
+        # Adımlar istemciden gelir; biçim hataları 500 değil WorkflowError olsun
+        for number, step in enumerate(steps, start=1):
+            if not isinstance(step, dict):
+                raise WorkflowError(f"{number}. adım geçersiz")
+            for key in ('name', 'assigned_to'):
+                if not isinstance(step.get(key), str) or not step[key].strip():
+                    raise WorkflowError(f"{number}. adımda '{key}' eksik veya geçersiz")
+
+        workflow_id = str(uuid.uuid4())
+
+        with self.manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 1 FROM documents WHERE id = ? AND organization_id = ? AND is_active = 1
+            ''', (document_id, user['organization_id']))
+            if not cursor.fetchone():
+                raise WorkflowError("Belge bulunamadı")
+
+            assignees = {step['assigned_to'] for step in steps}
+            placeholders = ','.join('?' for _ in assignees)
+            cursor.execute(f'''
+                SELECT COUNT(*) FROM users
+                WHERE id IN ({placeholders}) AND organization_id = ? AND is_active = 1
+            ''', [*assignees, user['organization_id']])
+            if cursor.fetchone()[0] != len(assignees):
+                raise WorkflowError("Adım sorumlusu bulunamadı")
+
+            cursor.execute('''
+                INSERT INTO workflows (id, document_id, name, current_step, status, created_by)
+                VALUES (?, ?, ?, 1, ?, ?)
+            ''', (workflow_id, document_id, name, WORKFLOW_IN_PROGRESS, user['id']))
+            cursor.executemany('''
+                INSERT INTO workflow_steps (id, workflow_id, step_number, step_name, assigned_to, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(str(uuid.uuid4()), workflow_id, number, step['name'], step['assigned_to'],
+                   STEP_PENDING) for number, step in enumerate(steps, start=1)])
+
+            self._record(cursor, 'started', workflow_id, {'document_id': document_id, 'name': name})
+            self._activate(cursor, workflow_id, 1)
+            conn.commit()
+
+        # Olaylar audit kaydından sonra abonelere iletilir
+        self.manager.log_action("START_WORKFLOW", "document", document_id, f"İş akışı: {name}")
+        return workflow_id
+
+    def decide(self, step_id: str, approve: bool, notes: str = None) -> Dict[str, Any]:
+        """Aktif adımı onayla veya reddet ve iş akışını ilerlet"""
+        user = self.manager.current_user
+
+        with self.manager.db.connect() as conn:
+            cursor = conn.cursor()
+            # Koşullu UPDATE: aynı adım iki kez karara bağlanamaz
+            cursor.execute('''
+                UPDATE workflow_steps
+                SET status = ?, completed_at = CURRENT_TIMESTAMP, notes = ?
+                WHERE id = ? AND assigned_to = ? AND status = ?
+            ''', (STEP_APPROVED if approve else STEP_REJECTED, notes, step_id, user['id'],
+                  STEP_ACTIVE))
+            if cursor.rowcount != 1:
+                raise WorkflowError("Bekleyen görev bulunamadı")
+
+            cursor.execute('''
+                SELECT s.workflow_id, s.step_number, w.document_id,
+                       (SELECT MAX(step_number) FROM workflow_steps WHERE workflow_id = s.workflow_id)
+                FROM workflow_steps s
+                JOIN workflows w ON w.id = s.workflow_id
+                WHERE s.id = ?
+            ''', (step_id,))
+            workflow_id, step_number, document_id, last_step = cursor.fetchone()
+
+            if not approve:
+                self._finish(cursor, workflow_id, WORKFLOW_REJECTED)
+                status = WORKFLOW_REJECTED
+            elif step_number < last_step:
+                self._activate(cursor, workflow_id, step_number + 1)
+                status = WORKFLOW_IN_PROGRESS
+            else:
+                self._finish(cursor, workflow_id, WORKFLOW_APPROVED)
+                status = WORKFLOW_APPROVED
+
+            conn.commit()
+
+        self.manager.log_action("APPROVE_STEP" if approve else "REJECT_STEP", "document",
+                                document_id, notes)
+        return {'workflow_id': workflow_id, 'status': status}
+
+    def reassign(self, step_id: str, user_id: str) -> bool:
+        """Bekleyen veya aktif adımı başka kullanıcıya ata"""
+        organization_id = self.manager.current_user['organization_id']
+
+        with self.manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 1 FROM users WHERE id = ? AND organization_id = ? AND is_active = 1
+            ''', (user_id, organization_id))
+            if not cursor.fetchone():
+                raise WorkflowError("Kullanıcı bulunamadı")
+
+            cursor.execute('''
+                UPDATE workflow_steps SET assigned_to = ?
+                WHERE id = ? AND status IN (?, ?)
+                  AND workflow_id IN (
+                      SELECT w.id FROM workflows w JOIN documents d ON d.id = w.document_id
+                      WHERE d.organization_id = ?
+                  )
+            ''', (user_id, step_id, STEP_PENDING, STEP_ACTIVE, organization_id))
+            updated = cursor.rowcount == 1
+            if updated:
+                cursor.execute('SELECT workflow_id FROM workflow_steps WHERE id = ?', (step_id,))
+                self._record(cursor, 'step_reassigned', cursor.fetchone()[0],
+                             {'step_id': step_id, 'assigned_to': user_id})
+            conn.commit()
+
+        if updated:
+            self.manager.log_action("ASSIGN_STEP", "workflow_step", step_id, user_id)
+        return updated
+
+    def cancel(self, workflow_id: str) -> bool:
+        """Devam eden iş akışını iptal et"""
+        with self.manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 1 FROM workflows w JOIN documents d ON d.id = w.document_id
+                WHERE w.id = ? AND w.status = ? AND d.organization_id = ?
+            ''', (workflow_id, WORKFLOW_IN_PROGRESS, self.manager.current_user['organization_id']))
+            if not cursor.fetchone():
+                return False
+
+            self._finish(cursor, workflow_id, WORKFLOW_CANCELLED)
+            conn.commit()
+
+        self.manager.log_action("CANCEL_WORKFLOW", "workflow", workflow_id)
+        return True
+
+    def pending_tasks(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Kullanıcının bekleyen görevleri (assigned_to, status, activated_at indeksiyle)"""
+        with self.manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT s.id, s.step_name, s.step_number, s.activated_at,
+                       w.id, w.name, d.id, d.original_name
+                FROM workflow_steps s
+                JOIN workflows w ON w.id = s.workflow_id
+                JOIN documents d ON d.id = w.document_id
+                WHERE s.assigned_to = ? AND s.status = ?
+                ORDER BY s.activated_at
+                LIMIT ? OFFSET ?
+            ''', (user_id, STEP_ACTIVE, limit, offset))
+            rows = cursor.fetchall()
+
+        return [{
+            'step_id': row[0],
+            'step_name': row[1],
+            'step_number': row[2],
+            'activated_at': row[3],
+            'workflow_id': row[4],
+            'workflow_name': row[5],
+            'document_id': row[6],
+            'document_name': row[7]
+        } for row in rows]
+
+    def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """İş akışını adımlarıyla birlikte getir"""
+        with self.manager.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT w.id, w.document_id, w.name, w.current_step, w.status, w.created_by,
+                       w.created_at, w.completed_at
+                FROM workflows w JOIN documents d ON d.id = w.document_id
+                WHERE w.id = ? AND d.organization_id = ?
+            ''', (workflow_id, self.manager.current_user['organization_id']))
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            cursor.execute('''
+                SELECT s.id, s.step_number, s.step_name, s.assigned_to, u.username, s.status,
+                       s.activated_at, s.completed_at, s.notes
+                FROM workflow_steps s
+                LEFT JOIN users u ON u.id = s.assigned_to
+                WHERE s.workflow_id = ?
+                ORDER BY s.step_number
+            ''', (workflow_id,))
+            steps = cursor.fetchall()
+
+        return {
+            'id': row[0],
+            'document_id': row[1],
+            'name': row[2],
+            'current_step': row[3],
+            'status': row[4],
+            'created_by': row[5],
+            'created_at': row[6],
+            'completed_at': row[7],
+            'steps': [{
+                'id': step[0],
+                'step_number': step[1],
+                'step_name': step[2],
+                'assigned_to': step[3],
+                'assignee_name': step[4],
+                'status': step[5],
+                'activated_at': step[6],
+                'completed_at': step[7],
+                'notes': step[8]
+            } for step in steps]
+        }